@@ -0,0 +1,80 @@
+"""
+JsonAware serialization of TonSettings with many DePoolSettings, compared with the implementation
+inspecting every instance with dir() (legacy_to_json), and json vs orjson (if installed) dumps/loads.
+
+    python benchmarks/bench_json.py
+"""
+import json
+from enum import Enum
+
+from common import measure, report
+from settings.core import TonSettings
+from settings.depool_settings.auto_replenish import AutoReplenishSettings
+from settings.depool_settings.depool import DePoolSettings
+from settings.depool_settings.prudent_elections import PrudentElectionSettings
+from settings.elections import ElectionMode, ElectionSettings
+from settings.wallet_management import WalletManagementSettings
+from toncommon.models.TonCoin import TonCoin
+from toncommon.serialization.json import JsonAware, dumps, loads, orjson
+
+CLASSES = [TonSettings, ElectionSettings, WalletManagementSettings, WalletManagementSettings.ActionSpec,
+           WalletManagementSettings.Wallet, WalletManagementSettings.WalletBalanceCheckAction, DePoolSettings,
+           PrudentElectionSettings, TonCoin, AutoReplenishSettings]
+
+
+def legacy_to_json(instance) -> dict:
+    result = {"__class": instance.get_class_code_name()}
+    for attr in dir(instance):
+        value = getattr(instance, attr)
+        if not attr.startswith("__") and not callable(value):
+            if isinstance(value, JsonAware):
+                result[attr] = legacy_to_json(value)
+            elif isinstance(value, list):
+                result[attr] = [legacy_to_json(item) if isinstance(item, JsonAware) else item for item in value]
+            elif isinstance(value, Enum):
+                result[attr] = str(value)
+            else:
+                result[attr] = value
+    return result
+
+
+def make_settings(depools: int) -> TonSettings:
+    elections = ElectionSettings()
+    elections.TON_CONTROL_ELECTION_MODE = ElectionMode.DEPOOL
+    elections.DEPOOL_LIST = [
+        DePoolSettings("0:{:064x}".format(i), proxy_addresses=["-1:{:064x}".format(i), "-1:{:064x}".format(i + 1)],
+                       prudent_election_settings=PrudentElectionSettings(600 + i, 10) if i % 2 else None,
+                       replenish_settings=AutoReplenishSettings(TonCoin(100 + i)) if i % 3 else None)
+        for i in range(depools)]
+    settings = TonSettings()
+    settings.ELECTIONS_SETTINGS = elections
+    return settings
+
+
+def main():
+    for depools in (100, 1000):
+        settings = make_settings(depools)
+        data = settings.to_json()
+        assert json.dumps(data) == json.dumps(legacy_to_json(settings)), "output differs from legacy one"
+        text = json.dumps(data)
+        assert TonSettings.from_json(loads(text), classes=CLASSES).to_json() == data, "round trip differs"
+        base, peak = measure(lambda: legacy_to_json(settings))
+        report("legacy to_json, {} depools".format(depools), base, peak)
+        per_call, peak = measure(lambda: settings.to_json())
+        report("to_json, {} depools".format(depools), per_call, peak, baseline=base)
+        per_call, peak = measure(lambda: TonSettings.from_json(data, classes=CLASSES))
+        report("from_json, {} depools".format(depools), per_call, peak)
+        base, peak = measure(lambda: json.dumps(data))
+        report("json.dumps, {} depools".format(depools), base, peak)
+        per_call, peak = measure(lambda: dumps(data))
+        report("dumps ({}), {} depools".format("orjson" if orjson else "json", depools), per_call, peak,
+               baseline=base)
+        base, peak = measure(lambda: json.loads(text))
+        report("json.loads, {} depools".format(depools), base, peak)
+        per_call, peak = measure(lambda: loads(text))
+        report("loads ({}), {} depools".format("orjson" if orjson else "json", depools), per_call, peak,
+               baseline=base)
+
+
+if __name__ == "__main__":
+    main()
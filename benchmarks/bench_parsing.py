@@ -0,0 +1,55 @@
+"""
+Parsers of toncommon.parsing on large generated outputs.
+Time and allocations of each parser are measured at N and 10*N, so the ratio shows whether parsing stays linear.
+
+    python benchmarks/bench_parsing.py
+"""
+from common import measure, report
+from toncommon.parsing import results, tlb
+from toncommon.parsing.depool import parse_depool_events
+
+EVENT = ('event {eid:064x}\n'
+         'StakeSigningRequested 1613118553 (2021-02-12 08:29:13.000)\n'
+         '{{"electionId":"0x6026430e","proxy":"-1:{eid:064x}"}}\n'
+         '\n')
+
+
+def participant_list_output(members: int) -> str:
+    entries = " ".join(f"[{10 ** 19 + i} {10 ** 13 + i}]" for i in range(members))
+    return f"arguments:  [ 96196 ] \nresult:  [ ({entries}) ] \n"
+
+
+def depool_events_output(events: int) -> list:
+    # lines as they are read from tonos-cli stdout
+    output = "Connecting to net.ton.dev\n\n" + "".join(EVENT.format(eid=i) for i in range(events)) + "Done\n"
+    return output.splitlines(keepends=True)
+
+
+def config_output(values: int) -> str:
+    # ConfigParam with many nested values, ex: param 34 with validator set
+    entries = " ".join(f"v{i}:(validator_addr public_key:(ed25519_pubkey pubkey:x{i:064X}) weight:{i})"
+                       for i in range(values))
+    return f"ConfigParam(34) = ( total:{values} {entries})\n"
+
+
+def scale(name: str, make_output, parse, size: int):
+    base = None
+    for n in (size, size * 10):
+        output = make_output(n)
+        per_call, peak = measure(lambda: parse(output))
+        size = len(output) if isinstance(output, str) else sum(map(len, output))
+        report(f"{name} n={n} ({size // 1024} KiB)", per_call, peak, base and base * 10)
+        base = base or per_call
+
+
+def main():
+    print("{:<55} {:>13} {:>14}   vs linear".format("", "time/call", "peak alloc"))
+    scale("participant_list", participant_list_output, results.parse_participant_list, 1000)
+    # events are consumed as they are parsed, not kept
+    scale("depool events", depool_events_output,
+          lambda lines: sum(1 for _ in parse_depool_events(lines)), 10000)
+    scale("TL-B config param", config_output, lambda out: tlb.parse_config_param(out, 34), 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Redaction of secrets from large tonos-cli outputs: substring search of SecretRedactor vs regex alternation
+of the secrets, and the whole log filter vs the previous per-secret one with two handlers attached.
+
+    python benchmarks/bench_redaction.py
+"""
+import logging
+import os
+import re
+
+from common import measure, report
+from toncommon.contextmanager import SecretRedactor, SensitiveFilter
+
+EVENT = ('event {eid:064x}\n'
+         'StakeSigningRequested 1613118553 (2021-02-12 08:29:13.000)\n'
+         '{{"electionId":"0x6026430e","proxy":"-1:{eid:064x}"}}\n'
+         '\n')
+
+
+class LegacySensitiveFilter(logging.Filter):
+    """
+    Filter used before SecretRedactor, one per secret_manager block, replacing in msg and args of the record
+    """
+
+    def __init__(self, secrets: list):
+        super().__init__("sensitive_filer")
+        self._secrets = secrets
+
+    def filter(self, record: logging.LogRecord) -> int:
+        for secret in self._secrets:
+            if secret:
+                record.msg = record.msg.replace(str(secret), "***")
+        nargs = []
+        for arg in record.args or ():
+            for secret in self._secrets:
+                if secret:
+                    nargs.append(str(arg).replace(str(secret), "***"))
+        record.args = tuple(nargs)
+        return True
+
+
+def tonos_output(size: int, secret: str = None) -> str:
+    events = []
+    total = 0
+    eid = 0
+    while total < size:
+        event = EVENT.format(eid=eid)
+        events.append(event)
+        total += len(event)
+        eid += 1
+    if secret:
+        # once, in the middle, as a command line echoed by the tool
+        events.insert(len(events) // 2, "Input arguments:\n   sign: {}\n".format(secret))
+    return "".join(events)
+
+
+def make_secrets(count: int) -> list:
+    return [os.urandom(32).hex() for _ in range(count)]
+
+
+def regex_redact(pattern, text: str) -> str:
+    return pattern.sub("***", text)
+
+
+def bench_redact(size: int):
+    for count in (1, 3, 10):
+        secrets = make_secrets(count)
+        redactor = SecretRedactor()
+        redactor.register(secrets)
+        pattern = re.compile("|".join(re.escape(secret) for secret in sorted(secrets, key=len, reverse=True)))
+        for present in (False, True):
+            text = tonos_output(size, secrets[0] if present else None)
+            assert regex_redact(pattern, text) == redactor.redact(text)
+            name = "{} secrets, {}, {:.0f} MB".format(count, "present" if present else "absent", size / 2 ** 20)
+            base, peak = measure(lambda: regex_redact(pattern, text))
+            report("regex alternation, " + name, base, peak)
+            per_call, peak = measure(lambda: redactor.redact(text))
+            report("SecretRedactor, " + name, per_call, peak, baseline=base)
+
+
+def handle(filters: list, text: str) -> str:
+    record = logging.LogRecord("tonoscli", logging.DEBUG, __file__, 0, "Code: 0. Output: " + text, (), None)
+    # record passes filters of both handlers (ex: stdout and file)
+    for _ in range(2):
+        for log_filter in filters:
+            log_filter.filter(record)
+    return record.getMessage()
+
+
+def bench_filter(size: int):
+    for count in (1, 3):
+        secrets = make_secrets(count)
+        text = tonos_output(size, secrets[0])
+        redactor = SecretRedactor()
+        redactor.register(secrets)
+        base, peak = measure(lambda: handle([LegacySensitiveFilter([secret]) for secret in secrets], text))
+        report("legacy filter, {} secrets, 2 handlers".format(count), base, peak)
+        per_call, peak = measure(lambda: handle([SensitiveFilter(redactor)], text))
+        report("SensitiveFilter, {} secrets, 2 handlers".format(count), per_call, peak, baseline=base)
+
+
+if __name__ == "__main__":
+    bench_redact(3 * 2 ** 20)
+    bench_filter(3 * 2 ** 20)
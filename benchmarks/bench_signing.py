@@ -0,0 +1,83 @@
+"""
+Join latency of signing election requests with validator-engine-console vs locally with validator keyring.
+Console is replaced by a script answering as validator-engine-console does, --console-delay adds
+time of connecting to the validator (ADNL handshake and round-trip) that a real console spends on each call.
+First depool of the election prepares keys and signs, the others only sign.
+
+    python benchmarks/bench_signing.py [--console-delay 0.05]
+"""
+import argparse
+import os
+import stat
+import struct
+import sys
+import tempfile
+
+from common import measure, report
+from routines.validator_providers.cpp_validator import CPPValidator
+from toncommon import elector
+from tonvalidator.core import TonValidatorEngineConsole
+from tonvalidator.keyring import ValidatorKeyring, PK_ED25519_ID
+
+KEY = "A1" * 32
+ADNL_KEY = "B2" * 32
+
+FAKE_CONSOLE = """#!{python}
+import os, sys, time
+time.sleep(float(os.environ.get("FAKE_CONSOLE_DELAY", "0")))
+print("conn ready")
+commands = [sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == "-c"]
+for command in commands:
+    name = command.split(" ", 1)[0]
+    if name == "exportpub":
+        print("got public key: PUBKEY")
+    elif name == "sign":
+        print("got signature SIGNATURE")
+    elif name != "quit":
+        print("success")
+"""
+
+
+def make_console(work_dir: str) -> TonValidatorEngineConsole:
+    path = os.path.join(work_dir, "validator-engine-console")
+    with open(path, "w") as f:
+        f.write(FAKE_CONSOLE.format(python=sys.executable))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return TonValidatorEngineConsole(path, client_key="client", server_pub_key="server.pub",
+                                     server_addr="127.0.0.1:3030")
+
+
+def make_keyring(work_dir: str) -> ValidatorKeyring:
+    keyring_dir = os.path.join(work_dir, "keyring")
+    os.makedirs(keyring_dir)
+    with open(os.path.join(keyring_dir, KEY), "wb") as f:
+        f.write(struct.pack("<I", PK_ED25519_ID) + os.urandom(32))
+    return ValidatorKeyring(keyring_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--console-delay", type=float, default=0.0,
+                        help="Seconds console spends connecting to validator on each call")
+    args = parser.parse_args()
+    os.environ["FAKE_CONSOLE_DELAY"] = str(args.console_delay)
+    request = elector.validation_request("-1:" + "ab" * 32, 1613118553, 3, ADNL_KEY).hex()
+    with tempfile.TemporaryDirectory() as work_dir:
+        vec = make_console(work_dir)
+        keyring = make_keyring(work_dir)
+        console_validator = CPPValidator(vec=vec, fift_cli=None, lite_client=None)
+        local_validator = CPPValidator(vec=vec, fift_cli=None, lite_client=None, keyring=keyring)
+        print("console delay {}s".format(args.console_delay))
+        for name, func in (
+                ("prepare_election_and_sign", lambda validator: validator.prepare_election_and_sign(
+                    KEY, ADNL_KEY, 1613118553, 1613184089, request)),
+                ("sign_request", lambda validator: validator.sign_request(KEY, request))):
+            base, peak = measure(lambda: func(console_validator), number=20)
+            report("{} console".format(name), base, peak)
+            per_call, peak = measure(lambda: func(local_validator), number=20)
+            report("{} keyring".format(name), per_call, peak, baseline=base)
+        keyring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+# same layout main.py works with, tonlibs and toncontrol packages are imported as top-level ones
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'suton')
+sys.path.insert(0, os.path.join(SRC_DIR, 'tonlibs'))
+sys.path.insert(0, os.path.join(SRC_DIR, 'toncontrol'))
+
+
+def measure(func, number: int = None) -> (float, int):
+    """
+    :param number: Calls to make, picked to run for ~0.2s if not set
+    :return: Seconds per call and peak of memory allocated by one call
+    """
+    if number is None:
+        number, _ = timeit.Timer(func).autorange()
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    per_call = (time.perf_counter() - started) / number
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak
+
+
+def report(name: str, per_call: float, peak: int, baseline: float = None):
+    line = "{:<55} {:>10.3f} ms {:>10.1f} KiB".format(name, per_call * 1000, peak / 1024)
+    if baseline:
+        line += "   x{:.1f}".format(per_call / baseline)
+    print(line)
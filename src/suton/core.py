@@ -12,6 +12,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'tonlibs'))
 from typing import List
 from suton.services import DockerService, TonControlService
 from suton.toncontrol.settings.core import TonSettings
+from toncommon.serialization.json import dumps as json_dumps
 
 
 class TonManage(object):
@@ -90,7 +91,7 @@ class TonManage(object):
         cenv['RUST_TON_NODE_GITHUB_REPO'] = node_settings.RUST_TON_NODE_GITHUB_REPO
 
         cenv['TON_CONTROL_WORK_DIR'] = node_settings.TON_CONTROL_WORK_DIR
-        cenv['TON_CONTROL_SETTINGS'] = json.dumps(node_settings.to_json())
+        cenv['TON_CONTROL_SETTINGS'] = json_dumps(node_settings.to_json())
 
         if node_settings.TON_ENV:
             cenv['TON_ENV'] = node_settings.TON_ENV
@@ -1,67 +1,240 @@
 import json
 import logging
+import os
 import socket
 import threading
-from queue import Queue, Empty
-from typing import Optional
+import time
+from collections import deque
+from typing import Optional, List
+
+from toncommon.serialization.json import dumps as json_dumps
 
 logger = logging.getLogger('logstash_client')
 
 
 class LogStashClient(object):
     """
-        Logstash client which helps sending data to logstash service via TCP protocol in json format
+        Logstash client which helps sending data to logstash service via TCP protocol in json lines format.
+        Single connection is kept open and re-established with backoff if it breaks.
+        Records are queued in memory, once queue is full they are spilled to the file
+        and replayed in order after the in-memory ones are sent.
+        Spill file is written and read by the sender thread only, replay offset is persisted next to it,
+        so records already sent are not resent after restart.
     """
     _instance = None
 
-    def __init__(self, hostname, port, pre_conf_data: Optional[dict] = None):
+    def __init__(self, hostname, port, pre_conf_data: Optional[dict] = None,
+                 max_batch: int = 100, flush_interval: float = 5,
+                 max_queue_size: int = 10000, spill_path: str = None, max_spill_size: int = 50 * 1024 * 1024):
+        """
+        :param max_batch: Max number of records sent at once
+        :param flush_interval: Max time (seconds) record waits in queue for the batch to fill up
+        :param max_queue_size: Max number of records kept in memory, as many more may wait there to be spilled
+        :param spill_path: File to spill records to when in-memory queue is full, dropped if not set
+        :param max_spill_size: Max size of the spill file in bytes, new records are dropped above it
+        """
         self._hostname = hostname
         self._port = port
-        self._queue = Queue()
-        self._max_batch = 10
         self._pre_conf_data = pre_conf_data
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._max_queue_size = max_queue_size
+        self._spill_path = spill_path
+        self._max_spill_size = max_spill_size
+        self._queue = deque()
+        # records to be spilled by the sender thread
+        self._overflow = deque()
+        self._cond = threading.Condition()
+        self._sock = None  # type: Optional[socket.socket]
+        self._backoff = 1
+        self._max_backoff = 60
+        self._dropped = 0
+        # records are spilled since the spill file is not empty, so order is preserved
+        self._spill_offset_path = spill_path + ".offset" if spill_path else None
+        self._spilling = bool(spill_path and os.path.exists(spill_path) and os.path.getsize(spill_path))
+        self._spill_offset = self._load_spill_offset() if self._spilling else 0
 
     def send_data(self, module, data: dict):
         data['module'] = module
         if self._pre_conf_data:
             data.update(self._pre_conf_data)
-        self._queue.put(data, block=False)
+        with self._cond:
+            if not self._spilling and len(self._queue) < self._max_queue_size:
+                self._queue.append(data)
+            elif self._spill_path and len(self._overflow) < self._max_queue_size:
+                self._overflow.append(data)
+                self._spilling = True
+            else:
+                self._drop()
+            self._cond.notify()
 
-    def _process_data(self):
+    def _load_spill_offset(self) -> int:
+        try:
+            with open(self._spill_offset_path) as f:
+                offset = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except Exception as exc:
+            logger.warning("Failed to load spill offset from {}, replaying from start: {}".format(
+                self._spill_offset_path, exc))
+            return 0
+        if offset > os.path.getsize(self._spill_path):
+            logger.warning("Spill offset {} is beyond the end of {}, replaying from start".format(
+                offset, self._spill_path))
+            return 0
+        return offset
+
+    def _save_spill_offset(self, offset: int):
+        tmp_path = self._spill_offset_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(str(offset))
+            os.replace(tmp_path, self._spill_offset_path)
+        except OSError as exc:
+            logger.error("Failed to save spill offset to {}: {}".format(self._spill_offset_path, exc))
+
+    def _flush_overflow(self):
+        """
+        Append records waiting for spill to the spill file, called from the sender thread only
+        """
+        with self._cond:
+            if not self._overflow:
+                return
+            records, self._overflow = self._overflow, deque()
+        dropped = 0
+        try:
+            size = os.path.getsize(self._spill_path) if os.path.exists(self._spill_path) else 0
+            with open(self._spill_path, "a") as f:
+                for data in records:
+                    if size >= self._max_spill_size:
+                        dropped += 1
+                        continue
+                    line = json.dumps(data) + "\n"
+                    f.write(line)
+                    size += len(line.encode('utf-8'))
+        except Exception as exc:
+            logger.error("Failed to spill data to {}: {}".format(self._spill_path, exc))
+            dropped = len(records)
+        with self._cond:
+            for _ in range(dropped):
+                self._drop()
+
+    def _drop(self):
+        self._dropped += 1
+        if self._dropped == 1 or self._dropped % 1000 == 0:
+            logger.warning("LogStash queue is full, {} records dropped so far".format(self._dropped))
+
+    def _read_spilled(self) -> (List[str], int):
+        """
+        :return: Spilled lines of the next batch and file offset after them
+        """
+        lines = []
+        if not os.path.exists(self._spill_path):
+            return lines, self._spill_offset
+        with open(self._spill_path) as f:
+            f.seek(self._spill_offset)
+            while len(lines) < self._max_batch:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    # EOF or partially written line
+                    break
+                lines.append(line)
+            return lines, f.tell() if lines else self._spill_offset
+
+    def _next_batch(self) -> (List[str], Optional[int]):
+        """
+        Wait for the batch to fill up or flush interval to pass
+        :return: Serialized records and spill offset to commit once they are sent (None for in-memory ones)
+        """
+        with self._cond:
+            deadline = None
+            while len(self._queue) < self._max_batch:
+                if self._spilling:
+                    # queue does not grow while spilling, new records wait on disk
+                    break
+                elif self._queue:
+                    deadline = deadline or time.time() + self._flush_interval
+                    timeout = deadline - time.time()
+                else:
+                    timeout = None
+                if timeout is not None and timeout <= 0:
+                    break
+                self._cond.wait(timeout)
+            if self._queue:
+                batch = []
+                while self._queue and len(batch) < self._max_batch:
+                    batch.append(json_dumps(self._queue.popleft()) + "\n")
+                return batch, None
+        # disk I/O is done without the lock, so callers are not blocked by it
+        self._flush_overflow()
+        lines, offset = self._read_spilled()
+        if lines:
+            return lines, offset
+        with self._cond:
+            if self._overflow:
+                # spilled while reading, replay continues with them
+                return [], None
+            self._spilling = False
+        # spill file is fully replayed, new records go to the queue from now on,
+        # offset goes first: without it file is replayed again instead of being skipped
+        for path in (self._spill_offset_path, self._spill_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._spill_offset = 0
+        logger.info("LogStash spill file replayed")
+        return [], None
+
+    def _connect(self):
+        sock = socket.create_connection((self._hostname, self._port), timeout=3)
+        sock.settimeout(5)
+        self._sock = sock
+        logger.info("Connected to logstash {}:{}".format(self._hostname, self._port))
+
+    def _close(self):
+        if self._sock:
+            try:
+                self._sock.close()
+            except socket.error:
+                pass
+            self._sock = None
+
+    def _send_batch(self, batch: List[str]):
+        """
+        Send batch, retrying with backoff until it succeeds
+        """
         while True:
             try:
-                data_to_send = [self._queue.get(block=True, timeout=10)]
-                max_batch = self._max_batch
-                while max_batch > 0:
-                    # check if more data available and batch it
-                    try:
-                        data_to_send.append(self._queue.get_nowait())
-                        max_batch -= 1
-                    except Empty:
-                        break
-                if not self._hostname or not self._port:
-                    continue
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                sock.connect((self._hostname, self._port))
-                sock.settimeout(5)
-                try:
-                    logger.info("Sending {} data chunks to logstash".format(len(data_to_send)))
-                    for data in data_to_send:
-                        sock.send(str(json.dumps(data)).encode('utf-8'))
-                finally:
-                    sock.close()
-            except Empty:
-                # waiting again for more data
-                continue
+                if not self._sock:
+                    self._connect()
+                self._sock.sendall("".join(batch).encode('utf-8'))
+                self._backoff = 1
+                logger.debug("Sent {} data chunks to logstash".format(len(batch)))
+                return
             except socket.error as msg:
-                logger.error("Failed to send data to logstash: {}".format(msg))
+                logger.error("Failed to send data to logstash: {}, retrying in {}s".format(msg, self._backoff))
+                self._close()
+                # keep spilling while logstash is unreachable, so callers' records are not held in memory
+                if self._spill_path:
+                    self._flush_overflow()
+                time.sleep(self._backoff)
+                self._backoff = min(self._backoff * 2, self._max_backoff)
+
+    def _process_data(self):
+        while True:
+            try:
+                batch, spill_offset = self._next_batch()
+                if batch and self._hostname and self._port:
+                    self._send_batch(batch)
+                if spill_offset is not None:
+                    self._spill_offset = spill_offset
+                    self._save_spill_offset(spill_offset)
             except Exception as exc:
                 logger.exception("Failed to send data to logstash: {}".format(exc))
+                time.sleep(1)
 
     @staticmethod
-    def configure_client(hostname, port, pre_conf_data=None):
-        LogStashClient._instance = LogStashClient(hostname, port, pre_conf_data=pre_conf_data)
+    def configure_client(hostname, port, pre_conf_data=None, **kwargs):
+        LogStashClient._instance = LogStashClient(hostname, port, pre_conf_data=pre_conf_data, **kwargs)
 
     @staticmethod
     def start_client():
@@ -76,4 +249,3 @@ class LogStashClient(object):
         :rtype: LogStashClient
         """
         return LogStashClient._instance
-
@@ -1,27 +1,29 @@
-import json
 import time
 import argparse
 import logging
 import sys
 import os
-from logging.handlers import RotatingFileHandler
 
 # TODO: remove once tonlibs are moved away
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tonlibs'))
 
-from routines.validator_providers.cpp_validator import CPPValidator
-from routines.validator_providers.rust_validator import RustValidator
+# providers of the specific node type are imported where they are used, not to load unused tools on start
 from routines.election_providers.depool_provider import DePoolElectionProvider
 from routines.election_providers.direct_provider import DirectElectionProvider
-from rustconsole.core import RustConsole
 from logstash.client import LogStashClient
+from metrics.server import MetricsServer
+from metrics.tools import record_tool_executions, record_circuit_states
+from metrics.tracing import Tracer, TracedThreadPoolExecutor, trace_tool_executions
 from routines.elections import ElectionsRoutine
 from routines.qcontroller import QueueRoutine
-from tonvalidator.core import TonValidatorEngineConsole
-from tonliteclient.core import TonLiteClient
 from tonoscli.core import TonosCli
-from tonfift.core import FiftCli
+from utils.logpipeline import LogPipeline
+from toncommon.configcache import ConfigCache
+from toncommon.core import TonExec
+from toncommon.fingerprint import FingerprintCache
+from toncommon.policy import ExecutionPolicy
 from toncommon.models.TonCoin import TonCoin
+from toncommon.serialization.json import loads as json_loads
 from settings.elections import ElectionSettings, ElectionMode
 from settings.wallet_management import WalletManagementSettings
 from settings.core import TonSettings
@@ -36,6 +38,10 @@ def main():
                         help='Working directory for ton-control service')
     parser.add_argument('--log_path', dest='log_path',
                         default='/var/ton-control/log', help='Path to log file')
+    parser.add_argument('--log_json', action='store_true',
+                        help='Write log files as JSON lines')
+    parser.add_argument('--log_max_message_size', type=int, default=64 * 1024,
+                        help='Long messages (ex: tool outputs) are cut to their head and tail of this size, 0 to disable')
     parser.add_argument("--keys_dir",
                         default='/var/ton-control/configs/keys',
                         help="Path to toncontrol keys folder, copied from hosted machine")
@@ -47,6 +53,9 @@ def main():
                         help='Stake max-factor')
     parser.add_argument("--secret_manager_connection_env", default="TON_CONTROL_SECRET_MANAGER_CONNECTION_STRING",
                         help="Env variable containing secret manager connection string")
+    parser.add_argument("--secret_manager_connection_file", default=None,
+                        help="File containing secret manager connection string (ex: mounted secret), "
+                             "used instead of env variable and re-read on secrets refresh")
     parser.add_argument("--secret_manager_provider",
                         default=TonSettings.TON_CONTROL_SECRET_MANAGER_PROVIDER,
                         help="Python module path to use to import Secret Manager provider")
@@ -94,16 +103,47 @@ def main():
     parser.add_argument("--fift_includes",
                         default='/opt/ton/fift-libs/libs:/opt/ton/fift-libs/smartcont',
                         help="Includes for Fift to generate contract payloads")
+    parser.add_argument("--validator_keyring_path",
+                        help="Path to validator-engine keyring (<db>/keyring) to sign election requests locally "
+                             "instead of via validator-engine-console")
+    parser.add_argument("--use_inprocess_payloads", action="store_true",
+                        help="Build elector payloads in-process instead of generating them with Fift scripts "
+                             "(console in case of Rust node), experimental: not verified against Fift output yet")
+    parser.add_argument("--use_tool_sessions", action="store_true",
+                        help="Keep lite-client and validator-engine-console processes running "
+                             "and send commands to them interactively")
+    parser.add_argument("--use_liteserver_client", action="store_true",
+                        help="Query liteserver directly over ADNL instead of running lite-client "
+                             "(and tonos-cli for config params in case of Rust node)")
+    parser.add_argument("--metrics_port", type=int, default=9110,
+                        help="Local port to serve Prometheus/OpenMetrics metrics on, 0 to disable")
+    parser.add_argument("--metrics_host", default="127.0.0.1",
+                        help="Address to serve metrics on, metrics include wallet balance, "
+                             "so expose them beyond localhost only behind a firewall")
     parser.add_argument("--ton_control_settings_env", default="TON_CONTROL_SETTINGS",
                         help="Env variable name containing settings for TonControl")
+    parser.add_argument("--fast_start", action="store_true",
+                        help="Decrypt secrets, configure tonos-cli and download ABIs concurrently on start "
+                             "instead of on their first use")
 
     args = parser.parse_args()
-    configure_logging(args.log_path)
+    configure_logging(args.log_path, json_lines=args.log_json, max_message_size=args.log_max_message_size)
     log = logging.getLogger("")
+    # startup timing report, tool invocations made on start are recorded into it as well
+    tracer = Tracer.get_tracer()
+    startup_span = tracer.start_cycle("startup")
+    trace_tool_executions()
+    phase_started = time.perf_counter()
+
+    def startup_phase(name: str):
+        nonlocal phase_started
+        now = time.perf_counter()
+        tracer.record(name, now - phase_started)
+        phase_started = now
 
     ton_control_settings = TonSettings()
     if os.environ.get(args.ton_control_settings_env):
-        ton_control_settings = TonSettings.from_json(json.loads(os.environ.get(args.ton_control_settings_env)),
+        ton_control_settings = TonSettings.from_json(json_loads(os.environ.get(args.ton_control_settings_env)),
                                                      classes=[TonSettings, ElectionSettings, WalletManagementSettings,
                                                               WalletManagementSettings.ActionSpec,
                                                               WalletManagementSettings.Wallet,
@@ -154,58 +194,140 @@ def main():
             raise Exception("Required key do not exist: {}".format(key))
 
     log.info("Keys present. Good.")
+    startup_phase("settings")
+    # with fast start, slow initialization steps run in the background while the rest is set up
+    warm_up_executor = TracedThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup") if args.fast_start else None
+    log.info("Initializing SecretManager from {}".format(ton_control_settings.TON_CONTROL_SECRET_MANAGER_PROVIDER))
+    secret_manager_mod = __import__(ton_control_settings.TON_CONTROL_SECRET_MANAGER_PROVIDER, fromlist=['SecretManager'])
+
+    def read_connection_string() -> str:
+        if args.secret_manager_connection_file:
+            with open(args.secret_manager_connection_file) as f:
+                return f.read().strip().strip("'")
+        return os.environ.get(args.secret_manager_connection_env).strip("'")
+
+    secret_manager = secret_manager_mod.SecretManager(read_connection_string(), args.keys_dir)
+    secret_manager.configure_cache(ton_control_settings.SECRET_CACHE_TTL)
+    secrets_warm_up = warm_up_executor.submit(secret_manager.warm_up) if warm_up_executor else None
+    if not secrets_warm_up:
+        secret_manager.warm_up()
+    startup_phase("secret_manager")
     # get queue provider
     log.info("Initializing QueueProvider from {}".format(ton_control_settings.TON_CONTROL_QUEUE_PROVIDER))
     queue_provider_mod = __import__(ton_control_settings.TON_CONTROL_QUEUE_PROVIDER, fromlist=['QueueProvider'])
     queue_provider = queue_provider_mod.QueueProvider(ton_control_settings.get_queue_name())
-    log.info("Initializing SecretManager from {}".format(ton_control_settings.TON_CONTROL_SECRET_MANAGER_PROVIDER))
-    secret_manager_mod = __import__(ton_control_settings.TON_CONTROL_SECRET_MANAGER_PROVIDER, fromlist=['SecretManager'])
-    secret_manager = secret_manager_mod.SecretManager(os.environ.get(args.secret_manager_connection_env).strip("'"),
-                                                      args.keys_dir)
+    startup_phase("queue_provider")
+    if secrets_warm_up:
+        # project secret is needed to configure tonos-cli
+        secrets_warm_up.result()
+        startup_phase("secrets_warm_up")
+    if ton_control_settings.SECRET_REFRESH_INTERVAL:
+        secret_manager.start_refresh(ton_control_settings.SECRET_REFRESH_INTERVAL, read_connection_string)
     # start registrator routine
     log.info("Initializing CLI wrappers...")
+    TonExec.set_default_policy(ExecutionPolicy(timeout=ton_control_settings.TOOL_TIMEOUT,
+                                               command_timeouts=ton_control_settings.TOOL_COMMAND_TIMEOUTS,
+                                               max_retries=ton_control_settings.TOOL_MAX_RETRIES,
+                                               backoff_base=ton_control_settings.TOOL_BACKOFF_BASE,
+                                               backoff_max=ton_control_settings.TOOL_BACKOFF_MAX,
+                                               failure_threshold=ton_control_settings.TOOL_CIRCUIT_FAILURE_THRESHOLD,
+                                               reset_timeout=ton_control_settings.TOOL_CIRCUIT_RESET_TIMEOUT))
+    config_cache = ConfigCache(path=os.path.join(ton_control_settings.TON_WORK_DIR, "config_cache.json"),
+                               ttl=ton_control_settings.CONFIG_CACHE_TTL)
     tonos_cli = TonosCli(cli_path=args.tonos_cli_path, cwd=os.path.join(args.tools_cwd_base, "tonos"),
                          config_url=ton_control_settings.TONOS_CLI_CONFIG_URL,
                          ton_project_id=ton_control_settings.TON_PROJECT_ID,
                          ton_project_secret=secret_manager.get_project_secret(),
                          wallet_abi_url=args.tonos_cli_wallet_abi_url,
                          wallet_tvc_url=args.tonos_cli_wallet_tvc_url,
-                         ton_endpoints=ton_control_settings.TON_ENDPOINTS)
+                         ton_endpoints=ton_control_settings.TON_ENDPOINTS,
+                         separate_endpoints=ton_control_settings.TONOS_CLI_SEPARATE_ENDPOINTS,
+                         hedge_reads=ton_control_settings.TONOS_CLI_HEDGE_READS,
+                         config_cache=config_cache,
+                         fingerprint_cache=FingerprintCache(os.path.join(ton_control_settings.TON_WORK_DIR,
+                                                                         "fingerprints.json")))
+    tonos_warm_up = None
+    if warm_up_executor:
+        abi_urls = [ton_control_settings.ELECTOR_ABI_URL]
+        abi_urls.extend(depool.abi_url for depool in ton_control_settings.ELECTIONS_SETTINGS.DEPOOL_LIST)
+        tonos_warm_up = warm_up_executor.submit(tonos_cli.warm_up, abi_urls)
+
+    liteserver_client = None
+    if args.use_liteserver_client:
+        from tonliteserver.core import TonLiteServerClient
+        liteserver_client = TonLiteServerClient(server_addr=ton_control_settings.TON_CONTROL_VALIDATOR_LITE_CLIENT_ADDR,
+                                                server_pub_key_path=args.lite_server_pub_key,
+                                                config_cache=config_cache)
 
     # create validator provider
     if ton_control_settings.TON_VALIDATOR_TYPE == "rust":
+        from routines.validator_providers.rust_validator import RustValidator
+        from rustconsole.core import RustConsole
         # Rust Console
         rconsole_cli = RustConsole(args.rconsole_path, cwd=os.path.join(args.tools_cwd_base, "rconsole"),
                                    server_addr=args.validator_network_address,
                                    server_pub_key_path=args.server_pub_key,
                                    client_private_key_path=args.client_key)
         validator_provider = RustValidator(rconsole_cli, tonos_cli,
-                                           elector_abi_url=ton_control_settings.ELECTOR_ABI_URL)
+                                           elector_abi_url=ton_control_settings.ELECTOR_ABI_URL,
+                                           lite_client=liteserver_client,
+                                           use_console_payloads=not args.use_inprocess_payloads)
     else:
-        fift_cli = FiftCli(cli_path=args.fift_cli_path, includes=args.fift_includes)
-        lite_client = TonLiteClient(client_path=args.lite_client_path,
-                                    server_addr=ton_control_settings.TON_CONTROL_VALIDATOR_LITE_CLIENT_ADDR,
-                                    client_pub_key=args.lite_server_pub_key)
+        from routines.validator_providers.cpp_validator import CPPValidator
+        from tonfift.core import FiftCli
+        from tonliteclient.core import TonLiteClient
+        from tonvalidator.core import TonValidatorEngineConsole
+        from tonvalidator.keyring import ValidatorKeyring
+        fift_cli = None if args.use_inprocess_payloads else FiftCli(cli_path=args.fift_cli_path,
+                                                                    includes=args.fift_includes)
+        lite_client = liteserver_client or TonLiteClient(client_path=args.lite_client_path,
+                                                         server_addr=ton_control_settings.TON_CONTROL_VALIDATOR_LITE_CLIENT_ADDR,
+                                                         client_pub_key=args.lite_server_pub_key,
+                                                         use_session=args.use_tool_sessions,
+                                                         config_cache=config_cache)
         validation_engine_console = TonValidatorEngineConsole(args.validator_engine_path,
                                                               client_key=ton_control_settings.TON_CONTROL_CLIENT_KEY_PATH,
                                                               server_pub_key=args.server_pub_key,
-                                                              server_addr=ton_control_settings.TON_CONTROL_VALIDATOR_NETWORK_ADDR)
+                                                              server_addr=ton_control_settings.TON_CONTROL_VALIDATOR_NETWORK_ADDR,
+                                                              use_session=args.use_tool_sessions)
+        keyring = ValidatorKeyring(args.validator_keyring_path) if args.validator_keyring_path else None
         validator_provider = CPPValidator(vec=validation_engine_console, fift_cli=fift_cli,
-                                          lite_client=lite_client)
+                                          lite_client=lite_client, keyring=keyring)
 
     # create appropriate election provider
     if ton_control_settings.ELECTIONS_SETTINGS.TON_CONTROL_ELECTION_MODE == ElectionMode.DEPOOL:
         election_provider = DePoolElectionProvider(validator_provider)
     else:
         election_provider = DirectElectionProvider(validator_provider)
+    startup_phase("tools")
 
     log.info("Initializing LogStash client...")
     LogStashClient.configure_client("tonlogstash", 5959, {
         "node_name": ton_control_settings.NODE_NAME
-    })
+    }, max_batch=ton_control_settings.LOGSTASH_BATCH_SIZE,
+        flush_interval=ton_control_settings.LOGSTASH_FLUSH_INTERVAL,
+        max_queue_size=ton_control_settings.LOGSTASH_MAX_QUEUE_SIZE,
+        spill_path=os.path.join(ton_control_settings.TON_WORK_DIR, "logstash_spill.jsonl"),
+        max_spill_size=ton_control_settings.LOGSTASH_MAX_SPILL_SIZE)
 
     log.info("Starting routines...")
     LogStashClient.start_client()
+    record_tool_executions()
+    record_circuit_states()
+    if args.metrics_port:
+        MetricsServer(args.metrics_port, host=args.metrics_host).start()
+    startup_phase("telemetry")
+    if tonos_warm_up:
+        for task, duration in tonos_warm_up.result().items():
+            log.debug("Warm-up of {} took {:.3f}s".format(task, duration))
+        warm_up_executor.shutdown()
+        startup_phase("tonos_cli_warm_up")
+    # routines trace their own cycles
+    tracer.end_cycle()
+    log.info("Startup took {:.3f}s:\n{}".format(startup_span.duration, startup_span.format_tree()))
+    LogStashClient.get_client().send_data('startup', {"fast_start": args.fast_start,
+                                                      "duration": startup_span.duration,
+                                                      "timing": startup_span.to_dict()})
     # Validator
     elections_routine = ElectionsRoutine(work_dir=os.path.join(args.work_dir, "elections"),
                                          tonos_cli=tonos_cli,
@@ -213,7 +335,8 @@ def main():
                                          validator_provider=validator_provider,
                                          secret_manager=secret_manager,
                                          max_sync_diff=ton_control_settings.VALIDATOR_MAX_SYNC_DIFF,
-                                         election_settings=ton_control_settings.ELECTIONS_SETTINGS).start()
+                                         election_settings=ton_control_settings.ELECTIONS_SETTINGS,
+                                         config_cache=config_cache).start()
     # Queue
     QueueRoutine(elections_routine=elections_routine,
                  queue_provider=queue_provider).start()
@@ -230,7 +353,7 @@ def main():
             pass
 
 
-def configure_logging(log_dir):
+def configure_logging(log_dir, json_lines=False, max_message_size=64 * 1024):
     loggers = {
         "": {
             "file": "toncontrol.log"
@@ -244,37 +367,33 @@ def configure_logging(log_dir):
         "logstash_client": {
             "file": "telemetry.log"
         },
-        # external libs
+        # external libs, full output of the tools is logged there
         "tonvalidator | toncommon | tonoscli": {
-            "file": "tonutils.log"
+            "file": "tonutils.log",
+            "max_message_size": 16 * 1024
         }
     }
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    default_formatter = logging.Formatter('%(asctime)s::%(name)s::%(levelname)s::%(message)s')
+    # records are formatted and written by background thread, callers only enqueue them
+    pipeline = LogPipeline(log_dir, json_lines=json_lines, max_message_size=max_message_size)
     for logger_names, logger_settings in loggers.items():
-        for logger_name in logger_names.split("|"):
-            logger_name = logger_name.strip()
+        logger_names = [logger_name.strip() for logger_name in logger_names.split("|")]
+        propagate = logger_settings.get('propagate', False)
+        for logger_name in logger_names:
             logger = logging.getLogger(logger_name)
-            logger.propagate = logger_settings.get('propagate', False)
+            logger.propagate = propagate
             logger.setLevel(logging.DEBUG)
-            if not logger.propagate:
-                # if not propagate, then attach stdout. otherwise 'base' will provide this handler
-                fh_stdout = logging.StreamHandler()
-                fh_stdout.setLevel(logging.DEBUG)
-                fh_stdout.setFormatter(default_formatter)
-                logger.addHandler(fh_stdout)
-            if "file" in logger_settings:
-                log_file = os.path.join(log_dir, logger_settings["file"])
-                logger.info("Logging to: {}".format(log_file))
-                # create the file logging handler
-                fh = RotatingFileHandler(log_file, maxBytes=50 * 1024 * 1024,
-                                         backupCount=2)
-                fh.setFormatter(default_formatter)
-                fh.setLevel(logging.DEBUG)
-                logger.addHandler(fh)
-            # add handler to logger object
-            logger.info("Logger initialized")
+        if not propagate:
+            # if not propagate, then attach stdout. otherwise 'base' will provide this handler
+            pipeline.add_loggers(logger_names, file=logger_settings.get("file"),
+                                 max_message_size=logger_settings.get("max_message_size"))
+    pipeline.start()
+    for logger_names, logger_settings in loggers.items():
+        if "file" in logger_settings:
+            logger = logging.getLogger(logger_names.split("|")[0].strip())
+            logger.info("Logging to: {}".format(os.path.join(log_dir, logger_settings["file"])))
+    return pipeline
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Dict[str, str] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(object):
+    TYPE = None
+
+    def __init__(self, name: str, documentation: str, labels: List[str] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels or [])
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError("Metric {} expects labels {}, got {}".format(self.name, self.label_names,
+                                                                          tuple(labels)))
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self, openmetrics: bool) -> List[str]:
+        raise NotImplementedError()
+
+    def expose(self, openmetrics: bool = False) -> List[str]:
+        name = self.name
+        if openmetrics and self.TYPE == "counter" and name.endswith("_total"):
+            # OpenMetrics declares counter family without the suffix
+            name = name[:-len("_total")]
+        lines = ["# HELP {} {}".format(name, self.documentation),
+                 "# TYPE {} {}".format(name, self.TYPE)]
+        with self._lock:
+            lines.extend(self._samples(openmetrics))
+        return lines
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self, openmetrics: bool) -> List[str]:
+        return ["{}{} {}".format(self.name, _format_labels(self.label_names, key), _format_value(value))
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def set(self, value: Optional[float], **labels):
+        if value is None:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> Optional[float]:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def _samples(self, openmetrics: bool) -> List[str]:
+        return ["{}{} {}".format(self.name, _format_labels(self.label_names, key), _format_value(value))
+                for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: List[str] = None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _samples(self, openmetrics: bool) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(self.name,
+                                                     _format_labels(self.label_names, key,
+                                                                    {"le": _format_value(bound)}),
+                                                     cumulative))
+            labels = _format_labels(self.label_names, key)
+            lines.append("{}_count{} {}".format(self.name, labels, cumulative))
+            lines.append("{}_sum{} {}".format(self.name, labels, _format_value(total)))
+        return lines
+
+
+class MetricsRegistry(object):
+    """
+    In-process registry of metrics, exposed in Prometheus text format
+    """
+    _instance = None
+
+    def __init__(self):
+        self._metrics = {}  # type: Dict[str, Metric]
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, documentation: str, labels: List[str] = None, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, documentation, labels, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError("Metric {} already registered as {}".format(name, metric.TYPE))
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: List[str] = None) -> Counter:
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: List[str] = None) -> Gauge:
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: List[str] = None,
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def expose(self, openmetrics: bool = False) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.extend(metric.expose(openmetrics=openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def get_registry() -> 'MetricsRegistry':
+        if not MetricsRegistry._instance:
+            MetricsRegistry._instance = MetricsRegistry()
+        return MetricsRegistry._instance
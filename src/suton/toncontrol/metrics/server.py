@@ -0,0 +1,49 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics.registry import MetricsRegistry
+
+log = logging.getLogger("metrics")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class MetricsServer(object):
+    """
+    HTTP endpoint serving metrics of the registry at /metrics,
+    in OpenMetrics format if scraper asks for it, Prometheus text format otherwise
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = None):
+        self._registry = registry or MetricsRegistry.get_registry()
+        registry = self._registry
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.expose(openmetrics=openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                log.debug(fmt % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    def start(self):
+        log.info("Serving metrics on {}:{}".format(*self._server.server_address[:2]))
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+
+    def stop(self):
+        self._server.shutdown()
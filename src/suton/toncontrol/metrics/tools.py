@@ -0,0 +1,40 @@
+from logstash.client import LogStashClient
+from metrics.registry import MetricsRegistry
+from toncommon.core import TonExec
+from toncommon.policy import CircuitBreaker
+
+
+def record_tool_executions(registry: MetricsRegistry = None):
+    """
+    Record latency and failures of every TON utility invocation, labelled by tool and command
+    """
+    registry = registry or MetricsRegistry.get_registry()
+    durations = registry.histogram("ton_tool_execution_seconds", "Duration of TON utility invocations",
+                                   ["tool", "command"])
+    failures = registry.counter("ton_tool_failures_total", "Number of TON utility invocations that failed",
+                                ["tool", "command"])
+
+    def listener(tool: str, command: str, duration: float, retcode: int):
+        durations.observe(duration, tool=tool, command=command)
+        if retcode != 0:
+            failures.inc(tool=tool, command=command)
+
+    TonExec.add_execution_listener(listener)
+
+
+def record_circuit_states(registry: MetricsRegistry = None):
+    """
+    Expose circuit state of every TON utility (0 - closed, 1 - half open, 2 - open) and report changes to LogStash
+    """
+    registry = registry or MetricsRegistry.get_registry()
+    states = registry.gauge("ton_tool_circuit_state", "Circuit state of TON utility: 0 closed, 1 half open, 2 open",
+                            ["tool"])
+    values = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+    def listener(tool: str, state: str):
+        states.set(values[state], tool=tool)
+        client = LogStashClient.get_client()
+        if client:
+            client.send_data('tools', {"tool": tool, "circuit_state": state})
+
+    CircuitBreaker.add_listener(listener)
@@ -0,0 +1,258 @@
+import cProfile
+import functools
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Optional
+
+from toncommon.core import TonExec
+
+log = logging.getLogger("tracing")
+
+
+class Span(object):
+
+    def __init__(self, name: str, start: float = None, attrs: dict = None):
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.end = None  # type: Optional[float]
+        self.attrs = attrs or {}
+        self.thread_id = threading.get_ident()
+        self.children = []  # type: List[Span]
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self) -> dict:
+        data = {'name': self.name, 'duration_ms': round(self.duration * 1000, 1)}
+        if self.attrs:
+            data['attrs'] = self.attrs
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+    def format_tree(self, indent: int = 0) -> str:
+        lines = ["{}{} {:.3f}s".format("  " * indent, self.name, self.duration)]
+        for child in self.children:
+            lines.append(child.format_tree(indent + 1))
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Chrome trace event format (chrome://tracing, Perfetto, speedscope)
+        """
+        events = []
+
+        def collect(span: Span):
+            events.append({'name': span.name, 'ph': 'X', 'pid': 1, 'tid': span.thread_id,
+                           'ts': round((span.start - self.start) * 1e6), 'dur': round(span.duration * 1e6),
+                           'args': span.attrs})
+            for child in span.children:
+                collect(child)
+        collect(self)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+class Tracer(object):
+    """
+    Collects timing tree of a cycle. Spans opened in a thread nest into the span opened before in the same thread.
+    Spans of the other threads are recorded only when the work is handed to them with bind()
+    (ex: TracedThreadPoolExecutor), then they nest into the span that submitted the work.
+    Outside of the cycle and in unrelated threads (other routines) spans are not recorded.
+    """
+    _instance = None
+
+    def __init__(self):
+        self._local = threading.local()
+        self._root = None  # type: Optional[Span]
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _parent(self) -> Optional[Span]:
+        stack = self._stack()
+        if stack:
+            return stack[-1]
+        return None
+
+    def _attach(self, parent: Span, span: Span):
+        with self._lock:
+            parent.children.append(span)
+
+    def start_cycle(self, name: str) -> Span:
+        root = Span(name)
+        self._root = root
+        self._local.stack = [root]
+        return root
+
+    def end_cycle(self) -> Optional[Span]:
+        root = self._root
+        if root:
+            root.end = time.perf_counter()
+        self._root = None
+        self._local.stack = []
+        return root
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        parent = self._parent()
+        if parent is None:
+            yield None
+            return
+        span = Span(name, attrs=attrs)
+        self._attach(parent, span)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+    def record(self, name: str, duration: float, **attrs):
+        """
+        Record already finished span
+        """
+        parent = self._parent()
+        if parent is None:
+            return
+        end = time.perf_counter()
+        span = Span(name, start=end - duration, attrs=attrs)
+        span.end = end
+        self._attach(parent, span)
+
+    def bind(self, func):
+        """
+        Wrap function to be run in another thread so its spans nest into the current span of the calling thread
+        """
+        parent = self._parent()
+        if parent is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+        return wrapper
+
+    @staticmethod
+    def get_tracer() -> 'Tracer':
+        if not Tracer._instance:
+            Tracer._instance = Tracer()
+        return Tracer._instance
+
+
+def traced(name: str = None):
+    """
+    Decorator wrapping function call into a span
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Tracer.get_tracer().span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Executor whose tasks are traced as part of the span that submitted them
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(Tracer.get_tracer().bind(fn), *args, **kwargs)
+
+
+def trace_tool_executions(tracer: Tracer = None):
+    """
+    Record every TON utility invocation as a span
+    """
+    tracer = tracer or Tracer.get_tracer()
+
+    def listener(tool: str, command: str, duration: float, retcode: int):
+        tracer.record(f"{tool} {command}", duration, retcode=retcode)
+
+    TonExec.add_execution_listener(listener)
+
+
+class SlowestCycleProfiler(object):
+    """
+    Profiles cycles with cProfile (thread of the cycle only) and keeps profiles of N slowest ones,
+    profiles can be inspected with pstats or snakeviz
+    """
+
+    def __init__(self, out_dir: str, keep: int):
+        self._out_dir = out_dir
+        self._keep = keep
+        self._slowest = []  # type: List[tuple]
+        self._profile = None  # type: Optional[cProfile.Profile]
+
+    @property
+    def enabled(self) -> bool:
+        return self._keep > 0
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self, duration: float):
+        if not self._profile:
+            return
+        profile, self._profile = self._profile, None
+        profile.disable()
+        if len(self._slowest) >= self._keep and duration <= self._slowest[0][0]:
+            return
+        path = os.path.join(self._out_dir, "cycle-{}-{:.1f}s.prof".format(int(time.time()), duration))
+        try:
+            os.makedirs(self._out_dir, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as ex:
+            log.warning("Failed to save profile of the cycle: {}".format(ex))
+            return
+        heapq.heappush(self._slowest, (duration, path))
+        if len(self._slowest) > self._keep:
+            _, evicted = heapq.heappop(self._slowest)
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+        log.info("Profile of the cycle ({:.1f}s) saved to {}".format(duration, path))
+
+
+def write_chrome_trace(span: Span, out_dir: str, keep: int = 100) -> str:
+    """
+    Write span as Chrome trace, only the latest `keep` traces are kept in out_dir
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "cycle-{}.trace.json".format(int(time.time())))
+    with open(path, "w") as f:
+        json.dump(span.to_chrome_trace(), f)
+    traces = sorted((os.path.join(out_dir, name) for name in os.listdir(out_dir)
+                     if name.startswith("cycle-") and name.endswith(".trace.json")), key=os.path.getmtime)
+    for evicted in traces[:max(0, len(traces) - keep)]:
+        if evicted == path:
+            continue
+        try:
+            os.remove(evicted)
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from metrics.registry import MetricsRegistry
+
+log = logging.getLogger("elections")
+
+CACHE_REQUESTS = MetricsRegistry.get_registry().counter("ton_cycle_cache_requests_total",
+                                                        "Reads of the election cycle served by cycle cache",
+                                                        ["result"])
+
+
+class _Entry(object):
+    __slots__ = ("ready", "value", "error", "expires")
+
+    def __init__(self, expires: Optional[float]):
+        self.ready = threading.Event()
+        self.value = None
+        self.error = None  # type: Optional[BaseException]
+        self.expires = expires
+
+
+class CycleCache(object):
+    """
+    Memoizes reads of the election cycle. Identical reads are coalesced: when value is being loaded,
+    other threads asking for the same key wait for that load instead of starting their own.
+    Entries live until the end of the cycle or until their TTL expires, writes invalidate the keys they affect.
+    Failed loads are not cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # type: Dict[Hashable, _Entry]
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None):
+        """
+        :param key: Key of the read (ex: ("account", address))
+        :param loader: Loads the value if it is not cached
+        :param ttl: Max age of the value in seconds, kept until the end of the cycle if omitted
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires is not None and entry.ready.is_set() and time.monotonic() >= entry.expires:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                entry = self._entries[key] = _Entry(time.monotonic() + ttl if ttl is not None else None)
+                self._misses += 1
+                result = "miss"
+            elif entry.ready.is_set():
+                self._hits += 1
+                result = "hit"
+            else:
+                self._coalesced += 1
+                result = "coalesced"
+        CACHE_REQUESTS.inc(result=result)
+        if result != "miss":
+            entry.ready.wait()
+            if entry.error:
+                raise entry.error
+            return entry.value
+        try:
+            entry.value = loader()
+        except BaseException as ex:
+            entry.error = ex
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.ready.set()
+        return entry.value
+
+    def put(self, key: Hashable, value, ttl: Optional[float] = None):
+        """
+        Store value read elsewhere (ex: prefetched concurrently)
+        """
+        entry = _Entry(time.monotonic() + ttl if ttl is not None else None)
+        entry.value = value
+        entry.ready.set()
+        with self._lock:
+            self._entries[key] = entry
+
+    def invalidate(self, *keys: Hashable):
+        """
+        Drop values affected by a write, loads in flight are delivered to their waiters but not kept
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> (int, int, int):
+        """
+        Drop all the values, called at the end of the cycle
+        :return: Hits, misses and coalesced reads since the last clear
+        """
+        with self._lock:
+            self._entries.clear()
+            stats = self._hits, self._misses, self._coalesced
+            self._hits = self._misses = self._coalesced = 0
+        log.info("Cycle cache: {} hits, {} misses, {} coalesced".format(*stats))
+        return stats
@@ -1,19 +1,29 @@
+import asyncio
 import datetime
-import json
 import logging
 import os
 import threading
 import time
-from typing import List, Optional, Tuple
+from concurrent.futures import Future, as_completed
+from typing import List, Optional, Tuple, Dict
 
 from exceptions.depool import LowDePoolBalanceException
+from metrics.registry import MetricsRegistry
+from metrics.tracing import Tracer, TracedThreadPoolExecutor, SlowestCycleProfiler, traced, write_chrome_trace
+from routines.cyclecache import CycleCache
 from routines.election_providers.core import ElectionProvider
 from routines.models.elections import Election
+from routines.models.registry import ElectionRegistry
+from routines.scheduler import ElectionScheduler
+from routines.statestore import StateStore
 from routines.validator_providers.core import Validator
 from secrets.interfaces.secretmanager import SecretManagerAbstract
 from settings.elections import ElectionSettings, ElectionMode
+from settings.depool_settings.depool import DePoolSettings
 from settings.depool_settings.prudent_elections import PrudentElectionSettings
+from toncommon.configcache import ConfigCache
 from toncommon.models.depool.DePoolElectionEvent import DePoolElectionEvent
+from toncommon.models.depool.DePoolEvent import DePoolEvent
 from toncommon.models.depool.DePoolLowBalanceEvent import DePoolLowBalanceEvent
 from toncommon.models.TonAddress import TonAddress
 from toncommon.models.TonCoin import TonCoin
@@ -25,8 +35,24 @@ from logstash.client import LogStashClient
 
 log = logging.getLogger("elections")
 
+_metrics = MetricsRegistry.get_registry()
+TIME_DIFF = _metrics.gauge("ton_validator_time_diff_seconds", "Time difference between node and network")
+VALIDATOR_BALANCE = _metrics.gauge("ton_validator_balance_nanotokens", "Balance of the validator wallet")
+ACTIVE_ELECTIONS = _metrics.gauge("ton_active_elections", "Number of elections validator participates in")
+PARTICIPANTS = _metrics.gauge("ton_election_participants", "Number of participants of the current elections")
+LOWEST_STAKE = _metrics.gauge("ton_election_lowest_stake_nanotokens", "Lowest stake of the current elections")
+LOWEST_VALID_STAKE = _metrics.gauge("ton_election_lowest_valid_stake_nanotokens",
+                                    "Lowest stake that gets into validator set of the current elections")
+MAX_VALIDATORS = _metrics.gauge("ton_election_max_validators", "Max number of validators")
+RECOVERED_STAKES = _metrics.counter("ton_recovered_stakes_nanotokens_total", "Stakes recovered from elector")
+CYCLE_ERRORS = _metrics.counter("ton_election_cycle_errors_total", "Number of election checks that failed")
+LAST_CYCLE = _metrics.gauge("ton_election_last_cycle_timestamp_seconds", "Time of the last election check")
+
 
 class ElectionsRoutine(object):
+    # cycle cache entries read from the chain config, outdated once config epoch changes
+    EPOCH_KEYS = ('elector_addr', 'election_ids', 'participant_stakes',
+                  'elector_params', 'election_validator_params', 'stake_params')
 
     def __init__(self,
                  work_dir: str,
@@ -36,7 +62,8 @@ class ElectionsRoutine(object):
                  validator_provider: Validator,  # CPP or Rust Implementation
                  max_sync_diff=50,
                  min_balance: int = 0,
-                 election_settings: ElectionSettings = None):
+                 election_settings: ElectionSettings = None,
+                 config_cache: ConfigCache = None):
         self._work_dir = work_dir
         self._election_provider = election_provider
         self._validator_provider = validator_provider
@@ -47,27 +74,61 @@ class ElectionsRoutine(object):
         self._stake_to_make = election_settings.TON_CONTROL_DEFAULT_STAKE
         self._stake_max_factor = election_settings.TON_CONTROL_STAKE_MAX_FACTOR
         self._enabled = True
-        self._active_elections: List[Election] = []
+        self._active_elections = ElectionRegistry()
+        # depools are processed concurrently, guards active elections and keys of the election
+        self._elections_lock = threading.RLock()
+        # number of joins in progress by election id, keys shared by them are not deleted while any is running
+        self._joins_in_progress = {}  # type: Dict[int, int]
+        # keys being added to validator by the join that generated them, other joins wait for it before signing
+        self._key_preparations = {}  # type: Dict[str, Future]
         self._active_election_file = os.path.join(self._work_dir, "active_elections.json")
+        self._state = StateStore(self._work_dir)
         self._check_node_sync_interval_seconds = 2 * 60
         self._check_elections_interval_seconds = 15 * 60
+        self._scheduler = ElectionScheduler()
+        self._poll_interval = election_settings.TON_CONTROL_ELECTION_POLL_INTERVAL
+        # elector and its election ids seen by the last cycle, polled for changes while sleeping
+        self._polled_elector_addr = None  # type: Optional[str]
+        self._polled_election_ids = []  # type: List[str]
         self._election_settings = election_settings
         self._election_mode = election_settings.TON_CONTROL_ELECTION_MODE
+        self._async_queries = election_settings.TON_CONTROL_ASYNC_QUERIES
+        self._config_cache = config_cache
+        # tonos-cli versions without 'query-raw' can't tell key block, config epoch is then election ids only
+        self._key_block_query_supported = True
+        self._depool_events: Dict[str, List[DePoolEvent]] = {}
+        # reads repeated within the cycle (accounts, params, decrypted seeds) are done once
+        self._cycle_cache = CycleCache()
+        self._tracer = Tracer.get_tracer()
+        self._trace_cycles = election_settings.TON_CONTROL_TRACE_CYCLES
+        self._trace_files_keep = election_settings.TON_CONTROL_TRACE_FILES_KEEP
+        self._profiler = SlowestCycleProfiler(os.path.join(self._work_dir, "profiles"),
+                                              election_settings.TON_CONTROL_PROFILE_SLOWEST_CYCLES)
 
     def load_active_elections(self):
-        if os.path.exists(self._active_election_file):
-            with open(self._active_election_file) as f:
-                election_data = json.load(f)
-            for election in election_data['elections']:
-                self._active_elections.append(Election.from_json(election))
+        StateStore.migrate_from(self._state, self._active_election_file)
+        self._state.load()
+        for election in self._state.get_elections():
+            self._active_elections.add(Election.from_json(election))
+        for depool_data in self._election_settings.DEPOOL_LIST or []:
+            depool_data.set_last_ticktock(self._state.get_depool_value(depool_data.depool_address,
+                                                                       'last_ticktock', 0))
+            if depool_data.replenish_settings:
+                depool_data.replenish_settings.set_last_replenishment_time(
+                    self._state.get_depool_value(depool_data.depool_address, 'last_replenishment_time', 0))
         return self._active_elections
 
+    @traced()
     def save_active_elections(self):
-        json_data = json.dumps({
-            'elections': [election.to_json() for election in self._active_elections]
-        }, indent=2)
-        with open(self._active_election_file, "w") as f:
-            f.write(json_data)
+        """
+        Persist active elections, only changed ones are written
+        """
+        with self._elections_lock:
+            elections = {}
+            for election in self._active_elections:
+                election_json = election.to_json()
+                elections[StateStore.election_key(election_json)] = election_json
+            self._state.save_elections(elections)
 
     def start(self):
         if not os.path.exists(self._work_dir):
@@ -82,25 +143,92 @@ class ElectionsRoutine(object):
         return min(balance, TonCoin.convert_to_nano_tokens(int(self._stake_to_make)))
 
     def _get_active_election_by_id(self, eid) -> Optional[Election]:
-        for election in self._active_elections:
-            if str(election.election_id) == str(eid):
-                return election
-        return None
-
-    def _cleanup_election(self, election: Election):
-        if election.key and election.adnl_key:
-            self._validator_provider.delete_temp_key(election.key, election.adnl_key)
-        if election.key:
-            self._validator_provider.delete_key(election.key)
-        if election in self._active_elections:
-            self._active_elections.remove(election)
+        with self._elections_lock:
+            return self._active_elections.get(eid)
+
+    def _add_active_election(self, election: Election):
+        with self._elections_lock:
+            self._active_elections.add(election)
+
+    def _cleanup_elections(self, elections: List[Election]):
+        """
+        Delete keys of the elections in a single validator call and forget them once deleted
+        """
+        keys = [(election.key, election.adnl_key) for election in elections if election.key]
+        if keys:
+            self._validator_provider.delete_keys(keys)
+        with self._elections_lock:
+            for election in elections:
+                self._active_elections.remove(election)
+
+    def _start_join(self, election: Election):
+        with self._elections_lock:
+            eid = ElectionRegistry.normalize_id(election.election_id)
+            self._joins_in_progress[eid] = self._joins_in_progress.get(eid, 0) + 1
+
+    def _finish_join(self, election: Election, joined: bool):
+        """
+        Keys of the election are shared by depools joining it concurrently, so on failure they are deleted
+        only if no other join is running and nobody joined the election with them
+        """
+        with self._elections_lock:
+            eid = ElectionRegistry.normalize_id(election.election_id)
+            joins = self._joins_in_progress.pop(eid, 1) - 1
+            if joins:
+                self._joins_in_progress[eid] = joins
+            if joined or joins or self._active_elections.get(eid) is election or not election.key:
+                return
+            keys = [(election.key, election.adnl_key)]
+            election.key = election.adnl_key = None
+        try:
+            self._validator_provider.delete_keys(keys)
+        except Exception as ex:
+            log.warning("Failed to delete keys of {}: {}".format(election, ex))
+
+    def _discard_keys(self, election: Election, key: str, adnl_key: str):
+        """
+        Delete keys which failed to be added to validator, next attempt generates new ones
+        """
+        try:
+            self._validator_provider.delete_keys([(key, adnl_key)])
+        except Exception as ex:
+            log.warning("Failed to delete keys of {}: {}".format(election, ex))
+        with self._elections_lock:
+            if election.key == key:
+                election.key = election.adnl_key = None
 
     def _get_wallet_seed(self):
-        return self._secret_manager.get_validator_seed()
+        return self._cycle_cache.get('validator_seed', self._secret_manager.get_validator_seed)
+
+    def _get_custodian_seeds(self):
+        return self._cycle_cache.get('custodian_seeds', self._secret_manager.get_custodian_seeds)
+
+    def _get_account(self, address: str):
+        def loader():
+            with self._tracer.span('get_account'):
+                return self._tonos_cli.get_account(address)
+        return self._cycle_cache.get(('account', address), loader)
+
+    def _invalidate_accounts(self, *addresses: str):
+        """
+        Balances of the accounts changed by the transaction are read again
+        """
+        self._cycle_cache.invalidate(*[('account', address) for address in addresses])
 
     def _get_wallet_address(self):
         return self._secret_manager.get_validator_address()
 
+    def _get_depool_events(self, depool_addr: str, max_events: int = 100) -> List[DePoolEvent]:
+        """
+        Latest events of the depool, only events emitted since the previous check are read from the chain
+        """
+        new_events = self._tonos_cli.get_depool_events(depool_addr, max=max_events,
+                                                       only_new=depool_addr in self._depool_events)
+        events = (new_events + self._depool_events.get(depool_addr, []))[:max_events]
+        self._depool_events[depool_addr] = events
+        return events
+
+    @traced()
     def _check_if_synced(self):
         try:
             sync_status = self._validator_provider.get_sync_status()
@@ -109,6 +237,7 @@ class ElectionsRoutine(object):
                 log.error("Time diff is not available yet, node still initializing...")
                 return False
             log.debug(f"Time diff: {time_diff}, max allowed {self._max_sync_diff}")
+            TIME_DIFF.set(time_diff)
             self._send_telemetry('node_status', {'time_diff': time_diff,
                                                  'sync_status': sync_status.sync_status,
                                                  'max_sync_diff': self._max_sync_diff})
@@ -125,6 +254,7 @@ class ElectionsRoutine(object):
         data['data_type'] = data_type
         LogStashClient.get_client().send_data('elections', data)
 
+    @traced()
     def _join_elections_validator_mode(self, validator_addr: str, election: Election,
                                        elector_addr: str, election_stake: int, stake_params: StakeParams,
                                        elector_params: ElectionParams) -> bool:
@@ -161,22 +291,26 @@ class ElectionsRoutine(object):
             election_telemetry['election_id'] = election.election_id
             election_telemetry['election_stake'] = election_stake
             election.election_stake += election_stake
+            joined = False
+            self._start_join(election)
             try:
                 self._sign_and_join_elections(validator_addr, election=election,
                                               elector_params=elector_params,
                                               beneficiary_masterchain_adr=validator_addr,
                                               elector_adr=elector_addr)
-                if not self._get_active_election_by_id(election.election_id):
-                    self._active_elections.append(election)
+                self._add_active_election(election)
+                joined = True
                 election_telemetry['elected'] = True
                 return True
             except Exception as ex:
                 election_telemetry['error'] = str(ex)
-                self._cleanup_election(election)
                 raise
+            finally:
+                self._finish_join(election, joined)
         finally:
             self._send_telemetry('election_join', election_telemetry)
 
+    @traced()
     def _join_elections_depool_mode(self, depool_addr: str, validator_addr: str, proxy_addr: str,
                                     election: Election,
                                     election_stake: int, elector_params: ElectionParams):
@@ -186,23 +320,32 @@ class ElectionsRoutine(object):
             'depool_addr': depool_addr,
             'proxy_addr': proxy_addr
         }
-        try:
+        joined = False
+        with self._elections_lock:
+            # election object is shared by the depools joining it
             election.election_mode = ElectionMode.DEPOOL
-            election.depool_addr = depool_addr
-            election.proxy_addr = proxy_addr
+        self._start_join(election)
+        try:
             self._sign_and_join_elections(validator_addr, election=election,
                                           elector_params=elector_params,
                                           beneficiary_masterchain_adr=proxy_addr, elector_adr=depool_addr)
             election_telemetry['elected'] = True
-            election.election_stake += election_stake
-            if not self._get_active_election_by_id(election.election_id):
-                self._active_elections.append(election)
+            with self._elections_lock:
+                election.election_stake += election_stake
+                if not election.depool_addr:
+                    # first depool joined is recorded, addresses are indexed once election is active
+                    election.depool_addr = depool_addr
+                    election.proxy_addr = proxy_addr
+                self._active_elections.add(election)
+            joined = True
         except Exception as ex:
             election_telemetry['error'] = str(ex)
-            self._cleanup_election(election)
             raise
+        finally:
+            self._finish_join(election, joined)
         self._send_telemetry('election_join', election_telemetry)
 
+    @traced()
     def _sign_and_join_elections(self, validator_addr: str, election: Election,
                                  elector_params: ElectionParams, beneficiary_masterchain_adr: str,
                                  elector_adr: str) -> Election:
@@ -216,38 +359,55 @@ class ElectionsRoutine(object):
             Address of contract that will perform election handling or comms (either DePool or Elector itself)
         :return:
         """
-        need_election_prepare = False
-        if not election.key:
-            log.info("Generating keys...")
-            need_election_prepare = True
-            election.key = self._validator_provider.get_new_key()
-            election.adnl_key = self._validator_provider.get_new_key()
-        else:
-            log.info("Using existing/provided keys for the election")
-        log.info("Perm key hash: {}".format(election.key))
-        log.info("ADNL key hash: {}".format(election.adnl_key))
         election_stop_time = int(election.election_id) + \
             1000 + elector_params.elections_start_before + \
             elector_params.validators_elected_for + \
             elector_params.elections_end_before + \
             elector_params.stake_held_for
-        if need_election_prepare:
-            log.info("Preparing election request...")
-            self._validator_provider.prepare_election(election.key, election.adnl_key,
-                                                      election_start=election.election_id,
-                                                      election_stop=election_stop_time)
+        with self._elections_lock:
+            # same election might be joined by several depools at once, keys are generated and prepared once
+            prepare_keys = not election.key
+            if prepare_keys:
+                log.info("Generating keys...")
+                election.key, election.adnl_key = self._validator_provider.get_new_keys(2)
+                preparation = self._key_preparations[election.key] = Future()
+            else:
+                log.info("Using existing/provided keys for the election")
+                preparation = self._key_preparations.get(election.key)
+            key, adnl_key = election.key, election.adnl_key
+        log.info("Perm key hash: {}".format(key))
+        log.info("ADNL key hash: {}".format(adnl_key))
 
         log.info("Generating validation request...")
         election_req = self._validator_provider.generate_validation_request(beneficiary_masterchain_adr=beneficiary_masterchain_adr,
                                                                             election_id=election.election_id,
-                                                                            adnl_key=election.adnl_key,
+                                                                            adnl_key=adnl_key,
                                                                             max_factor=self._stake_max_factor)
-        # sign request
-        log.info("Signing election request...")
-        election_req_signature, pub_key = self._validator_provider.sign_request(election.key, election_req)
+        if prepare_keys:
+            # keys are added to validator and request is signed in one round-trip
+            log.info("Preparing and signing election request...")
+            try:
+                election_req_signature, pub_key = self._validator_provider.prepare_election_and_sign(
+                    key, adnl_key, election_start=election.election_id,
+                    election_stop=election_stop_time, election_req=election_req)
+            except Exception as ex:
+                # some of the keys might be added to validator already
+                self._discard_keys(election, key, adnl_key)
+                preparation.set_exception(ex)
+                raise
+            finally:
+                with self._elections_lock:
+                    self._key_preparations.pop(key, None)
+            preparation.set_result(True)
+        else:
+            if preparation:
+                log.info("Waiting for keys to be added to validator...")
+                preparation.result()
+            log.info("Signing election request...")
+            election_req_signature, pub_key = self._validator_provider.sign_request(key, election_req)
         log.info("Generating signed election request...")
         election_signed = self._validator_provider.generate_validation_signed(beneficiary_masterchain_adr,
-                                                                              election.election_id, election.adnl_key,
+                                                                              election.election_id, adnl_key,
                                                                               public_key=pub_key,
                                                                               signature=election_req_signature,
                                                                               max_factor=self._stake_max_factor)
@@ -257,10 +417,11 @@ class ElectionsRoutine(object):
                                                          dest=elector_adr,
                                                          value=TonCoin.convert_to_nano_tokens(1),
                                                          payload=election_signed,
-                                                         private_key=self._secret_manager.get_validator_seed(),
+                                                         private_key=self._get_wallet_seed(),
                                                          bounce=True)
+        self._invalidate_accounts(validator_addr)
         log.info("Election transaction submitted: {}".format(transaction))
-        custodian_seeds = self._secret_manager.get_custodian_seeds()
+        custodian_seeds = self._get_custodian_seeds()
         if custodian_seeds:
             log.info("Confirming transaction by custodians")
             self._tonos_cli.confirm_transaction(validator_addr, transaction.tid, custodian_seeds)
@@ -294,11 +455,268 @@ class ElectionsRoutine(object):
             return False
         return True
 
+    async def _prefetch_cycle_data_async(self, validator_addr: str, elector_addr: str) -> dict:
+        """
+        Fetch reads of the election cycle that do not depend on each other concurrently,
+        so cycle takes as long as the slowest query instead of the sum of them.
+        Elector address and election ids are read before, as they define the config epoch.
+        """
+        # queries run in executor threads are traced as part of the prefetch span
+        asyncio.get_event_loop().set_default_executor(TracedThreadPoolExecutor(thread_name_prefix="prefetch"))
+
+        (validator_account, participant_stakes,
+         elector_params, election_validator_params, stake_params) = await asyncio.gather(
+            self._tonos_cli.get_account_async(validator_addr),
+            self._validator_provider.get_current_participant_stakes_async(elector_addr),
+            self._validator_provider.get_elector_params_async(),
+            self._validator_provider.get_election_validator_params_async(),
+            self._validator_provider.get_stake_params_async())
+        return {
+            'validator_account': validator_account,
+            'participant_stakes': participant_stakes,
+            'elector_params': elector_params,
+            'election_validator_params': election_validator_params,
+            'stake_params': stake_params
+        }
+
+    def _read_election_ids(self) -> (str, List[str]):
+        """
+        Elector address and ids of the ongoing elections, read before any other config param of the cycle.
+        If they (or the last key block) show that config epoch changed, config cache is invalidated
+        and elector address is read again, as the one used might be taken from the cache of the previous epoch.
+        """
+        elector_addr = self._validator_provider.get_elector_address()
+        election_ids = self._validator_provider.get_election_ids(elector_addr)
+        if self._config_cache and self._config_cache.update_epoch(
+                {'election_ids': sorted(election_ids), 'key_block_seqno': self._get_key_block_seqno()}):
+            # new round, everything read in the previous epoch might be outdated
+            self._cycle_cache.invalidate(*self.EPOCH_KEYS)
+            current_elector_addr = self._validator_provider.get_elector_address()
+            if current_elector_addr != elector_addr:
+                log.info("Elector address changed: {} -> {}".format(elector_addr, current_elector_addr))
+                elector_addr = current_elector_addr
+                election_ids = self._validator_provider.get_election_ids(elector_addr)
+        return elector_addr, election_ids
+
+    def _cached(self, name: str, loader):
+        def traced_loader():
+            with Tracer.get_tracer().span(name):
+                return loader()
+        return self._cycle_cache.get(name, traced_loader)
+
+    def _process_depools(self, validator_addr: str, new_elections: List[Election],
+                         elector_params: ElectionParams, max_validators: int,
+                         valid_stakes: List[int]) -> Dict[str, dict]:
+        """
+        Process configured depools concurrently, failure of one depool do not affect others
+        :return: Telemetry per depool address
+        """
+        depool_list = self._election_settings.DEPOOL_LIST
+        if not depool_list:
+            return {}
+        depool_telemetry = {}
+        # taken before depools start joining concurrently, so stake doesn't depend on which of them joins first
+        with self._elections_lock:
+            has_active_elections = len(self._active_elections) > 0
+        max_workers = max(1, min(len(depool_list), self._election_settings.DEPOOL_MAX_WORKERS))
+        with TracedThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="depool") as executor:
+            futures = {}
+            for depool_data in depool_list:
+                telemetry_data = {'depool_addr': depool_data.depool_address}
+                depool_telemetry[depool_data.depool_address] = telemetry_data
+                futures[executor.submit(self._process_depool, depool_data,
+                                        validator_addr=validator_addr,
+                                        new_elections=new_elections,
+                                        elector_params=elector_params,
+                                        max_validators=max_validators,
+                                        valid_stakes=valid_stakes,
+                                        has_active_elections=has_active_elections,
+                                        telemetry_data=telemetry_data)] = depool_data
+            for future in as_completed(futures):
+                depool_data = futures[future]
+                telemetry_data = depool_telemetry[depool_data.depool_address]
+                try:
+                    future.result()
+                except Exception as ex:
+                    telemetry_data['error'] = str(ex)
+                    log.exception("Failed to process {}: {}".format(depool_data, ex))
+                self._send_telemetry('depool_status', dict(telemetry_data))
+        return depool_telemetry
+
+    @traced()
+    def _process_depool(self, depool_data: DePoolSettings, validator_addr: str, new_elections: List[Election],
+                        elector_params: ElectionParams, max_validators: int,
+                        valid_stakes: List[int], has_active_elections: bool, telemetry_data: dict):
+        """
+        :param has_active_elections: Whether validator participated any election before the cycle,
+            whole depool balance is staked then, half of it otherwise
+        """
+        log.info(f"Participation enabled: {depool_data.enable_elections}")
+        send_tick_tock = False
+        depool_healthy = True
+        log.info("DePool: {}".format(depool_data.depool_address))
+        if not depool_data.proxy_addresses:
+            log.info("Proxy addresses not specified, trying to fetch them")
+            depool_info = self._tonos_cli.depool_info(depool_data.depool_address,
+                                                      depool_data.abi_url)
+            depool_data.proxy_addresses = depool_info.proxies
+        proxy_addresses = depool_data.proxy_addresses
+        depool_addr = depool_data.depool_address
+        log.info("Proxy addresses: {}, for: {}".format(proxy_addresses, depool_addr))
+        depool_events = self._get_depool_events(depool_addr)
+        # check healtheness of depool
+        if depool_events:
+            last_event = depool_events[0]
+            telemetry_data['depool_event'] = str(last_event)
+            # raise error if events signaling that DePool is malfunctioning
+            if isinstance(last_event, DePoolLowBalanceEvent):
+                if depool_data.replenish_settings:
+                    if time.time() - depool_data.replenish_settings.get_last_replenishment_time() >= depool_data.replenish_settings.max_period:
+                        depool_data.replenish_settings.set_last_replenishment_time(time.time())
+                        self._state.set_depool_value(depool_addr, 'last_replenishment_time',
+                                                     depool_data.replenish_settings.get_last_replenishment_time())
+                        log.info(f"Automatically replenishing depool with {depool_data.replenish_settings.topup_sum}")
+                        telemetry_data["depool_replenish"] = depool_data.replenish_settings.topup_sum.as_tokens()
+                        self._tonos_cli.depool_replenish(depool_addr=depool_addr,
+                                                         wallet_addr=validator_addr,
+                                                         value=depool_data.replenish_settings.topup_sum,
+                                                         private_key=self._get_wallet_seed(),
+                                                         custodian_keys=self._get_custodian_seeds())
+                        self._invalidate_accounts(depool_addr, validator_addr)
+                        send_tick_tock = True
+                depool_healthy = False
+                telemetry_data['error'] = str(LowDePoolBalanceException("DePool Balance is low to operate",
+                                                                        balance=last_event.balance))
+
+        if depool_healthy and depool_data.enable_elections:
+            election_events = [event for event in depool_events if
+                               isinstance(event, DePoolElectionEvent)]
+
+            elections_to_join = []  # type: List[Tuple[DePoolElectionEvent, Election]]
+            if election_events:
+                log.debug("Found election events: {}".format(election_events))
+                # select ongoing elections that matching our events, first event of the election wins
+                events_by_id = {}  # type: Dict[int, DePoolElectionEvent]
+                for event in election_events:
+                    events_by_id.setdefault(ElectionRegistry.normalize_id(event.election_id), event)
+                for election in new_elections:
+                    event = events_by_id.get(ElectionRegistry.normalize_id(election.election_id))
+                    if event:
+                        elections_to_join.append((event, election))
+            if not elections_to_join:
+                log.info(
+                    "No relevant signing events in depool contract at a moment: {}".format(
+                        depool_data))
+                send_tick_tock = True
+            # Join elections
+            for event, election in elections_to_join:
+                log.info("Joining via proxy: {}".format(event.proxy))
+                # joining is a transaction of validator wallet, depool balance is read once for all elections
+                depool_account = self._get_account(depool_addr)
+                stake = depool_account.balance if has_active_elections else depool_account.balance // 2
+                telemetry_data["election_stake"] = stake
+                if depool_data.prudent_election_settings and \
+                        not self._satisfies_prudent_settings(election=election,
+                                                             prudent_settings=depool_data.prudent_election_settings,
+                                                             election_stake=stake,
+                                                             max_validators=max_validators,
+                                                             stakes=valid_stakes,
+                                                             telemetry_holder=telemetry_data):
+                    log.warning("Prudent settings not satisfied, not joining.")
+                    continue
+                log.info("Joining via proxy: {} to: {}".format(event.proxy,
+                                                               election))
+                self._join_elections_depool_mode(depool_addr=depool_addr,
+                                                 validator_addr=validator_addr,
+                                                 election=election,
+                                                 proxy_addr=event.proxy,
+                                                 election_stake=stake,
+                                                 elector_params=elector_params)
+                # same as sequential joins: elections after the joined one see it active
+                has_active_elections = True
+
+        if send_tick_tock:
+            # send tick-tock
+            if time.time() - depool_data.get_last_ticktock() >= depool_data.max_ticktock_period:
+                log.info("Sending ticktock event")
+                self._tonos_cli.depool_ticktock(depool_data.depool_address,
+                                                wallet_address=validator_addr,
+                                                private_key=self._get_wallet_seed(),
+                                                custodian_keys=self._get_custodian_seeds())
+                self._invalidate_accounts(depool_data.depool_address, validator_addr)
+                depool_data.set_last_ticktock(time.time())
+                self._state.set_depool_value(depool_data.depool_address, 'last_ticktock',
+                                             depool_data.get_last_ticktock())
+                log.info("Ticktock sent at {}".format(depool_data.get_last_ticktock()))
+                if new_elections and self._poll_interval:
+                    # depool requests signing of ongoing elections in reply to ticktock, check for it shortly
+                    self._scheduler.schedule(time.time() + self._poll_interval,
+                                             f"depool {depool_addr} events after ticktock")
+
+    def _prudent_join_offsets(self) -> List[int]:
+        prudent_settings = [self._election_settings.PRUDENT_ELECTION_SETTINGS]
+        prudent_settings.extend(depool_data.prudent_election_settings
+                                for depool_data in self._election_settings.DEPOOL_LIST or [])
+        return sorted({settings.election_end_join_offset for settings in prudent_settings
+                       if settings and settings.election_end_join_offset})
+
+    def _schedule_wakeups(self, elections: List[Election]):
+        """
+        Schedule next checks at the moments when something can be done for the given and active elections
+        """
+        join_offsets = self._prudent_join_offsets()
+        with self._elections_lock:
+            # earlier moments of the active elections are already passed
+            next_stake_return = self._active_elections.next_stake_return()
+            latest_election = self._active_elections.latest()
+        if next_stake_return:
+            self._scheduler.schedule_stake_return(next_stake_return)
+        for election in elections:
+            self._scheduler.schedule_election(election, join_offsets)
+            if election.election_params and \
+                    (latest_election is None or int(election.election_id) > int(latest_election.election_id)):
+                latest_election = election
+        if latest_election:
+            self._scheduler.schedule_next_election(latest_election.election_id, latest_election.election_params)
+
+    def _election_ids_changed(self) -> bool:
+        """
+        Light check between cycles: new elections opened or the current ones are over
+        """
+        if not self._polled_elector_addr:
+            return False
+        try:
+            election_ids = self._validator_provider.get_election_ids(self._polled_elector_addr)
+        except Exception as ex:
+            log.debug("Failed to poll election ids: {}".format(ex))
+            return False
+        if sorted(election_ids) != self._polled_election_ids:
+            log.info("Election ids changed: {} -> {}".format(self._polled_election_ids, election_ids))
+            return True
+        return False
+
+    def _report_cycle_timing(self):
+        cycle = self._tracer.end_cycle()
+        self._profiler.stop(cycle.duration)
+        log.info("Election cycle timing:\n{}".format(cycle.format_tree()))
+        self._send_telemetry('cycle_timing', cycle.to_dict())
+        if self._trace_cycles:
+            try:
+                path = write_chrome_trace(cycle, os.path.join(self._work_dir, "traces"),
+                                          keep=self._trace_files_keep)
+                log.debug("Election cycle trace saved to {}".format(path))
+            except OSError as ex:
+                log.warning("Failed to save election cycle trace: {}".format(ex))
+
     def _routine(self):
         self.load_active_elections()
         while True:
             election_status_telemetry_data = {}
             sleep_interval = self._check_elections_interval_seconds
+            cycle_elections = []  # type: List[Election]
+            self._polled_elector_addr = None
+            self._tracer.start_cycle("election_cycle")
+            self._profiler.start()
             try:
                 is_synced = self._check_if_synced()
                 if not is_synced:
@@ -310,22 +728,38 @@ class ElectionsRoutine(object):
                     if self._enabled:
                         log.info("Checking for new elections, mode: {}".format(self._election_mode))
                         validator_addr = self._secret_manager.get_validator_address()
-                        validator_account = self._tonos_cli.get_account(validator_addr)
-                        validator_balance = validator_account.balance
-                        log.info("Validator balance: {}".format(validator_balance))
-                        # get address of elector contract
-                        elector_addr = self._validator_provider.get_elector_address()
-                        election_ids = self._validator_provider.get_election_ids(elector_addr)
+                        # get address of elector contract, config epoch is checked before other cached reads
+                        with self._tracer.span("election_ids"):
+                            elector_addr, election_ids = self._read_election_ids()
+                        self._cycle_cache.put('elector_addr', elector_addr)
+                        self._cycle_cache.put('election_ids', election_ids)
                         log.info("Elector address: {}".format(elector_addr))
                         log.info("Election ids: {}".format(election_ids))
+                        self._polled_elector_addr, self._polled_election_ids = elector_addr, sorted(election_ids)
+                        if self._async_queries:
+                            with self._tracer.span("prefetch"):
+                                prefetched = asyncio.run(self._prefetch_cycle_data_async(validator_addr, elector_addr))
+                            self._cycle_cache.put(('account', validator_addr), prefetched.pop('validator_account'))
+                            for name, value in prefetched.items():
+                                self._cycle_cache.put(name, value)
+                        validator_account = self._get_account(validator_addr)
+                        validator_balance = validator_account.balance
+                        log.info("Validator balance: {}".format(validator_balance))
+                        VALIDATOR_BALANCE.set(validator_balance)
                         election_status_telemetry_data = {'validator_address': validator_addr,
                                                           'balance': validator_balance,
                                                           'election_ids': election_ids}
                         # cleanup current active elections
-                        finished_elections = []
+                        with self._elections_lock:
+                            active_elections = list(self._active_elections)
+                            # stakes can be returned from the elections in reward state and the ones without params
+                            returnable_elections = self._active_elections.returning_stake_before(time.time()) + \
+                                self._active_elections.by_state(None)
+                        finished_elections = [election for election in returnable_elections
+                                              if str(election.election_id) not in election_ids]
                         active_election_stakes = 0
                         recovered_stake = 0
-                        for active_election in self._active_elections:
+                        for active_election in active_elections:
                             telemetry_data = {
                                 'election_id': active_election.election_id,
                                 'election_stake': active_election.election_stake,
@@ -333,8 +767,7 @@ class ElectionsRoutine(object):
                                 'participating': False
                             }
                             active_election_stakes += active_election.election_stake
-                            if str(active_election.election_id) not in election_ids and active_election.can_return():
-                                finished_elections.append(active_election)
+                            if active_election in finished_elections:
                                 self._send_telemetry('finished_elections', telemetry_data)
                             else:
                                 log.info("Participating election: {}".format(active_election))
@@ -343,21 +776,28 @@ class ElectionsRoutine(object):
                         if finished_elections:
                             log.info("Finished elections: {}".format(finished_elections))
                             finished_validator_elections = []
+                            finished_depool_elections = []
                             for finished_election in finished_elections:
                                 if finished_election.election_mode == ElectionMode.DEPOOL:
                                     log.info(f"Cleaning up election {finished_election}")
-                                    self._cleanup_election(finished_election)
+                                    finished_depool_elections.append(finished_election)
                                 elif finished_election.election_mode == ElectionMode.VALIDATOR:
                                     finished_validator_elections.append(finished_election)
+                            try:
+                                self._cleanup_elections(finished_depool_elections)
+                            except Exception as ex:
+                                # elections are kept, so deletion is retried next cycle
+                                log.exception("Failed to remove keys of finished elections: {}".format(ex))
                             recovered_stake = self._recover_stakes(validator_addr, finished_validator_elections)
                             log.info("Recovered total stake: {}".format(recovered_stake))
+                            RECOVERED_STAKES.inc(recovered_stake)
                         if not election_ids:
                             log.info(
                                 "No elections happening at a moment (mode: {}, ids: {}).".format(self._election_mode,
                                                                                                  election_ids))
                         else:
                             log.info("Getting elector params...")
-                            elector_params = self._validator_provider.get_elector_params()
+                            elector_params = self._cached('elector_params', self._validator_provider.get_elector_params)
                             log.info("Current active elections: {}".format(election_ids))
                             new_elections = []  # type: List[Election]
                             for eid in election_ids:
@@ -371,11 +811,16 @@ class ElectionsRoutine(object):
                                     # reset restake flag
                                     active_election.restake = False
                                     new_elections.append(active_election)
+                            cycle_elections = new_elections
 
-                            participant_stakes = self._validator_provider.get_current_participant_stakes(elector_addr)
+                            participant_stakes = self._cached(
+                                'participant_stakes',
+                                lambda: self._validator_provider.get_current_participant_stakes(elector_addr))
                             participant_number = len(participant_stakes)
                             lowest_stake = min(participant_stakes) if participant_stakes else 0
-                            election_validator_params = self._validator_provider.get_election_validator_params()
+                            election_validator_params = self._cached(
+                                'election_validator_params',
+                                self._validator_provider.get_election_validator_params)
                             max_validators = election_validator_params.max_validators
                             valid_stakes = sorted(participant_stakes, reverse=True)[:max_validators]
                             lowest_valid_stake = min(valid_stakes) if valid_stakes else 0
@@ -383,6 +828,10 @@ class ElectionsRoutine(object):
                             election_status_telemetry_data["participants"] = participant_number
                             election_status_telemetry_data["lowest_stake"] = lowest_stake
                             election_status_telemetry_data["max_validators"] = election_validator_params.max_validators
+                            PARTICIPANTS.set(participant_number)
+                            LOWEST_STAKE.set(lowest_stake)
+                            LOWEST_VALID_STAKE.set(lowest_valid_stake)
+                            MAX_VALIDATORS.set(election_validator_params.max_validators)
                             log.info(f"Participants {participant_number}, lowest stake {lowest_stake}, "
                                      f"lowest valid {lowest_valid_stake}, max validators {election_validator_params.max_validators}.")
                             if not new_elections:
@@ -395,7 +844,7 @@ class ElectionsRoutine(object):
                                 if self._election_mode == ElectionMode.VALIDATOR:
                                     log.info("Joining in validator mode")
                                     log.info("Getting min stake...")
-                                    stake_params = self._validator_provider.get_stake_params()
+                                    stake_params = self._cached('stake_params', self._validator_provider.get_stake_params)
                                     stake_per_election = (validator_balance + recovered_stake + active_election_stakes) / len(new_elections)
                                     balance_left = validator_balance
                                     election_stake = self._compute_stake(stake_per_election)
@@ -426,146 +875,124 @@ class ElectionsRoutine(object):
                                             balance_left -= election_stake
                                 elif self._election_mode == ElectionMode.DEPOOL:
                                     log.info("Joining in depool mode")
-                                    depool_list = self._election_settings.DEPOOL_LIST
-                                    for depool_data in depool_list:
-                                        log.info(f"Participation enabled: {depool_data.enable_elections}")
-                                        send_tick_tock = False
-                                        depool_healthy = True
-                                        log.info("DePool: {}".format(depool_data.depool_address))
-                                        if not depool_data.proxy_addresses:
-                                            log.info("Proxy addresses not specified, trying to fetch them")
-                                            depool_info = self._tonos_cli.depool_info(depool_data.depool_address,
-                                                                                      depool_data.abi_url)
-                                            depool_data.proxy_addresses = depool_info.proxies
-                                        proxy_addresses = depool_data.proxy_addresses
-                                        depool_addr = depool_data.depool_address
-                                        log.info("Proxy addresses: {}, for: {}".format(proxy_addresses, depool_addr))
-                                        depool_events = self._tonos_cli.get_depool_events(depool_addr)
-                                        # check healtheness of depool
-                                        if depool_events:
-                                            last_event = depool_events[0]
-                                            election_status_telemetry_data['depool_event'] = str(last_event)
-                                            # raise error if events signaling that DePool is malfunctioning
-                                            if isinstance(last_event, DePoolLowBalanceEvent):
-                                                if depool_data.replenish_settings:
-                                                    if time.time() - depool_data.replenish_settings.get_last_replenishment_time() >= depool_data.replenish_settings.max_period:
-                                                        depool_data.replenish_settings.set_last_replenishment_time(time.time())
-                                                        log.info(f"Automatically replenishing depool with {depool_data.replenish_settings.topup_sum}")
-                                                        election_status_telemetry_data["depool_replenish"] = depool_data.replenish_settings.topup_sum.as_tokens()
-                                                        self._tonos_cli.depool_replenish(depool_addr=depool_addr,
-                                                                                         wallet_addr=validator_addr,
-                                                                                         value=depool_data.replenish_settings.topup_sum,
-                                                                                         private_key=self._secret_manager.get_validator_seed(),
-                                                                                         custodian_keys=self._secret_manager.get_custodian_seeds())
-                                                        send_tick_tock = True
-                                                depool_healthy = False
-                                                election_status_telemetry_data['error'] = str(LowDePoolBalanceException("DePool Balance is low to operate",
-                                                                                                                        balance=last_event.balance))
-
-                                        if depool_healthy and depool_data.enable_elections:
-                                            election_events = [event for event in depool_events if
-                                                               isinstance(event, DePoolElectionEvent)]
-
-                                            elections_to_join = []  # type: List[Tuple[DePoolElectionEvent, Election]]
-                                            if election_events:
-                                                log.debug("Found election events: {}".format(election_events))
-                                                # select ongoing elections that matching our events
-                                                for election in new_elections:
-                                                    for event in election_events:
-                                                        if str(election.election_id) == str(event.election_id):
-                                                            elections_to_join.append((event, election))
-                                                            break
-                                            if not elections_to_join:
-                                                log.info(
-                                                    "No relevant signing events in depool contract at a moment: {}".format(
-                                                        depool_data))
-                                                send_tick_tock = True
-                                            # Join elections
-                                            for event, election in elections_to_join:
-                                                log.info("Joining via proxy: {}".format(event.proxy))
-                                                depool_account = self._tonos_cli.get_account(depool_addr)
-                                                stake = depool_account.balance if len(self._active_elections) else depool_account.balance // 2
-                                                election_status_telemetry_data["election_stake"] = stake
-                                                if depool_data.prudent_election_settings and \
-                                                        not self._satisfies_prudent_settings(election=election,
-                                                                                             prudent_settings=depool_data.prudent_election_settings,
-                                                                                             election_stake=stake,
-                                                                                             max_validators=max_validators,
-                                                                                             stakes=valid_stakes,
-                                                                                             telemetry_holder=election_status_telemetry_data):
-                                                    log.warning("Prudent settings not satisfied, not joining.")
-                                                    continue
-                                                log.info("Joining via proxy: {} to: {}".format(event.proxy,
-                                                                                               election))
-                                                self._join_elections_depool_mode(depool_addr=depool_addr,
-                                                                                 validator_addr=validator_addr,
-                                                                                 election=election,
-                                                                                 proxy_addr=event.proxy,
-                                                                                 election_stake=stake,
-                                                                                 elector_params=elector_params)
-
-                                        if send_tick_tock:
-                                            # send tick-tock
-                                            if time.time() - depool_data.get_last_ticktock() >= depool_data.max_ticktock_period:
-                                                log.info("Sending ticktock event")
-                                                self._tonos_cli.depool_ticktock(depool_data.depool_address,
-                                                                                wallet_address=validator_addr,
-                                                                                private_key=self._secret_manager.get_validator_seed(),
-                                                                                custodian_keys=self._secret_manager.get_custodian_seeds())
-                                                depool_data.set_last_ticktock(time.time())
-                                                log.info("Ticktock sent at {}".format(depool_data.get_last_ticktock()))
-
-
+                                    depool_telemetry = self._process_depools(validator_addr=validator_addr,
+                                                                             new_elections=new_elections,
+                                                                             elector_params=elector_params,
+                                                                             max_validators=max_validators,
+                                                                             valid_stakes=valid_stakes)
+                                    election_status_telemetry_data['depools'] = depool_telemetry
+                                    depool_errors = [d_telemetry['error'] for d_telemetry in depool_telemetry.values()
+                                                     if d_telemetry.get('error')]
+                                    if depool_errors:
+                                        election_status_telemetry_data['error'] = "; ".join(depool_errors)
                                 else:
                                     log.info("Skipping validations due to set election mode: {}".format(self._election_mode))
                         self.save_active_elections()
+                        with self._elections_lock:
+                            ACTIVE_ELECTIONS.set(len(self._active_elections))
             except Exception as ex:
                 election_status_telemetry_data['error'] = str(ex)
                 log.exception("Error in validator routine: {}".format(ex))
+            if election_status_telemetry_data.get('error'):
+                CYCLE_ERRORS.inc()
+            LAST_CYCLE.set(time.time())
+            self._cycle_cache.clear()
+            if self._config_cache:
+                self._config_cache.flush()
+            self._report_cycle_timing()
             self._send_telemetry('election_status', election_status_telemetry_data)
-            log.info("Sleeping for: {}s, next check after {}".format(sleep_interval,
-                                                                     datetime.datetime.now() + datetime.timedelta(seconds=sleep_interval)))
-            time.sleep(sleep_interval)
+            try:
+                self._schedule_wakeups(cycle_elections)
+            except Exception as ex:
+                log.exception("Failed to schedule next checks: {}".format(ex))
+            self._scheduler.wait(sleep_interval, poll=self._election_ids_changed, poll_interval=self._poll_interval)
+
+    def _get_key_block_seqno(self) -> Optional[int]:
+        """
+        Seqno of the last key block, config params change only with key blocks
+        """
+        if not self._key_block_query_supported:
+            return None
+        try:
+            return self._tonos_cli.get_last_key_block_seqno()
+        except Exception as ex:
+            if "unrecognized" in str(ex).lower() or "wasn't expected" in str(ex).lower():
+                log.warning("tonos-cli can't query key blocks, config cache is invalidated by election id only")
+                self._key_block_query_supported = False
+            else:
+                log.warning("Failed to get last key block: {}".format(ex))
+            return None
 
+    @traced()
     def _recover_stakes(self, validator_addr: str, finished_elections: List[Election]) -> int:
         """
-        Check if possible to retrieve some stakes back from given list of elections
+        Check if possible to retrieve some stakes back from given list of elections.
+        Returned stakes of all electors are computed concurrently, recover requests are submitted through
+        bounded pool and keys of the recovered elections are deleted at once.
         :param validator_addr: Validator(node) address
         :param finished_elections: List of finished elections
-        :return:
+        :return: Total recovered stake
         """
-        recovered_stake = 0
-        finished_election_map = {}
+        finished_election_map = {}  # type: Dict[str, List[Election]]
         for finished_election in finished_elections:
             elect_arr = finished_election_map.setdefault(finished_election.elector_addr, [])
             elect_arr.append(finished_election)
-        for finish_elector_addr in finished_election_map:
-            try:
-                log.info("Requesting bounty from: {}".format(finish_elector_addr))
-                # no election happening
-                recover_amounts = self._validator_provider.compute_returned_stakes(finish_elector_addr, validator_addr)
-                if recover_amounts:
-                    log.info("Recovering: {}".format(recover_amounts))
-                    recover_req = self._validator_provider.generate_recover_stake_req()
-                    transaction = self._tonos_cli.submit_transaction(validator_addr,
-                                                                     TonAddress.set_address_prefix(finish_elector_addr,
-                                                                                                   TonAddress.Type.MASTER_CHAIN),
-                                                                     value=TonCoin.convert_to_nano_tokens(1),
-                                                                     payload=recover_req,
-                                                                     private_key=self._get_wallet_seed(),
-                                                                     bounce=True)
+        if not finished_election_map:
+            return 0
+        max_workers = min(len(finished_election_map), self._election_settings.STAKE_RECOVERY_MAX_WORKERS)
+        with TracedThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recover") as executor:
+            log.info("Requesting bounty from: {}".format(list(finished_election_map)))
+            amount_futures = {executor.submit(self._validator_provider.compute_returned_stakes,
+                                              elector_addr, validator_addr): elector_addr
+                              for elector_addr in finished_election_map}
+            recover_amounts = {}  # type: Dict[str, List[int]]
+            for future in as_completed(amount_futures):
+                elector_addr = amount_futures[future]
+                try:
+                    amounts = future.result()
+                except Exception as ex:
+                    log.exception("Failed to request bounty from {}: {}".format(elector_addr, ex))
+                    continue
+                if amounts:
+                    log.info("Recovering from {}: {}".format(elector_addr, amounts))
+                    recover_amounts[elector_addr] = amounts
+                else:
+                    log.info("Nothing to recover from {}: {}".format(elector_addr, amounts))
+            if not recover_amounts:
+                return 0
+            # request has no elector specific data, so same one is sent to all of them
+            recover_req = self._validator_provider.generate_recover_stake_req()
+            wallet_seed = self._get_wallet_seed()
+            submit_futures = {executor.submit(self._tonos_cli.submit_transaction,
+                                              validator_addr,
+                                              TonAddress.set_address_prefix(elector_addr,
+                                                                            TonAddress.Type.MASTER_CHAIN),
+                                              value=TonCoin.convert_to_nano_tokens(1),
+                                              payload=recover_req,
+                                              private_key=wallet_seed,
+                                              bounce=True): elector_addr
+                              for elector_addr in recover_amounts}
+            recovered_stake = 0
+            recovered_elections = []
+            for future in as_completed(submit_futures):
+                elector_addr = submit_futures[future]
+                try:
+                    transaction = future.result()
+                    self._invalidate_accounts(validator_addr)
                     log.info("Submitted transaction for funds recovery: {}".format(transaction))
-                    log.info("Removing unused keys")
-                    for felection in finished_election_map[finish_elector_addr]:
-                        self._cleanup_election(felection)
-                    recover_sum = sum(int(amount) for amount in recover_amounts)
+                    recovered_elections.extend(finished_election_map[elector_addr])
+                    recover_sum = sum(int(amount) for amount in recover_amounts[elector_addr])
+                    recovered_stake += recover_sum
                     self._send_telemetry('stake_recover', {
-                        'elector_addr': finish_elector_addr,
+                        'elector_addr': elector_addr,
                         'recover_amount': recover_sum
                     })
-                    recovered_stake += recover_sum
-                else:
-                    log.info("Nothing to recover: {}".format(recover_amounts))
+                except Exception as ex:
+                    log.exception("Failed to submit funds recovery to {}: {}".format(elector_addr, ex))
+        if recovered_elections:
+            log.info("Removing unused keys")
+            try:
+                self._cleanup_elections(recovered_elections)
             except Exception as ex:
-                log.exception("Failed to request bounty: {}".format(ex))
+                log.exception("Failed to remove keys of recovered elections: {}".format(ex))
         return recovered_stake
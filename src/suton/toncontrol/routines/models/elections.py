@@ -13,6 +13,9 @@ class Election(object):
         FREEZE = 'freeze'
         REWARD = 'reward'
 
+    __slots__ = ('election_id', 'key', 'adnl_key', 'elector_addr', 'election_stake', 'restake', 'depool_addr',
+                 'proxy_addr', 'election_mode', 'election_params')
+
     def __init__(self, election_id, elector_addr, key=None, adnl_key=None, election_stake: int = 0,
                  depool_addr = None, election_params: ElectionParams = None):
         self.election_id = election_id
@@ -0,0 +1,118 @@
+import bisect
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from routines.models.elections import Election
+
+
+class ElectionRegistry(object):
+    """
+    Elections keyed by integer election id.
+    State of the election depends on time only, so state queries are answered with bisect
+    over sorted state transition timestamps (election end, validation end, stake return).
+    Not thread safe, callers are expected to guard it.
+    """
+
+    def __init__(self, elections: List[Election] = None):
+        self._elections = {}  # type: Dict[int, Election]
+        self._election_ends = []  # type: List[Tuple[int, int]]
+        self._validation_ends = []  # type: List[Tuple[int, int]]
+        self._reward_times = []  # type: List[Tuple[int, int]]
+        self._transitions = {}  # type: Dict[int, Tuple[int, int, int]]
+        for election in elections or []:
+            self.add(election)
+
+    @staticmethod
+    def normalize_id(election_id) -> int:
+        return int(election_id)
+
+    def __len__(self) -> int:
+        return len(self._elections)
+
+    def __iter__(self) -> Iterator[Election]:
+        # snapshot, registry can be modified while iterating
+        return iter(list(self._elections.values()))
+
+    def __contains__(self, election_id) -> bool:
+        return self.normalize_id(election_id) in self._elections
+
+    def get(self, election_id) -> Optional[Election]:
+        return self._elections.get(self.normalize_id(election_id))
+
+    def add(self, election: Election) -> bool:
+        """
+        :return: False if election with the same id is already registered
+        """
+        eid = self.normalize_id(election.election_id)
+        if eid in self._elections:
+            return False
+        self._elections[eid] = election
+        if election.election_params:
+            transitions = (election.get_election_end_time(), election.get_validation_end_time(),
+                           election.get_reward_time())
+            self._transitions[eid] = transitions
+            for timestamps, timestamp in zip((self._election_ends, self._validation_ends, self._reward_times),
+                                             transitions):
+                bisect.insort(timestamps, (timestamp, eid))
+        return True
+
+    def remove(self, election: Election) -> bool:
+        """
+        :return: False if the election is not registered
+        """
+        eid = self.normalize_id(election.election_id)
+        if self._elections.get(eid) is not election:
+            return False
+        del self._elections[eid]
+        transitions = self._transitions.pop(eid, None)
+        if transitions:
+            for timestamps, timestamp in zip((self._election_ends, self._validation_ends, self._reward_times),
+                                             transitions):
+                del timestamps[bisect.bisect_left(timestamps, (timestamp, eid))]
+        return True
+
+    def _resolve(self, ids) -> List[Election]:
+        return [self._elections[eid] for eid in sorted(ids)]
+
+    @staticmethod
+    def _passed(timestamps: List[Tuple[int, int]], now: float) -> Set[int]:
+        # state changes once now is strictly greater than the transition time (see Election.get_state)
+        return {eid for _, eid in timestamps[:bisect.bisect_left(timestamps, (now, -1))]}
+
+    def by_state(self, state: Optional[str], now: float = None) -> List[Election]:
+        """
+        :param state: Election.State value, None for elections without params
+        """
+        if state is None:
+            return self._resolve(eid for eid in self._elections if eid not in self._transitions)
+        now = time.time() if now is None else now
+        if state == Election.State.REWARD:
+            return self._resolve(self._passed(self._reward_times, now))
+        if state == Election.State.FREEZE:
+            return self._resolve(self._passed(self._validation_ends, now) - self._passed(self._reward_times, now))
+        if state == Election.State.VALIDATION:
+            return self._resolve(self._passed(self._election_ends, now) - self._passed(self._validation_ends, now))
+        if state == Election.State.ELECTIONS:
+            return self._resolve(set(self._transitions) - self._passed(self._election_ends, now))
+        raise ValueError("Unknown election state: {}".format(state))
+
+    def returning_stake_before(self, timestamp: float) -> List[Election]:
+        """
+        Elections which stakes get returned (reward state starts) before given time, ordered by return time
+        """
+        end = bisect.bisect_left(self._reward_times, (timestamp, -1))
+        return [self._elections[eid] for _, eid in self._reward_times[:end]]
+
+    def next_stake_return(self, now: float = None) -> Optional[Election]:
+        """
+        Election which stake gets returned next, after the given time
+        """
+        now = time.time() if now is None else now
+        start = bisect.bisect_left(self._reward_times, (now, -1))
+        return self._elections[self._reward_times[start][1]] if start < len(self._reward_times) else None
+
+    def latest(self) -> Optional[Election]:
+        """
+        Election with params started last
+        """
+        return self._elections[max(self._transitions)] if self._transitions else None
@@ -0,0 +1,112 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+from routines.models.elections import Election
+from toncommon.models.ElectionParams import ElectionParams
+
+log = logging.getLogger("scheduler")
+
+
+class ElectionScheduler(object):
+    """
+    Priority queue of wakeups of the election routine.
+    Instead of polling chain with fixed interval, routine sleeps until the next interesting moment
+    of the election cycle (elections open, prudent join moment, stake can be recovered),
+    falling back to the idle interval if nothing is expected to happen earlier.
+    In between, routine can poll lightly for changes it can't predict (ex: new election id).
+    """
+
+    def __init__(self, grace_period: int = 30):
+        """
+        :param grace_period: Seconds added to the moments triggered by the chain (ex: stake unfreeze),
+            so local clock drift or block time do not cause an early (and useless) wakeup
+        """
+        self._grace_period = grace_period
+        self._queue = []  # type: List[tuple]
+        self._scheduled = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, at: float, reason: str):
+        """
+        :param at: Unix timestamp to wake up at, past moments are ignored
+        :param reason: Description of the wakeup, used for logging
+        """
+        at = int(at)
+        if at <= time.time():
+            return
+        with self._lock:
+            if (at, reason) in self._scheduled:
+                return
+            self._scheduled.add((at, reason))
+            heapq.heappush(self._queue, (at, reason))
+        log.debug("Scheduled wakeup '{}' at {}".format(reason, at))
+
+    def schedule_election(self, election: Election, join_offsets: List[int] = None):
+        """
+        Schedule wakeups at the key moments of the election
+        :param join_offsets: Prudent join offsets (seconds before elections end)
+        """
+        if not election.election_params:
+            return
+        self.schedule(election.get_election_start_time(), f"election {election.election_id} start")
+        for offset in join_offsets or []:
+            if offset:
+                # a bit later, so join is not rejected for being too early
+                self.schedule(election.get_election_end_time() - offset + 5,
+                              f"election {election.election_id} prudent join")
+        self.schedule_stake_return(election)
+
+    def schedule_stake_return(self, election: Election):
+        if election.election_params:
+            self.schedule(election.get_reward_time() + self._grace_period,
+                          f"election {election.election_id} stake return")
+
+    def schedule_next_election(self, election_id, elector_params: ElectionParams):
+        """
+        Next elections start 'validators_elected_for' after the current ones
+        """
+        next_election = Election(election_id=int(election_id) + elector_params.validators_elected_for,
+                                 elector_addr=None, election_params=elector_params)
+        self.schedule(next_election.get_election_start_time() + self._grace_period,
+                      f"election {next_election.election_id} start (predicted)")
+
+    def next_wakeup(self) -> Optional[float]:
+        with self._lock:
+            return self._queue[0][0] if self._queue else None
+
+    def wait(self, max_wait: float, poll: Callable[[], bool] = None, poll_interval: float = 0) -> List[str]:
+        """
+        Sleep until the next scheduled wakeup, but not longer than max_wait seconds
+        :param poll: Light check made every poll_interval seconds while sleeping, sleep ends once it returns True
+        :return: Reasons of the wakeups that are due
+        """
+        deadline = time.time() + max_wait
+        next_wakeup = self.next_wakeup()
+        if next_wakeup is not None:
+            deadline = min(deadline, next_wakeup)
+        log.info("Sleeping for: {:.0f}s, next check at {}".format(max(0.0, deadline - time.time()),
+                                                                  time.ctime(deadline)))
+        due = []
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if poll is None or not poll_interval or remaining <= poll_interval:
+                time.sleep(remaining)
+                break
+            time.sleep(poll_interval)
+            if poll():
+                due.append("change found by poll")
+                break
+        now = time.time()
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                entry = heapq.heappop(self._queue)
+                self._scheduled.discard(entry)
+                due.append(entry[1])
+        if due:
+            log.info("Woke up for: {}".format(due))
+        return due
@@ -0,0 +1,181 @@
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+log = logging.getLogger("statestore")
+
+
+class StateStore(object):
+    """
+    Crash-safe store of the routine state: snapshot file plus append-only journal of changes.
+    Every change is appended to the journal and fsynced, unchanged values are not written at all.
+    Once journal grows, snapshot is rewritten atomically (tmp file, fsync, rename) and journal is dropped.
+    Records of the journal carry sequence number, so ones already included in snapshot are skipped on load
+    (if crashed between snapshot rename and journal removal), journal is truncated at partially written
+    or corrupt record.
+    """
+
+    def __init__(self, work_dir: str, compact_after: int = 200):
+        """
+        :param compact_after: Number of journal records to rewrite snapshot after
+        """
+        self._snapshot_path = os.path.join(work_dir, "state.json")
+        self._journal_path = os.path.join(work_dir, "state.journal")
+        self._compact_after = compact_after
+        self._lock = threading.RLock()
+        self._state = {'elections': {}, 'depools': {}}  # type: Dict[str, dict]
+        self._seq = 0
+        self._journal_records = 0
+        self._journal = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self._snapshot_path) or os.path.exists(self._journal_path)
+
+    def load(self):
+        with self._lock:
+            if os.path.exists(self._snapshot_path):
+                with open(self._snapshot_path) as f:
+                    snapshot = json.load(f)
+                self._seq = snapshot['seq']
+                self._state = snapshot['state']
+            if os.path.exists(self._journal_path):
+                with open(self._journal_path, "rb+") as f:
+                    valid_size = 0
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            log.warning("Dropping partially written state journal record")
+                            f.truncate(valid_size)
+                            break
+                        try:
+                            record = self._parse_record(line)
+                        except ValueError as ex:
+                            log.error("Dropping state journal from corrupt record at byte {}: {}".format(
+                                valid_size, ex))
+                            f.truncate(valid_size)
+                            break
+                        valid_size += len(line)
+                        self._journal_records += 1
+                        if record['seq'] > self._seq:
+                            self._apply(record)
+                            self._seq = record['seq']
+            log.info("State loaded: {} elections, {} journal records".format(len(self._state['elections']),
+                                                                               self._journal_records))
+
+    @staticmethod
+    def _parse_record(line: bytes) -> dict:
+        record = json.loads(line)
+        if not isinstance(record, dict) or not all(field in record for field in ('seq', 'op', 'section', 'key')):
+            raise ValueError("Unexpected journal record: {!r}".format(line[:100]))
+        return record
+
+    def _apply(self, record: dict):
+        section = self._state.setdefault(record['section'], {})
+        if record['op'] == 'put':
+            section[record['key']] = record['value']
+        elif record['op'] == 'delete':
+            section.pop(record['key'], None)
+
+    def _append(self, records: List[dict]):
+        if not records:
+            return
+        if self._journal is None:
+            self._journal = open(self._journal_path, "a")
+        for record in records:
+            self._seq += 1
+            record['seq'] = self._seq
+            self._apply(record)
+            self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += len(records)
+        if self._journal_records >= self._compact_after:
+            self.compact()
+
+    def compact(self):
+        with self._lock:
+            tmp_path = self._snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({'seq': self._seq, 'state': self._state}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._snapshot_path)
+            self._fsync_dir()
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self._journal_path):
+                os.remove(self._journal_path)
+            self._journal_records = 0
+            log.debug("State snapshot written, seq: {}".format(self._seq))
+
+    def _fsync_dir(self):
+        try:
+            fd = os.open(os.path.dirname(self._snapshot_path) or ".", os.O_RDONLY)
+        except OSError:
+            # not supported on some platforms
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _diff(self, section: str, values: Dict[str, object]) -> List[dict]:
+        current = self._state.get(section, {})
+        records = [{'op': 'delete', 'section': section, 'key': key} for key in current if key not in values]
+        records.extend({'op': 'put', 'section': section, 'key': key, 'value': value}
+                       for key, value in values.items() if current.get(key) != value)
+        return records
+
+    def get_elections(self) -> List[dict]:
+        with self._lock:
+            return copy.deepcopy(list(self._state['elections'].values()))
+
+    def save_elections(self, elections: Dict[str, dict]):
+        """
+        :param elections: Serialized elections by unique key, elections missing from it are removed
+        """
+        with self._lock:
+            # values are compared with their json representation (ex: tuples vs lists)
+            self._append(self._diff('elections', json.loads(json.dumps(elections))))
+
+    def get_depool_value(self, depool_addr: str, name: str, default=None):
+        with self._lock:
+            return self._state['depools'].get(depool_addr, {}).get(name, default)
+
+    def set_depool_value(self, depool_addr: str, name: str, value):
+        with self._lock:
+            values = dict(self._state['depools'].get(depool_addr, {}))
+            if values.get(name) == value:
+                return
+            values[name] = value
+            self._append([{'op': 'put', 'section': 'depools', 'key': depool_addr, 'value': values}])
+
+    def close(self):
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    @staticmethod
+    def migrate_from(store: 'StateStore', legacy_path: str) -> Optional[int]:
+        """
+        Import elections of active_elections.json file into the empty store
+        :return: Number of imported elections, None if nothing to migrate
+        """
+        if store.exists or not os.path.exists(legacy_path):
+            return None
+        with open(legacy_path) as f:
+            elections = json.load(f).get('elections', [])
+        store.save_elections({StateStore.election_key(election): election for election in elections})
+        store.compact()
+        os.replace(legacy_path, legacy_path + ".migrated")
+        log.info("Migrated {} elections from {}".format(len(elections), legacy_path))
+        return len(elections)
+
+    @staticmethod
+    def election_key(election_json: dict) -> str:
+        return "{}:{}".format(election_json['id'], election_json.get('depool_addr') or "")
@@ -1,5 +1,7 @@
+import asyncio
+import functools
 from abc import ABC
-from typing import List
+from typing import List, Optional, Tuple
 
 from toncommon.models.ElectionParams import ElectionParams, ElectionValidatorParams, StakeParams
 from toncommon.models.depool.DePoolSyncStatus import DePoolSyncStatus
@@ -16,6 +18,15 @@ class Validator(ABC):
     def delete_key(self, key):
         pass
 
+    def delete_keys(self, keys: List[Tuple[str, Optional[str]]]):
+        """
+        :param keys: Pairs of key and its temp (adnl) key, temp key is not deleted if None
+        """
+        for key, adnl_key in keys:
+            if adnl_key:
+                self.delete_temp_key(key, adnl_key)
+            self.delete_key(key)
+
     def get_sync_time_diff(self) -> int:
         raise NotImplementedError
 
@@ -25,9 +36,20 @@ class Validator(ABC):
     def get_new_key(self) -> str:
         raise NotImplementedError
 
+    def get_new_keys(self, count: int) -> List[str]:
+        return [self.get_new_key() for _ in range(count)]
+
     def prepare_election(self, key, adnl_key, election_start, election_stop) -> str:
         raise NotImplementedError
 
+    def prepare_election_and_sign(self, key, adnl_key, election_start, election_stop, election_req) -> (str, str):
+        """
+        Prepare keys for the election and sign election request with them
+        :return: Signature and public key
+        """
+        self.prepare_election(key, adnl_key, election_start=election_start, election_stop=election_stop)
+        return self.sign_request(key, election_req)
+
     def generate_validation_request(self, election_id, adnl_key,
                                     beneficiary_masterchain_adr, max_factor) -> str:
         raise NotImplementedError
@@ -63,3 +85,30 @@ class Validator(ABC):
     def generate_recover_stake_req(self) -> str:
         raise NotImplementedError
 
+
+    # Asyncio variants, by default executing sync implementation in the thread-pool of the loop.
+    # Providers override them with native ones where possible.
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def get_sync_status_async(self) -> DePoolSyncStatus:
+        return await self._run_in_executor(self.get_sync_status)
+
+    async def get_elector_address_async(self) -> str:
+        return await self._run_in_executor(self.get_elector_address)
+
+    async def get_election_ids_async(self, elector_addr) -> [str]:
+        return await self._run_in_executor(self.get_election_ids, elector_addr)
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return await self._run_in_executor(self.get_elector_params)
+
+    async def get_current_participant_stakes_async(self, elector_addr) -> List[int]:
+        return await self._run_in_executor(self.get_current_participant_stakes, elector_addr)
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return await self._run_in_executor(self.get_election_validator_params)
+
+    async def get_stake_params_async(self) -> StakeParams:
+        return await self._run_in_executor(self.get_stake_params)
@@ -1,20 +1,31 @@
-from typing import List
+import base64
+from typing import List, Optional, Tuple, Union
+
+from toncommon import elector
 
 from toncommon.models.depool.DePoolSyncStatus import DePoolSyncStatus
 from tonfift.core import FiftCli
 from tonliteclient.core import TonLiteClient
+from tonliteserver.core import TonLiteServerClient
 from toncommon.models.ElectionParams import ElectionParams, ElectionValidatorParams, StakeParams
 from tonvalidator.core import TonValidatorEngineConsole
+from tonvalidator.keyring import ValidatorKeyring
 from routines.validator_providers.core import Validator
 
 
 class CPPValidator(Validator):
 
-    def __init__(self, vec: TonValidatorEngineConsole, fift_cli: FiftCli,
-                 lite_client: TonLiteClient):
+    def __init__(self, vec: TonValidatorEngineConsole, fift_cli: Optional[FiftCli],
+                 lite_client: Union[TonLiteClient, TonLiteServerClient], keyring: ValidatorKeyring = None):
+        """
+        :param fift_cli: Generates elector payloads with Fift scripts, if not given they are built in-process
+        :param keyring: If given, election requests are signed locally with keys of validator keyring
+            instead of validator-engine-console
+        """
         self._vec = vec
         self._fift_cli = fift_cli
         self._lite_client = lite_client
+        self._keyring = keyring
 
     def delete_temp_key(self, key, adnl_key):
         self._vec.delete_temp_key(key, adnl_key)
@@ -22,6 +33,12 @@ class CPPValidator(Validator):
     def delete_key(self, key):
         self._vec.delete_key(key)
 
+    def delete_keys(self, keys: List[Tuple[str, Optional[str]]]):
+        self._vec.delete_keys(keys)
+        if self._keyring:
+            for key, _ in keys:
+                self._keyring.forget(key)
+
     def get_sync_time_diff(self) -> int:
         return self._vec.get_sync_time_diff()
 
@@ -32,6 +49,9 @@ class CPPValidator(Validator):
     def get_new_key(self) -> str:
         return self._vec.get_new_key()
 
+    def get_new_keys(self, count: int) -> List[str]:
+        return self._vec.get_new_keys(count)
+
     def prepare_election(self, key, adnl_key, election_start, election_stop):
         self._vec.prepare_election(key, adnl_key,
                                    election_start=election_start,
@@ -39,20 +59,40 @@ class CPPValidator(Validator):
 
     def generate_validation_request(self, election_id, adnl_key,
                                     beneficiary_masterchain_adr, max_factor):
-        return self._fift_cli.generate_validation_req(beneficiary_masterchain_adr,
-                                                      election_start=election_id,
-                                                      key_adnl=adnl_key,
-                                                      max_factor=max_factor)
+        if self._fift_cli:
+            return self._fift_cli.generate_validation_req(beneficiary_masterchain_adr,
+                                                          election_start=election_id,
+                                                          key_adnl=adnl_key,
+                                                          max_factor=max_factor)
+        # hex, as Fift prints it
+        return elector.validation_request(beneficiary_masterchain_adr, election_id, max_factor, adnl_key).hex().upper()
+
+    def _sign_locally(self, sign_key, election_req) -> (str, str):
+        signature, public_key = self._keyring.sign(sign_key, bytes.fromhex(election_req))
+        # same format as console prints them
+        return base64.b64encode(signature).decode(), base64.b64encode(public_key).decode()
 
     def sign_request(self, sign_key, election_req) -> (str, str):
+        if self._keyring:
+            return self._sign_locally(sign_key, election_req)
         return self._vec.sign_request(sign_key, election_req)
 
+    def prepare_election_and_sign(self, key, adnl_key, election_start, election_stop, election_req) -> (str, str):
+        if self._keyring:
+            self._vec.prepare_election(key, adnl_key, election_start=election_start, election_stop=election_stop)
+            return self._sign_locally(key, election_req)
+        return self._vec.prepare_election_and_sign(key, adnl_key, election_start, election_stop, election_req)
+
     def generate_validation_signed(self, beneficiary_masterchain_adr, election_id, adnl_key, public_key, signature,
                                    max_factor) -> str:
-        return self._fift_cli.generate_validation_signed(beneficiary_masterchain_adr,
-                                                         election_id, adnl_key,
-                                                         public_key=public_key, signature=signature,
-                                                         max_factor=max_factor)
+        if self._fift_cli:
+            return self._fift_cli.generate_validation_signed(beneficiary_masterchain_adr,
+                                                             election_id, adnl_key,
+                                                             public_key=public_key, signature=signature,
+                                                             max_factor=max_factor)
+        boc = elector.validation_signed(beneficiary_masterchain_adr, election_id, max_factor, adnl_key,
+                                        public_key=public_key, signature=signature)
+        return base64.b64encode(boc).decode()
 
     def get_elector_address(self) -> str:
         return self._lite_client.get_elector_address()
@@ -75,5 +115,25 @@ class CPPValidator(Validator):
     def compute_returned_stakes(self, elector_addr, validator_addr) -> List[int]:
         return self._lite_client.compute_returned_stakes(elector_addr, validator_addr)
 
+    async def get_elector_address_async(self) -> str:
+        return await self._lite_client.get_elector_address_async()
+
+    async def get_election_ids_async(self, elector_addr) -> [str]:
+        return await self._lite_client.get_election_ids_async(elector_addr)
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return await self._lite_client.get_elector_params_async()
+
+    async def get_current_participant_stakes_async(self, elector_addr) -> List[int]:
+        return await self._lite_client.get_current_participant_stakes_async(elector_addr)
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return await self._lite_client.get_election_validator_params_async()
+
+    async def get_stake_params_async(self) -> StakeParams:
+        return await self._lite_client.get_stake_params_async()
+
     def generate_recover_stake_req(self) -> str:
-        return self._fift_cli.generate_recover_stake_req()
+        if self._fift_cli:
+            return self._fift_cli.generate_recover_stake_req()
+        return base64.b64encode(elector.recover_stake_request()).decode()
@@ -1,10 +1,13 @@
+import base64
 import logging
-from typing import List
+from typing import List, Optional
 
 from rustconsole.core import RustConsole
+from toncommon import elector
 from toncommon.models.ElectionParams import ElectionParams, ElectionValidatorParams, StakeParams
 from toncommon.models.depool.DePoolSyncStatus import DePoolSyncStatus
 from tonoscli.core import TonosCli
+from tonliteserver.core import TonLiteServerClient
 from routines.validator_providers.core import Validator
 
 log = logging.getLogger("elections")
@@ -12,10 +15,17 @@ log = logging.getLogger("elections")
 
 class RustValidator(Validator):
 
-    def __init__(self, console: RustConsole, tonos_cli: TonosCli, elector_abi_url: str = None):
+    def __init__(self, console: RustConsole, tonos_cli: TonosCli, elector_abi_url: str = None,
+                 lite_client: Optional[TonLiteServerClient] = None, use_console_payloads: bool = True):
+        """
+        :param lite_client: If given, config params are read from liteserver directly instead of tonos-cli
+        :param use_console_payloads: Generate elector payloads with console, if not set they are built in-process
+        """
         self._console = console
         self._tonos_cli = tonos_cli
+        self._config_reader = lite_client or tonos_cli
         self._elector_abi_url = elector_abi_url
+        self._use_console_payloads = use_console_payloads
         self._election_data = {}
 
     def delete_temp_key(self, key, adnl_key):
@@ -58,7 +68,7 @@ class RustValidator(Validator):
 
     def get_elector_address(self) -> str:
         # get config 1
-        return self._tonos_cli.get_elector_address()
+        return self._config_reader.get_elector_address()
 
     def get_election_ids(self, elector_addr) -> [str]:
         """
@@ -72,7 +82,7 @@ class RustValidator(Validator):
 
     def get_elector_params(self) -> (ElectionParams, None):
         # get config 15
-        return self._tonos_cli.get_elector_params()
+        return self._config_reader.get_elector_params()
 
     def get_current_participant_stakes(self, elector_addr) -> List[int]:
         try:
@@ -89,11 +99,46 @@ class RustValidator(Validator):
 
     def get_election_validator_params(self) -> (ElectionValidatorParams, None):
         # get config 16
-        return self._tonos_cli.get_election_validator_params()
+        return self._config_reader.get_election_validator_params()
 
     def get_stake_params(self) -> StakeParams:
         # get config 17
-        return self._tonos_cli.get_stake_params()
+        return self._config_reader.get_stake_params()
+
+    async def get_sync_status_async(self) -> DePoolSyncStatus:
+        return await self._console.get_sync_status_async()
+
+    async def get_elector_address_async(self) -> str:
+        return await self._config_reader.get_elector_address_async()
+
+    async def get_election_ids_async(self, elector_addr) -> [str]:
+        if not self._elector_abi_url:
+            log.warning("Using FIFT call to elector, as no ABI specified")
+            return await self._tonos_cli.get_active_election_ids_fift_async(elector_addr)
+        return await self._tonos_cli.get_active_election_ids_async(elector_addr,
+                                                                   elector_abi_url=self._elector_abi_url)
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return await self._config_reader.get_elector_params_async()
+
+    async def get_current_participant_stakes_async(self, elector_addr) -> List[int]:
+        try:
+            if not self._elector_abi_url:
+                log.warning("Using FIFT call to elector to get participant list, as no ABI specified")
+                data = await self._tonos_cli.get_participant_list_fift_async(elector_addr=elector_addr)
+            else:
+                data = await self._tonos_cli.get_election_data_async(elector_addr=elector_addr,
+                                                                     elector_abi_url=self._elector_abi_url)
+            return [int(m.stake) for m in data.members]
+        except Exception:
+            log.exception("Failed to get participant stake list")
+        return []
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return await self._config_reader.get_election_validator_params_async()
+
+    async def get_stake_params_async(self) -> StakeParams:
+        return await self._config_reader.get_stake_params_async()
 
     def compute_returned_stakes(self, elector_addr, validator_addr) -> [int]:
         """
@@ -108,6 +153,8 @@ class RustValidator(Validator):
                                                       elector_abi_url=self._elector_abi_url)
 
     def generate_recover_stake_req(self) -> str:
-        # console -c "recover_stake"
-        return self._console.recover_stake_request()
+        if self._use_console_payloads:
+            # console -c "recover_stake"
+            return self._console.recover_stake_request()
+        return base64.b64encode(elector.recover_stake_request()).decode()
 
@@ -1,6 +1,7 @@
 import base64
 import json
 import os
+from typing import Dict, List
 
 import rsa
 from rsa import PrivateKey
@@ -12,40 +13,59 @@ class EnvSecretProvider(SecretManagerAbstract):
 
     def __init__(self, connection_string, keys_folder):
         super().__init__(connection_string, keys_folder)
-        self._data = json.loads(connection_string)
+        self._data = None
         self._private_key = None
-        if self._data.get("encryption_key_name"):
-            if not os.path.exists(os.path.join(keys_folder, self._data.get("encryption_key_name"))):
+        self._reload(connection_string)
+
+    def _reload(self, connection_string: str):
+        data = json.loads(connection_string)
+        private_key = None
+        if data.get("encryption_key_name"):
+            if not os.path.exists(os.path.join(self._keys_folder, data.get("encryption_key_name"))):
                 raise Exception("Couldn't initialize environment-based secret-manager, as encryption name with name {} do not exist.".format(
-                    self._data.get("encryption_key_name")))
-            with open(os.path.join(keys_folder, self._data.get("encryption_key_name")), "rb") as f:
+                    data.get("encryption_key_name")))
+            with open(os.path.join(self._keys_folder, data.get("encryption_key_name")), "rb") as f:
                 # PEM key
-                self._private_key = PrivateKey.load_pkcs1(f.read())
+                private_key = PrivateKey.load_pkcs1(f.read())
+        super()._reload(connection_string)
+        self._data = data
+        self._private_key = private_key
+
+    def _decrypt(self, data: str) -> bytes:
+        if self._private_key:
+            return rsa.decrypt(base64.decodebytes(data.encode()), self._private_key).strip()
+        return data.strip().encode()
+
+    def _encrypted_secrets(self) -> Dict[str, List[str]]:
+        secrets = {}
+        if self._data.get("validator_seed"):
+            secrets["validator_seed"] = [self._data.get("validator_seed")]
+        secrets["custodian_seeds"] = list(self._data.get("custodian_seeds", []))
+        for name, value in (self._data.get("secrets") or {}).items():
+            secrets[f"secret:{name}"] = [value]
+        return secrets
 
-    def _decrypt(self, data: str) -> str:
-        return rsa.decrypt(base64.decodebytes(data.encode()), self._private_key).decode().strip()
+    def _load_secrets(self):
+        return {name: [self._decrypt(value) for value in values]
+                for name, values in self._encrypted_secrets().items()}
+
+    def _load_secret(self, name: str):
+        values = self._encrypted_secrets().get(name)
+        return [self._decrypt(value) for value in values] if values is not None else None
 
     def get_validator_address(self):
         return self._data.get("validator_address")
 
     def get_secret_by_name(self, name: str) -> str:
-        seed = self._data.get("secrets").get(name)
-        if self._private_key:
-            seed = self._decrypt(seed)
-        return seed
+        values = self._get_cached_secret(f"secret:{name}")
+        return values[0] if values else None
 
     def get_validator_seed(self):
-        if self._private_key:
-            return self._decrypt(self._data.get("validator_seed"))
-        return self._data.get("validator_seed").strip()
+        values = self._get_cached_secret("validator_seed")
+        return values[0] if values else None
 
     def get_custodian_seeds(self):
-        if self._private_key:
-            decr = []
-            for seed in self._data.get("custodian_seeds", []):
-                decr.append(self._decrypt(seed))
-            return decr
-        return self._data.get("custodian_seeds", [])
+        return self._get_cached_secret("custodian_seeds") or []
 
 
 class SecretManager(EnvSecretProvider):
@@ -1,11 +1,123 @@
-from typing import List, Optional
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+log = logging.getLogger("secrets")
 
 
 class SecretManagerAbstract(object):
+    """
+    Providers doing expensive decryption implement _load_secrets, secrets are then decrypted at once
+    on the first use (or warm_up) and kept in the cache until TTL expires. With TTL 0 nothing is cached,
+    only the requested secret is decrypted (_load_secret) on every use.
+    Cache gives no memory hygiene guarantee: secrets are plain strings (as callers need them),
+    which can't be wiped in Python, eviction only drops references to them.
+    """
 
     def __init__(self, connection_string, keys_folder):
         self._connection_string = connection_string
         self._keys_folder = keys_folder
+        self._cache_ttl = 3600  # type: Optional[float]
+        self._cache = {}  # type: Dict[str, List[str]]
+        self._cache_loaded_at = None  # type: Optional[float]
+        self._cache_lock = threading.RLock()
+        self._refresh_thread = None  # type: Optional[threading.Thread]
+        self._refresh_stop = threading.Event()
+
+    def configure_cache(self, ttl: Optional[float] = 3600):
+        """
+        :param ttl: Seconds decrypted secrets are kept, forever if None, not cached at all if 0
+        """
+        self._cache_ttl = ttl
+        self.evict()
+
+    def _load_secrets(self) -> Dict[str, List[bytes]]:
+        """
+        Decrypt all the secrets of the provider, ones not using the cache return nothing
+        :return: Secret values by name
+        """
+        return {}
+
+    def _load_secret(self, name: str) -> Optional[List[bytes]]:
+        """
+        Decrypt single secret, used when nothing is cached. Providers override it not to decrypt all of them
+        :return: Secret values, None if there is no such secret
+        """
+        return self._load_secrets().get(name)
+
+    def _reload(self, connection_string: str):
+        """
+        Apply rotated connection string
+        """
+        self._connection_string = connection_string
+
+    def _cache_expired(self) -> bool:
+        if self._cache_loaded_at is None:
+            return True
+        return self._cache_ttl is not None and time.monotonic() - self._cache_loaded_at >= self._cache_ttl
+
+    def warm_up(self):
+        """
+        Decrypt all the secrets at once, replacing the cached ones. Does nothing if cache is disabled (TTL 0)
+        """
+        if self._cache_ttl == 0:
+            return
+        secrets = {name: [value.decode() for value in values] for name, values in self._load_secrets().items()}
+        with self._cache_lock:
+            self._evict()
+            self._cache = secrets
+            self._cache_loaded_at = time.monotonic()
+        log.debug("Decrypted {} secrets".format(len(secrets)))
+
+    def _get_cached_secret(self, name: str) -> Optional[List[str]]:
+        if self._cache_ttl == 0:
+            values = self._load_secret(name)
+            return [value.decode() for value in values] if values is not None else None
+        with self._cache_lock:
+            if self._cache_expired():
+                self.warm_up()
+            values = self._cache.get(name)
+            return list(values) if values is not None else None
+
+    def _evict(self):
+        self._cache = {}
+        self._cache_loaded_at = None
+
+    def evict(self):
+        """
+        Drop cached secrets, next use decrypts them again
+        """
+        with self._cache_lock:
+            self._evict()
+
+    def start_refresh(self, interval: float, connection_string_loader: Callable[[], str] = None):
+        """
+        Periodically decrypt secrets again in the background, picking up rotated connection string
+        :param interval: Seconds between refreshes
+        :param connection_string_loader: Returns current connection string (ex: reads mounted secret file)
+        """
+        def refresh():
+            while not self._refresh_stop.wait(interval):
+                try:
+                    if connection_string_loader:
+                        connection_string = connection_string_loader()
+                        if connection_string and connection_string != self._connection_string:
+                            log.info("Secret manager connection string changed, reloading")
+                            with self._cache_lock:
+                                self._reload(connection_string)
+                    self.warm_up()
+                except Exception as ex:
+                    log.warning("Failed to refresh secrets, keeping previous ones: {}".format(ex))
+
+        if self._refresh_thread:
+            return
+        self._refresh_thread = threading.Thread(target=refresh, name="secrets-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        self._refresh_stop.set()
+        self.evict()
 
     def get_validator_address(self):
         # not really a secret, but more convenient to store nxt to seed
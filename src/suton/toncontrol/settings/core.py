@@ -23,6 +23,10 @@ class TonSettings(BaseTonControlSettings):
     TON_WORK_DIR = None
     TON_ENV = "main.ton.dev"
     TON_ENDPOINTS = None
+    # use each of TON_ENDPOINTS separately, sending calls to the fastest healthy one
+    TONOS_CLI_SEPARATE_ENDPOINTS = False
+    # send read-only calls to the second fastest endpoint too if the first one is slow to answer
+    TONOS_CLI_HEDGE_READS = False
     TON_CONTROL_WORK_DIR = '/var/ton-control'
     TON_CONTROL_SECRET_MANAGER_CONNECTION_STRING = None  # never commit your raw seeds, encrypt them or use connection-strings to vaults
     TON_CONTROL_QUEUE_NAME = 'ton-validator-0'
@@ -37,10 +41,32 @@ class TonSettings(BaseTonControlSettings):
     TON_CONTROL_VALIDATOR_LITE_CLIENT_ADDR = 'tonvalidator:3031'
 
     TON_CONTROL_SECRET_MANAGER_PROVIDER = 'secrets.envprovider.core'
+    # seconds decrypted secrets are kept in memory (None - forever, 0 - decrypted on every use)
+    # and interval of decrypting them again in background, picking up rotated connection string (0 - disabled)
+    SECRET_CACHE_TTL = 3600
+    SECRET_REFRESH_INTERVAL = 0
     TON_CONTROL_QUEUE_PROVIDER = 'mqueue.azureservicebus.core'
 
     TON_VALIDATOR_TYPE = "rust"
     ELECTOR_ABI_URL = None  # required for Rust node
+    # how long (seconds) config params are cached if election id stays the same
+    CONFIG_CACHE_TTL = 3600
+    # LogStash shipping: max records per batch, max seconds record waits for the batch,
+    # records kept in memory before spilling to disk, max spill file size in bytes
+    LOGSTASH_BATCH_SIZE = 100
+    LOGSTASH_FLUSH_INTERVAL = 5
+    LOGSTASH_MAX_QUEUE_SIZE = 10000
+    LOGSTASH_MAX_SPILL_SIZE = 50 * 1024 * 1024
+    # TON utilities: default timeout (seconds) of an invocation and per command overrides (ex: {"call": 600}),
+    # retries of read-only commands with exponential backoff (seconds),
+    # consecutive failures opening circuit of the utility and seconds before it is tried again
+    TOOL_TIMEOUT = 300
+    TOOL_COMMAND_TIMEOUTS = {}
+    TOOL_MAX_RETRIES = 3
+    TOOL_BACKOFF_BASE = 0.5
+    TOOL_BACKOFF_MAX = 8
+    TOOL_CIRCUIT_FAILURE_THRESHOLD = 5
+    TOOL_CIRCUIT_RESET_TIMEOUT = 60
 
     ELECTIONS_SETTINGS: ElectionSettings = ElectionSettings()
     WALLET_MANAGEMENT_SETTINGS: WalletManagementSettings = WalletManagementSettings()
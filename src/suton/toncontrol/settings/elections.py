@@ -22,6 +22,21 @@ class ElectionSettings(BaseTonControlSettings):
     TON_CONTROL_ELECTION_MODE = ElectionMode.VALIDATOR
     PRUDENT_ELECTION_SETTINGS: PrudentElectionSettings = None
     DEPOOL_LIST: List[DePoolSettings] = []
+    # fetch independent chain data of the election cycle concurrently (asyncio)
+    TON_CONTROL_ASYNC_QUERIES = False
+    # max number of depools processed concurrently
+    DEPOOL_MAX_WORKERS = 4
+    # max number of stake recovery transactions submitted concurrently
+    STAKE_RECOVERY_MAX_WORKERS = 4
+    # write timing tree of every election cycle as Chrome trace json (work_dir/traces)
+    TON_CONTROL_TRACE_CYCLES = False
+    # number of the latest cycle traces kept in work_dir/traces
+    TON_CONTROL_TRACE_FILES_KEEP = 100
+    # profile election cycles with cProfile and keep profiles of N slowest ones (work_dir/profiles), 0 to disable
+    TON_CONTROL_PROFILE_SLOWEST_CYCLES = 0
+    # seconds between light checks of election ids while waiting for the next cycle
+    # (and recheck of depool events after ticktock), 0 to disable
+    TON_CONTROL_ELECTION_POLL_INTERVAL = 60
 
     @classmethod
     def get_class_code_name(cls):
@@ -0,0 +1,203 @@
+import atexit
+import copy
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+from toncommon.contextmanager import install_sensitive_filter
+
+
+def truncate_message(message: str, max_size: int) -> str:
+    """
+    Keep head and tail of the long message (ex: full output of the tool), dropping the middle
+    :param max_size: Max number of characters kept, 0 to keep everything
+    """
+    if not max_size or len(message) <= max_size:
+        return message
+    head = message[:max_size // 2]
+    tail = message[-(max_size - max_size // 2):]
+    total = len(message.encode(errors="replace"))
+    dropped = total - len(head.encode(errors="replace")) - len(tail.encode(errors="replace"))
+    return f"{head}\n... [truncated {dropped} of {total} bytes] ...\n{tail}"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotated segments are gzipped in the background, so rotation doesn't stall writing of the log
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._rotate
+        self._compression = None  # type: Optional[threading.Thread]
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        try:
+            with open(source, "rb") as f_in, gzip.open(f"{dest}.tmp", "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.replace(f"{dest}.tmp", dest)
+            os.remove(source)
+        except OSError as ex:
+            logging.getLogger("toncontrol").warning(f"Failed to compress rotated log {source}: {ex}")
+
+    def doRollover(self):
+        if self._compression:
+            # backups are shifted by names before rotation, previous segment has to be in place first
+            self._compression.join()
+        super().doRollover()
+
+    def _rotate(self, source: str, dest: str):
+        uncompressed = dest[:-len(".gz")]
+        if not os.path.exists(source):
+            return
+        os.replace(source, uncompressed)
+        self._compression = threading.Thread(target=self._compress, args=(uncompressed, dest),
+                                             name="log-compress", daemon=True)
+        self._compression.start()
+
+    def close(self):
+        super().close()
+        if self._compression:
+            self._compression.join()
+
+
+_exception_formatter = logging.Formatter()
+
+
+class _RoutedQueueHandler(QueueHandler):
+    """
+    Redacts and truncates the record on the calling thread and enqueues it for the handlers of the logger
+    """
+
+    def __init__(self, log_queue: queue.Queue, route: str, max_message_size: int):
+        super().__init__(log_queue)
+        self._route = route
+        self._max_message_size = max_message_size
+        install_sensitive_filter(self)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Unlike QueueHandler.prepare, traceback is not folded into the message but kept in exc_text,
+        so it is not truncated with the message and formatters can put it separately
+        """
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _exception_formatter.formatException(record.exc_info)
+        # copy, so other handlers of the record are not affected
+        record = copy.copy(record)
+        record.msg = record.message = truncate_message(message, self._max_message_size)
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        record.route = self._route
+        return record
+
+
+class _Router(object):
+    """
+    Handler of the listener passing records to the handlers of the logger they came from
+    """
+
+    def __init__(self, routes: Dict[str, List[logging.Handler]]):
+        self._routes = routes
+
+    def handle(self, record: logging.LogRecord):
+        for handler in self._routes.get(getattr(record, "route", ""), []):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class LogPipeline(object):
+    """
+    Loggers enqueue records, formatting and writing to stdout/files happens on the single background thread
+    """
+
+    def __init__(self, log_dir: str, json_lines: bool = False, max_message_size: int = 64 * 1024,
+                 max_file_size: int = 50 * 1024 * 1024, backup_count: int = 2, compress: bool = True):
+        """
+        :param json_lines: Write files as JSON lines instead of text
+        :param max_message_size: Default cap of the message size, 0 for no cap
+        :param compress: Gzip rotated files
+        """
+        self._log_dir = log_dir
+        self._json_lines = json_lines
+        self._max_message_size = max_message_size
+        self._max_file_size = max_file_size
+        self._backup_count = backup_count
+        self._compress = compress
+        self._queue = queue.Queue(-1)
+        self._routes = {}  # type: Dict[str, List[logging.Handler]]
+        self._listener = QueueListener(self._queue, _Router(self._routes))
+        self._started = False
+        self._text_formatter = logging.Formatter('%(asctime)s::%(name)s::%(levelname)s::%(message)s')
+
+    def add_loggers(self, logger_names: List[str], file: str = None, stdout: bool = True,
+                    max_message_size: int = None):
+        """
+        :param logger_names: Loggers sharing the handlers
+        :param file: File name in log dir to write records to
+        :param stdout: Write records to stdout as well
+        :param max_message_size: Message size cap of the loggers, default one if not set
+        """
+        handlers = []
+        if stdout:
+            handler = logging.StreamHandler()
+            handler.setFormatter(self._text_formatter)
+            handlers.append(handler)
+        if file:
+            handler_class = CompressingRotatingFileHandler if self._compress else RotatingFileHandler
+            handler = handler_class(os.path.join(self._log_dir, file), maxBytes=self._max_file_size,
+                                    backupCount=self._backup_count)
+            handler.setFormatter(JsonLinesFormatter() if self._json_lines else self._text_formatter)
+            handlers.append(handler)
+        route = "|".join(logger_names)
+        self._routes[route] = handlers
+        max_message_size = self._max_message_size if max_message_size is None else max_message_size
+        for logger_name in logger_names:
+            logging.getLogger(logger_name).addHandler(_RoutedQueueHandler(self._queue, route, max_message_size))
+
+    def start(self):
+        self._listener.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Write out queued records and stop the background thread
+        """
+        if not self._started:
+            return
+        self._started = False
+        self._listener.stop()
+        for handlers in self._routes.values():
+            for handler in handlers:
+                handler.close()
@@ -3,18 +3,19 @@ import hashlib
 import json
 import logging
 import os
-import re
 import socket
 from typing import Optional
 
 from toncommon.core import TonExec
 from toncommon.models.depool.DePoolSyncStatus import DePoolSyncStatus
+from toncommon.parsing import results
 
 log = logging.getLogger("rcontrol")
 
 
 class RustConsole(TonExec):
     DUMMY_WALLET_ADDR = "0:0000000000000000000000000000000000000000000000000000000000000000"
+    READ_COMMANDS = ('getstats',)
 
     def __init__(self, cli_path: str, cwd: str, server_addr: str,
                  server_pub_key_path: str, client_private_key_path: str):
@@ -75,7 +76,18 @@ class RustConsole(TonExec):
             raise Exception("Failed to run command {}: {}".format(command, out))
         return out
 
-    def get_stats(self) -> dict:
+    async def _run_command_async(self, command: str, options: list = None,
+                                 wallet_addr: Optional[str] = DUMMY_WALLET_ADDR, max_factor: float = 2.7):
+        if options is None:
+            options = []
+        args = ["-C", self._get_exec_config(wallet_addr, max_factor=max_factor), "-c", command] + options
+        log.debug("Running async: {} {}".format(self._exec_path, args))
+        ret, out = await self._execute_async(args, cwd=self._cwd)
+        if ret != 0:
+            raise Exception("Failed to run command {}: {}".format(command, out))
+        return out
+
+    def _parse_stats(self, data: str) -> dict:
         """ Ex
         GIT_BRANCH: master
         {
@@ -86,22 +98,15 @@ class RustConsole(TonExec):
             "in_next_vset_p36":     false
         }
         """
-        # getstats
-        broken_line_regex = re.compile(r'^\s*"(?P<key>.+)":\s+,?$')
-        data = self._run_command(command=f"getstats")
         log.debug(f"Get stats data: {data}")
-        payload = ""
-        payload_started = False
-        for line in data.splitlines():
-            if line.startswith("{"):
-                payload_started = True
-            if payload_started:
-                if broken_line_regex.match(line):
-                    m = broken_line_regex.match(line)
-                    key = m.group("key")
-                    line = f'"{key}": null {"," if line.endswith(",") else ""}'
-                payload += line
-        return json.loads(payload)
+        return results.parse_console_json(data)
+
+    def get_stats(self) -> dict:
+        # getstats
+        return self._parse_stats(self._run_command(command=f"getstats"))
+
+    async def get_stats_async(self) -> dict:
+        return self._parse_stats(await self._run_command_async(command=f"getstats"))
 
     def get_sync_time_diff(self) -> int:
         data = self.get_stats()
@@ -111,6 +116,10 @@ class RustConsole(TonExec):
         data = self.get_stats()
         return DePoolSyncStatus(time_diff=data.get("timediff"), sync_status=data.get("sync_status"))
 
+    async def get_sync_status_async(self) -> DePoolSyncStatus:
+        data = await self.get_stats_async()
+        return DePoolSyncStatus(time_diff=data.get("timediff"), sync_status=data.get("sync_status"))
+
     def recover_stake_request(self):
         self._run_command(command=f"recover_stake", wallet_addr=None)
         with open(os.path.join(self._cwd, "recover-query.boc"), "rb") as f:
@@ -0,0 +1,376 @@
+"""
+Minimal pure Python implementation of TVM cells and bag-of-cells (BOC) serialization,
+enough to read liteserver responses (config proofs, accounts, VM stacks) and to build small payloads.
+"""
+from typing import List, Optional
+
+BOC_MAGIC = 0xb5ee9c72
+# legacy magics, still might be produced by older nodes
+BOC_IDX_MAGIC = 0x68ff65f3
+BOC_IDX_CRC32C_MAGIC = 0xacc3a728
+
+
+class CellType:
+    ORDINARY = -1
+    PRUNED_BRANCH = 1
+    LIBRARY = 2
+    MERKLE_PROOF = 3
+    MERKLE_UPDATE = 4
+
+
+class Cell(object):
+    """
+    Cell holds up to 1023 bits of data and up to 4 references to other cells
+    """
+
+    def __init__(self, data: bytes = b"", bits: int = 0, refs: List["Cell"] = None, exotic: bool = False):
+        if bits > 1023 or bits > len(data) * 8:
+            raise ValueError("Invalid cell data length: {} bits".format(bits))
+        self.data = data
+        self.bits = bits
+        self.refs = refs or []  # type: List[Cell]
+        if len(self.refs) > 4:
+            raise ValueError("Cell can't have more than 4 refs")
+        self.exotic = exotic
+
+    @property
+    def type(self) -> int:
+        if not self.exotic:
+            return CellType.ORDINARY
+        return self.data[0]
+
+    @property
+    def is_pruned(self) -> bool:
+        return self.exotic and self.type == CellType.PRUNED_BRANCH
+
+    def begin_parse(self, allow_exotic: bool = False) -> "CellSlice":
+        if self.is_pruned:
+            raise ValueError("Can't read pruned branch cell, it's absent in the proof")
+        if self.exotic and not allow_exotic:
+            raise ValueError("Can't read exotic cell of type {} as ordinary".format(self.type))
+        return CellSlice(self)
+
+    def virtualize(self) -> "Cell":
+        """
+        :return: Cell the proof is about, if cell is Merkle proof, cell itself otherwise
+        """
+        if self.exotic and self.type == CellType.MERKLE_PROOF:
+            return self.refs[0]
+        return self
+
+    def __repr__(self):
+        return "Cell(bits={}, refs={}, exotic={})".format(self.bits, len(self.refs), self.exotic)
+
+
+class CellSlice(object):
+    """
+    Reader of the cell data and refs
+    """
+
+    def __init__(self, cell: Cell):
+        self._cell = cell
+        self._value = int.from_bytes(cell.data, "big") >> (len(cell.data) * 8 - cell.bits)
+        self._bits = cell.bits
+        self._pos = 0
+        self._ref_pos = 0
+
+    @property
+    def remaining_bits(self) -> int:
+        return self._bits - self._pos
+
+    @property
+    def remaining_refs(self) -> int:
+        return len(self._cell.refs) - self._ref_pos
+
+    def preload_uint(self, bits: int) -> int:
+        if bits > self.remaining_bits:
+            raise ValueError("Cell underflow: need {} bits, have {}".format(bits, self.remaining_bits))
+        if bits == 0:
+            return 0
+        return (self._value >> (self._bits - self._pos - bits)) & ((1 << bits) - 1)
+
+    def load_uint(self, bits: int) -> int:
+        value = self.preload_uint(bits)
+        self._pos += bits
+        return value
+
+    def load_int(self, bits: int) -> int:
+        value = self.load_uint(bits)
+        if bits and value >> (bits - 1):
+            value -= 1 << bits
+        return value
+
+    def load_bit(self) -> int:
+        return self.load_uint(1)
+
+    def load_bytes(self, size: int) -> bytes:
+        return self.load_uint(size * 8).to_bytes(size, "big")
+
+    def skip_bits(self, bits: int):
+        self.load_uint(bits)
+
+    def load_var_uint(self, len_bits: int) -> int:
+        """
+        VarUInteger n, where len_bits is bit size of the length (ex: 4 for VarUInteger 16)
+        """
+        size = self.load_uint(len_bits)
+        return self.load_uint(size * 8)
+
+    def load_grams(self) -> int:
+        return self.load_var_uint(4)
+
+    def load_bounded_uint(self, max_value: int) -> int:
+        """
+        TL-B (#<= max_value)
+        """
+        return self.load_uint(max_value.bit_length())
+
+    def preload_ref(self, index: int = 0) -> Cell:
+        if self._ref_pos + index >= len(self._cell.refs):
+            raise ValueError("Cell underflow: no ref {}".format(self._ref_pos + index))
+        return self._cell.refs[self._ref_pos + index]
+
+    def load_ref(self) -> Cell:
+        ref = self.preload_ref()
+        self._ref_pos += 1
+        return ref
+
+    def load_maybe_ref(self) -> Optional[Cell]:
+        return self.load_ref() if self.load_bit() else None
+
+
+class CellBuilder(object):
+
+    def __init__(self):
+        self._value = 0
+        self._bits = 0
+        self._refs = []  # type: List[Cell]
+
+    @property
+    def bits(self) -> int:
+        return self._bits
+
+    def store_uint(self, value: int, bits: int) -> "CellBuilder":
+        if value < 0 or value >> bits:
+            raise ValueError("Value {} does not fit into {} bits".format(value, bits))
+        if self._bits + bits > 1023:
+            raise ValueError("Cell overflow")
+        self._value = (self._value << bits) | value
+        self._bits += bits
+        return self
+
+    def store_int(self, value: int, bits: int) -> "CellBuilder":
+        if not -(1 << (bits - 1)) <= value < (1 << (bits - 1)):
+            raise ValueError("Value {} does not fit into {} bits".format(value, bits))
+        return self.store_uint(value & ((1 << bits) - 1), bits)
+
+    def store_bit(self, bit: int) -> "CellBuilder":
+        return self.store_uint(1 if bit else 0, 1)
+
+    def store_bytes(self, data: bytes) -> "CellBuilder":
+        return self.store_uint(int.from_bytes(data, "big"), len(data) * 8)
+
+    def store_var_uint(self, value: int, len_bits: int) -> "CellBuilder":
+        size = (value.bit_length() + 7) // 8
+        self.store_uint(size, len_bits)
+        return self.store_uint(value, size * 8)
+
+    def store_grams(self, value: int) -> "CellBuilder":
+        return self.store_var_uint(value, 4)
+
+    def store_ref(self, cell: Cell) -> "CellBuilder":
+        if len(self._refs) >= 4:
+            raise ValueError("Cell can't have more than 4 refs")
+        self._refs.append(cell)
+        return self
+
+    def end_cell(self) -> Cell:
+        size = (self._bits + 7) // 8
+        data = (self._value << (size * 8 - self._bits)).to_bytes(size, "big")
+        return Cell(data, self._bits, list(self._refs))
+
+
+def _read_uint(data: bytes, pos: int, size: int) -> (int, int):
+    return int.from_bytes(data[pos:pos + size], "big"), pos + size
+
+
+def deserialize_boc(data: bytes) -> List[Cell]:
+    """
+    :return: Root cells of the BOC
+    """
+    magic, pos = _read_uint(data, 0, 4)
+    if magic == BOC_MAGIC:
+        flags = data[pos]
+        has_idx = bool(flags & 0x80)
+        if flags & 0x40 and crc32c(data[:-4]) != int.from_bytes(data[-4:], "little"):
+            raise ValueError("BOC checksum mismatch")
+        has_cache_bits = bool(flags & 0x20)
+        size = flags & 0x07
+        if has_cache_bits and not has_idx:
+            raise ValueError("Invalid BOC flags: {}".format(flags))
+    elif magic in (BOC_IDX_MAGIC, BOC_IDX_CRC32C_MAGIC):
+        size = data[pos]
+        has_idx = True
+        has_cache_bits = False
+    else:
+        raise ValueError("Unknown BOC magic: {:x}".format(magic))
+    pos += 1
+    off_bytes = data[pos]
+    pos += 1
+    cells_num, pos = _read_uint(data, pos, size)
+    roots_num, pos = _read_uint(data, pos, size)
+    _, pos = _read_uint(data, pos, size)  # absent
+    _, pos = _read_uint(data, pos, off_bytes)  # total cells size
+    if magic == BOC_MAGIC:
+        root_indexes = []
+        for _ in range(roots_num):
+            index, pos = _read_uint(data, pos, size)
+            root_indexes.append(index)
+    else:
+        root_indexes = [0]
+    if has_idx:
+        pos += cells_num * off_bytes
+
+    raw_cells = []
+    for _ in range(cells_num):
+        d1, d2 = data[pos], data[pos + 1]
+        pos += 2
+        refs_num = d1 & 0x07
+        exotic = bool(d1 & 0x08)
+        if d1 & 0x10:
+            # hashes and depths are stored along with the cell
+            level_mask = d1 >> 5
+            pos += (bin(level_mask).count("1") + 1) * (32 + 2)
+        data_size = (d2 + 1) // 2
+        cell_data = data[pos:pos + data_size]
+        pos += data_size
+        bits = data_size * 8
+        if d2 % 2:
+            # remove completion tag: trailing 1 followed by zeros
+            last = cell_data[-1]
+            if not last:
+                raise ValueError("Invalid cell completion tag")
+            bits -= (last & -last).bit_length()
+        refs = []
+        for _ in range(refs_num):
+            ref, pos = _read_uint(data, pos, size)
+            refs.append(ref)
+        raw_cells.append((cell_data, bits, refs, exotic))
+    cells = [None] * cells_num  # type: List[Optional[Cell]]
+    # refs always point to the cells serialized after the current one
+    for index in reversed(range(cells_num)):
+        cell_data, bits, refs, exotic = raw_cells[index]
+        if any(ref <= index for ref in refs):
+            raise ValueError("BOC cells are not in topological order")
+        cells[index] = Cell(cell_data, bits, [cells[ref] for ref in refs], exotic=exotic)
+    return [cells[index] for index in root_indexes]
+
+
+def _make_crc32c_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82f63b78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+
+def crc32c(data: bytes) -> int:
+    crc = 0xffffffff
+    for byte in data:
+        crc = _CRC32C_TABLE[(crc ^ byte) & 0xff] ^ (crc >> 8)
+    return crc ^ 0xffffffff
+
+
+def _collect_cells(root: Cell) -> List[Cell]:
+    order = []
+    visited = set()
+
+    def visit(cell: Cell):
+        visited.add(id(cell))
+        for ref in cell.refs:
+            if id(ref) not in visited:
+                visit(ref)
+        order.append(cell)
+    visit(root)
+    order.reverse()
+    return order
+
+
+def serialize_boc(root: Cell, with_crc32c: bool = False) -> bytes:
+    """
+    Serialize single root BOC without index
+    :param with_crc32c: Append CRC32C checksum, same as Fift "2 boc+>B"
+    """
+    cells = _collect_cells(root)
+    indexes = {id(cell): index for index, cell in enumerate(cells)}
+    size = max(1, (len(cells).bit_length() + 7) // 8)
+    payload = bytearray()
+    for cell in cells:
+        data_size = (cell.bits + 7) // 8
+        payload.append(len(cell.refs) + (8 if cell.exotic else 0))
+        payload.append(data_size + cell.bits // 8)
+        if cell.bits % 8:
+            value = int.from_bytes(cell.data[:data_size], "big") >> (data_size * 8 - cell.bits)
+            pad = data_size * 8 - cell.bits
+            payload += (((value << 1) | 1) << (pad - 1)).to_bytes(data_size, "big")
+        else:
+            payload += cell.data[:data_size]
+        for ref in cell.refs:
+            payload += indexes[id(ref)].to_bytes(size, "big")
+    off_bytes = max(1, (len(payload).bit_length() + 7) // 8)
+    header = bytearray(BOC_MAGIC.to_bytes(4, "big"))
+    header.append(size | (0x40 if with_crc32c else 0))
+    header.append(off_bytes)
+    header += len(cells).to_bytes(size, "big")
+    header += (1).to_bytes(size, "big")  # roots
+    header += (0).to_bytes(size, "big")  # absent
+    header += len(payload).to_bytes(off_bytes, "big")
+    header += (0).to_bytes(size, "big")  # root index
+    boc = bytes(header + payload)
+    if with_crc32c:
+        boc += crc32c(boc).to_bytes(4, "little")
+    return boc
+
+
+def _load_label(s: CellSlice, max_len: int) -> (int, int):
+    """
+    HmLabel: hml_short$0, hml_long$10, hml_same$11
+    :return: label length and its value
+    """
+    if not s.load_bit():
+        length = 0
+        while s.load_bit():
+            length += 1
+        return length, s.load_uint(length)
+    if not s.load_bit():
+        length = s.load_bounded_uint(max_len)
+        return length, s.load_uint(length)
+    bit = s.load_bit()
+    length = s.load_bounded_uint(max_len)
+    return length, ((1 << length) - 1) if bit else 0
+
+
+def hashmap_get(root: Cell, key_bits: int, key: int) -> Optional[CellSlice]:
+    """
+    Look up value in (non-empty) Hashmap n X
+    :return: Slice positioned at the value or None if key is absent
+    """
+    cell = root
+    remaining = key_bits
+    while True:
+        s = cell.begin_parse()
+        label_len, label = _load_label(s, remaining)
+        if label_len > remaining or label != (key >> (remaining - label_len)) & ((1 << label_len) - 1):
+            return None
+        remaining -= label_len
+        if remaining == 0:
+            return s
+        key &= (1 << remaining) - 1
+        remaining -= 1
+        cell = s.preload_ref((key >> remaining) & 1)
+        key &= (1 << remaining) - 1
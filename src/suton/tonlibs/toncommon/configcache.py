@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+log = logging.getLogger("toncommon")
+
+
+class ConfigCache(object):
+    """
+    Cache of blockchain config params keyed by param index, persisted to the file.
+    Params rarely change within validation round, so entries are kept until epoch marker
+    (ex: active election id, last key block seqno) changes or until TTL expires.
+    Only parsed values are expected to be put, so bad answer of the tool is not kept.
+    Changes are written to the file on flush(), not on every put.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = 3600):
+        """
+        :param path: File to persist cache to, not persisted if omitted
+        :param ttl: Max age of an entry in seconds
+        """
+        self._path = path
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._epoch = None
+        self._entries = {}
+        self._dirty = False
+        self._load()
+        if path:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _key(index, namespace: str) -> str:
+        return f"{namespace}:{index}"
+
+    def _load(self):
+        if not self._path or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path) as f:
+                data = json.load(f)
+            self._epoch = data.get("epoch")
+            self._entries = data.get("entries", {})
+        except Exception as ex:
+            log.warning(f"Failed to load config cache from {self._path}, starting empty: {ex}")
+            self._entries = {}
+
+    def flush(self):
+        """
+        Persist changes made since the last flush
+        """
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        self._dirty = False
+        if not self._path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"epoch": self._epoch, "entries": self._entries}, f)
+            os.replace(tmp_path, self._path)
+        except Exception as ex:
+            log.warning(f"Failed to persist config cache to {self._path}: {ex}")
+
+    def update_epoch(self, epoch) -> bool:
+        """
+        :param epoch: JSON serializable marker of the current config epoch
+        :return: True if epoch changed and cache got invalidated
+        """
+        with self._lock:
+            if epoch == self._epoch:
+                return False
+            log.info(f"Config epoch changed {self._epoch} -> {epoch}, invalidating config cache")
+            self._epoch = epoch
+            self._entries = {}
+            self._dirty = True
+            return True
+
+    def invalidate(self, index=None, namespace: str = ""):
+        with self._lock:
+            if index is None:
+                self._entries = {}
+            else:
+                self._entries.pop(self._key(index, namespace), None)
+            self._dirty = True
+
+    def get(self, index, namespace: str = ""):
+        """
+        :return: Cached value or None if missing/expired
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(index, namespace))
+            if entry and time.time() - entry["ts"] < self._ttl:
+                return entry["value"]
+            return None
+
+    def put(self, index, value, namespace: str = ""):
+        if value is None:
+            return
+        with self._lock:
+            self._entries[self._key(index, namespace)] = {"value": value, "ts": time.time()}
+            self._dirty = True
+
+    def get_or_load(self, index, loader, namespace: str = ""):
+        value = self.get(index, namespace=namespace)
+        if value is None:
+            value = loader()
+            self.put(index, value, namespace=namespace)
+        else:
+            log.debug(f"Config param {namespace}:{index} taken from cache")
+        return value
+
+    async def get_or_load_async(self, index, loader, namespace: str = ""):
+        """
+        :param loader: Callable returning awaitable with the value
+        """
+        value = self.get(index, namespace=namespace)
+        if value is None:
+            value = await loader()
+            self.put(index, value, namespace=namespace)
+        else:
+            log.debug(f"Config param {namespace}:{index} taken from cache")
+        return value
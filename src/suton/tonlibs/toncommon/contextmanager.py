@@ -1,45 +1,117 @@
 import logging
+import threading
 from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+
+class SecretRedactor(object):
+    """
+    Thread-safe registry of secrets currently in use. Lookup table is rebuilt only when the set of active secrets
+    changes. Substring search of CPython is much faster than regex alternation on large tool outputs,
+    so secrets are searched one by one and replaced only when present.
+    """
+    _instance = None
+
+    def __init__(self, replacement: str = "***"):
+        self._replacement = replacement
+        self._lock = threading.Lock()
+        # secret -> number of active blocks using it
+        self._secrets = {}  # type: Dict[str, int]
+        self._lookup = ()  # type: Tuple[str, ...]
+        self.version = 0
+
+    @staticmethod
+    def get_redactor():
+        """
+        :rtype: SecretRedactor
+        """
+        if SecretRedactor._instance is None:
+            SecretRedactor._instance = SecretRedactor()
+        return SecretRedactor._instance
+
+    def _rebuild(self):
+        self.version += 1
+        # longer secrets first, so secret containing another one is redacted whole
+        self._lookup = tuple(sorted(self._secrets, key=len, reverse=True))
+
+    def register(self, secrets: Iterable):
+        secrets = [str(secret) for secret in secrets if secret]
+        with self._lock:
+            added = False
+            for secret in secrets:
+                count = self._secrets.get(secret, 0)
+                added = added or not count
+                self._secrets[secret] = count + 1
+            if added:
+                self._rebuild()
+
+    def unregister(self, secrets: Iterable):
+        secrets = [str(secret) for secret in secrets if secret]
+        with self._lock:
+            removed = False
+            for secret in secrets:
+                count = self._secrets.get(secret, 0) - 1
+                if count > 0:
+                    self._secrets[secret] = count
+                elif secret in self._secrets:
+                    del self._secrets[secret]
+                    removed = True
+            if removed:
+                self._rebuild()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._lookup)
+
+    def redact(self, text: str) -> str:
+        if not text:
+            return text
+        for secret in self._lookup:
+            if secret in text:
+                text = text.replace(secret, self._replacement)
+        return text
 
 
 class SensitiveFilter(logging.Filter):
+    """
+    Redacts active secrets from the formatted message and exception text of the record
+    """
+    _formatter = logging.Formatter()
 
-    def __init__(self, secrets: list):
+    def __init__(self, redactor: SecretRedactor = None):
         super().__init__("sensitive_filer")
-        self._secrets = secrets
+        self._redactor = redactor or SecretRedactor.get_redactor()
 
     def filter(self, record: logging.LogRecord) -> int:
-        if hasattr(record, 'msg'):
-            for secret in self._secrets:
-                if secret:
-                    record.msg = record.msg.replace(str(secret), "***")
-        if isinstance(record.args, dict):
-            for key in record.args:
-                for secret in self._secrets:
-                    if secret:
-                        record.args[key] = str(record.args[key]).replace(str(secret), "***")
-        else:
-            nargs = []
-            for i in range(len(record.args)):
-                for secret in self._secrets:
-                    if secret:
-                        nargs.append(str(record.args[i]).replace(str(secret), "***"))
-            record.args = tuple(nargs)
+        redactor = self._redactor
+        if not redactor.active or getattr(record, "redaction_version", None) == redactor.version:
+            return True
+        record.msg = redactor.redact(record.getMessage())
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = SensitiveFilter._formatter.formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = redactor.redact(record.exc_text)
+        record.redaction_version = redactor.version
         return True
 
 
+_root_filter = SensitiveFilter()
+
+
+def install_sensitive_filter(handler: logging.Handler):
+    if _root_filter not in handler.filters:
+        handler.addFilter(_root_filter)
+
+
 @contextmanager
 def secret_manager(secrets: list):
     # patcher logger not to print secrets
-    filter = SensitiveFilter(secrets)
     for handler in logging.root.handlers:
-        handler.addFilter(filter)
+        install_sensitive_filter(handler)
+    redactor = SecretRedactor.get_redactor()
+    redactor.register(secrets)
     try:
         yield
-    except Exception:
-        raise
     finally:
-        # remove patchers
-        for handler in logging.root.handlers:
-            handler.removeFilter(filter)
-
+        redactor.unregister(secrets)
@@ -1,21 +1,201 @@
+import asyncio
+import functools
 import logging
+import os
 import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional, List, Iterator, Callable, Dict, Tuple
+
+from toncommon.policy import ExecutionPolicy, CircuitBreaker
+from toncommon.session import TonExecSession
 
 log = logging.getLogger("toncommon")
 
 
 class TonExec(object):
+    RETCODE_TIMEOUT = 2
+    RETCODE_ERROR = -1
+    RETCODE_CIRCUIT_OPEN = -2
+    # commands not changing any state, safe to be retried
+    READ_COMMANDS = ()  # type: tuple
+    # output of the tool saying it failed to reach its backend (lowercase)
+    TRANSPORT_ERRORS = ()  # type: tuple
+
+    # callables (tool, command, duration, retcode) notified after every tool invocation
+    _execution_listeners = []  # type: List[Callable[[str, str, float, int], None]]
+    _default_policy = ExecutionPolicy()
+    # circuit breakers by tool name
+    _circuits = {}  # type: Dict[str, CircuitBreaker]
+    _circuits_lock = threading.Lock()
 
-    def __init__(self, exec_path):
+    def __init__(self, exec_path, policy: ExecutionPolicy = None):
+        """
+        :param policy: Timeouts and retries of the tool, default policy if not set
+        """
         self._exec_path = exec_path
+        self._policy = policy
+        self._session = None  # type: Optional[TonExecSession]
+
+    @staticmethod
+    def add_execution_listener(listener: Callable[[str, str, float, int], None]):
+        TonExec._execution_listeners.append(listener)
+
+    @staticmethod
+    def set_default_policy(policy: ExecutionPolicy):
+        TonExec._default_policy = policy
+        with TonExec._circuits_lock:
+            TonExec._circuits.clear()
+
+    @property
+    def policy(self) -> ExecutionPolicy:
+        return self._policy or TonExec._default_policy
+
+    @property
+    def circuit(self) -> CircuitBreaker:
+        """
+        Circuit breaker shared by all instances of the same tool
+        """
+        tool = os.path.basename(self._exec_path)
+        with TonExec._circuits_lock:
+            circuit = TonExec._circuits.get(tool)
+            if circuit is None:
+                circuit = TonExec._circuits[tool] = CircuitBreaker(tool,
+                                                                   failure_threshold=self.policy.failure_threshold,
+                                                                   reset_timeout=self.policy.reset_timeout)
+            return circuit
+
+    def _is_transport_failure(self, retcode: int, out: Optional[str]) -> bool:
+        """
+        Whether tool failed to run or to reach its backend, as opposed to the command itself failing
+        (e.g. running method of uninitialized account). Only the former say that the tool is unavailable.
+        """
+        if retcode in (TonExec.RETCODE_TIMEOUT, TonExec.RETCODE_ERROR):
+            return True
+        if retcode == 0 or not out or not self.TRANSPORT_ERRORS:
+            return False
+        out = out.lower()
+        return any(error in out for error in self.TRANSPORT_ERRORS)
+
+    def _circuit_open(self, args, command: str = None) -> (int, str):
+        command = command or self._get_command_name(args)
+        out = f'Cmd: {[self._exec_path] + [str(arg) for arg in args]} (CIRCUIT OPEN, {self.circuit.name} is failing)\n'
+        self._notify_execution(command, time.monotonic(), TonExec.RETCODE_CIRCUIT_OPEN)
+        log.debug(f"Code: {TonExec.RETCODE_CIRCUIT_OPEN}. Output: {out}")
+        return TonExec.RETCODE_CIRCUIT_OPEN, out
+
+    @staticmethod
+    def _get_command_name(args) -> str:
+        """
+        Short name of the command tool is invoked with, used to group executions (ex: in metrics)
+        """
+        str_args = [str(arg) for arg in args]
+        # lite-client, consoles and fift scripts
+        for flag in ('-rc', '-c', '-s'):
+            if flag in str_args[:-1]:
+                return str_args[str_args.index(flag) + 1].split(" ", 1)[0]
+        prev = None
+        for arg in str_args:
+            if not arg.startswith('-') and not (prev and prev.startswith('-')):
+                return arg
+            prev = arg
+        return "unknown"
+
+    def _notify_execution(self, command: str, started: float, retcode: int):
+        if not TonExec._execution_listeners:
+            return
+        tool = os.path.basename(self._exec_path)
+        duration = time.monotonic() - started
+        for listener in TonExec._execution_listeners:
+            try:
+                listener(tool, command, duration, retcode)
+            except Exception as ex:
+                log.warning(f"Execution listener failed: {ex}")
+
+    def _open_session(self, args, cwd=None, keep_preamble=False, late_output_timeout=0):
+        """
+        Switch tool to the interactive mode, where one process is kept alive and serves all the commands
+        :param args: args to start tool in interactive mode
+        """
+        self.close_session()
+        self._session = TonExecSession(self._exec_path, args, cwd=cwd, keep_preamble=keep_preamble,
+                                       late_output_timeout=late_output_timeout)
+
+    def close_session(self):
+        if self._session:
+            self._session.close()
+            self._session = None
+
+    def _execute_in_session(self, commands: List[str], timeout=None):
+        """
+        Run commands in the interactive session under the execution policy, same as _execute.
+        Commands are retried only if all of them are reads.
+        :param commands: commands to send to the interactive session
+        :param timeout: Overrides timeout of the policy (max time to wait for a line of output)
+        :return: return value and output of the commands
+        """
+        names = [command.split(" ", 1)[0] for command in commands] or ["unknown"]
+        timeout = timeout or self.policy.timeout_for(names[0])
+        attempts = min(self.policy.attempts_for(name, self.READ_COMMANDS) for name in names)
+        return self._execute_with_policy(names[0], commands, attempts,
+                                         lambda: self._execute_in_session_once(commands, timeout=timeout))
+
+    def _execute_in_session_once(self, commands: List[str], timeout=None):
+        log.debug(f"Running in session: {self._exec_path} {commands}")
+        started = time.monotonic()
+        try:
+            retcode, out = self._session.execute(commands, timeout=timeout)
+        except Exception as e:
+            retcode = TonExec.RETCODE_ERROR
+            out = f'Cmd: {commands} (FAILED TO START SESSION)\n{e}'
+        self._notify_execution(commands[0].split(" ", 1)[0] if commands else "unknown", started, retcode)
+        log.debug(f"Code: {retcode}. Output: {out}")
+        return retcode, out
 
     def _execute(self, args, cwd=None, timeout=None):
         """
-        :param args: args to tonos-cli
-        :return: return value and stdout of tonos-cli
+        Run tool under the execution policy: read commands failing are retried with backoff,
+        calls fail fast while circuit of the tool is open. Circuit is opened by transport failures only.
+        :param args: args to the tool
+        :param timeout: Overrides timeout of the policy
+        :return: return value and stdout of the tool
+        """
+        command = self._get_command_name(args)
+        timeout = timeout or self.policy.timeout_for(command)
+        attempts = self.policy.attempts_for(command, self.READ_COMMANDS)
+        return self._execute_with_policy(command, args, attempts,
+                                         lambda: self._execute_once(args, cwd=cwd, timeout=timeout))
+
+    def _execute_with_policy(self, command: str, args, attempts: int,
+                             execute_once: Callable[[], Tuple[int, str]]) -> (int, str):
+        """
+        :param args: args (or session commands) of the call, for the error message
+        :param execute_once: Single attempt of the call
+        """
+        retcode, out = TonExec.RETCODE_CIRCUIT_OPEN, None
+        for attempt in range(attempts):
+            if attempt:
+                delay = self.policy.backoff(attempt - 1)
+                log.info(f"{command} failed ({retcode}), retrying in {delay:.1f}s ({attempt}/{attempts - 1})")
+                time.sleep(delay)
+            if not self.circuit.allow():
+                return self._circuit_open(args, command)
+            retcode, out = execute_once()
+            self.circuit.record(not self._is_transport_failure(retcode, out))
+            if retcode == 0:
+                break
+        return retcode, out
+
+    def _execute_once(self, args, cwd=None, timeout=None):
+        """
+        :param args: args to the tool
+        :return: return value and stdout of the tool
         """
         str_args = [str(arg) for arg in args]
         params = [self._exec_path] + str_args
+        started = time.monotonic()
         try:
             process = subprocess.run(params, timeout=timeout, cwd=cwd,
                                      capture_output=True,
@@ -29,13 +209,141 @@ class TonExec(object):
             out = f'Cmd: {params}, {e}\n'
             out += e.output
         except subprocess.TimeoutExpired as e:
-            retcode = 2
+            retcode = TonExec.RETCODE_TIMEOUT
             out = f'Cmd: {params} (TIMEOUT {timeout})\n'
-            out += e.output
+            out += e.output or ''
         except Exception as e:
-            retcode = -1
-            out = f'Cmd: {params} (TIMEOUT {timeout})\n'
+            retcode = TonExec.RETCODE_ERROR
+            out = f'Cmd: {params} (FAILED TO RUN)\n'
             out += str(e)
+        self._notify_execution(self._get_command_name(args), started, retcode)
         log.debug(f"Code: {retcode}. Output: {out}")
         return retcode, out
 
+    def _execute_stream(self, args, cwd=None, timeout=None) -> Iterator[str]:
+        """
+        Run tool and yield lines of its output as soon as they are printed.
+        Tool is killed once generator is closed, so caller can stop reading when it has enough.
+        Only stdout is yielded, tail of stderr is kept for the error message.
+        Streaming is not retried (lines are consumed already), but it fails fast while circuit of the tool is open
+        and its failures are counted by the circuit.
+        :param args: args to the tool
+        :param timeout: Max time for the tool to run
+        """
+        str_args = [str(arg) for arg in args]
+        params = [self._exec_path] + str_args
+        if not self.circuit.allow():
+            _, out = self._circuit_open(args)
+            raise Exception(out)
+        log.debug(f"Streaming: {params}")
+        try:
+            process = subprocess.Popen(params, cwd=cwd,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       # without stdin attached TON utilities failing
+                                       stdin=subprocess.PIPE,
+                                       text=True, bufsize=1)
+        except Exception:
+            self.circuit.record(False)
+            raise
+        started = time.monotonic()
+        # stderr is drained in the background, so tool doesn't block on the full pipe
+        stderr_tail = deque(maxlen=20)
+        stderr_reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,),
+                                         name="stream-stderr", daemon=True)
+        stderr_reader.start()
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            process.kill()
+        watchdog = None
+        if timeout:
+            watchdog = threading.Timer(timeout, kill_on_timeout)
+            watchdog.daemon = True
+            watchdog.start()
+        completed = False
+        try:
+            for line in process.stdout:
+                yield line
+            retcode = process.wait()
+            completed = True
+            if retcode != 0:
+                stderr_reader.join(timeout=1)
+                raise Exception(f"Cmd: {params}, returned non-zero exit status {retcode}\n{''.join(stderr_tail)}")
+        finally:
+            if watchdog:
+                watchdog.cancel()
+            if not completed and process.poll() is None:
+                log.debug(f"Stopping streaming of: {params}")
+                process.kill()
+            retcode = process.wait()
+            stderr_reader.join(timeout=1)
+            process.stdout.close()
+            process.stderr.close()
+            process.stdin.close()
+            # stopping early is not a failure of the tool
+            retcode = retcode if completed else 0
+            if timed_out.is_set():
+                retcode = TonExec.RETCODE_TIMEOUT
+            self.circuit.record(not self._is_transport_failure(retcode, ''.join(stderr_tail)))
+            self._notify_execution(self._get_command_name(args), started, retcode)
+
+    async def _execute_async(self, args, cwd=None, timeout=None):
+        """
+        Asyncio counterpart of _execute
+        :param args: args to the tool
+        :param timeout: Overrides timeout of the policy
+        :return: return value and stdout of the tool
+        """
+        command = self._get_command_name(args)
+        timeout = timeout or self.policy.timeout_for(command)
+        attempts = self.policy.attempts_for(command, self.READ_COMMANDS)
+        retcode, out = TonExec.RETCODE_CIRCUIT_OPEN, None
+        for attempt in range(attempts):
+            if attempt:
+                delay = self.policy.backoff(attempt - 1)
+                log.info(f"{command} failed ({retcode}), retrying in {delay:.1f}s ({attempt}/{attempts - 1})")
+                await asyncio.sleep(delay)
+            if not self.circuit.allow():
+                return self._circuit_open(args)
+            retcode, out = await self._execute_once_async(args, cwd=cwd, timeout=timeout)
+            self.circuit.record(not self._is_transport_failure(retcode, out))
+            if retcode == 0:
+                break
+        return retcode, out
+
+    async def _execute_once_async(self, args, cwd=None, timeout=None):
+        if sys.version_info < (3, 8) and threading.current_thread() is not threading.main_thread():
+            # child watcher of py3.7 works only with loop of the main thread
+            return await asyncio.get_event_loop().run_in_executor(None, functools.partial(
+                self._execute_once, args, cwd=cwd, timeout=timeout))
+        str_args = [str(arg) for arg in args]
+        params = [self._exec_path] + str_args
+        process = None
+        started = time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(*params, cwd=cwd,
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE,
+                                                           # without stdin attached TON utilities failing
+                                                           stdin=asyncio.subprocess.PIPE)
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+            retcode = process.returncode
+            out = stdout.decode().strip()
+            if retcode != 0:
+                out = f'Cmd: {params}, returned non-zero exit status {retcode}\n{out}'
+        except asyncio.TimeoutError:
+            if process and process.returncode is None:
+                process.kill()
+                # reap killed process, not to leave zombies
+                await process.wait()
+            retcode = TonExec.RETCODE_TIMEOUT
+            out = f'Cmd: {params} (TIMEOUT {timeout})\n'
+        except Exception as e:
+            retcode = TonExec.RETCODE_ERROR
+            out = f'Cmd: {params} (FAILED TO RUN)\n'
+            out += str(e)
+        self._notify_execution(self._get_command_name(args), started, retcode)
+        log.debug(f"Code: {retcode}. Output: {out}")
+        return retcode, out
@@ -0,0 +1,120 @@
+"""
+AES-256 in CTR mode as used by ADNL. `cryptography` is used if installed,
+otherwise falls back to a table-driven pure Python implementation.
+"""
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: no cover
+    Cipher = None
+
+
+def _rotl8(x, shift):
+    return ((x << shift) | (x >> (8 - shift))) & 0xff
+
+
+def _build_tables():
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        # p * 3, q / 3 in GF(2^8), so q is always an inverse of p
+        p = (p ^ (p << 1) ^ (0x1b if p & 0x80 else 0)) & 0xff
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xff
+        if q & 0x80:
+            q ^= 0x09
+        sbox[p] = q ^ _rotl8(q, 1) ^ _rotl8(q, 2) ^ _rotl8(q, 3) ^ _rotl8(q, 4) ^ 0x63
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    t0, t1, t2, t3 = [], [], [], []
+    for s in sbox:
+        s2 = ((s << 1) ^ (0x1b if s & 0x80 else 0)) & 0xff
+        s3 = s2 ^ s
+        word = (s2 << 24) | (s << 16) | (s << 8) | s3
+        t0.append(word)
+        t1.append(((word >> 8) | (word << 24)) & 0xffffffff)
+        t2.append(((word >> 16) | (word << 16)) & 0xffffffff)
+        t3.append(((word >> 24) | (word << 8)) & 0xffffffff)
+    return sbox, t0, t1, t2, t3
+
+
+_SBOX, _T0, _T1, _T2, _T3 = _build_tables()
+
+
+def _sub_word(w):
+    return (_SBOX[w >> 24] << 24) | (_SBOX[(w >> 16) & 0xff] << 16) | (_SBOX[(w >> 8) & 0xff] << 8) | _SBOX[w & 0xff]
+
+
+def _expand_key(key: bytes) -> list:
+    nk = len(key) // 4
+    if nk not in (4, 6, 8):
+        raise ValueError("Invalid AES key size: {}".format(len(key)))
+    rounds = nk + 6
+    words = [int.from_bytes(key[i:i + 4], "big") for i in range(0, len(key), 4)]
+    rcon = 1
+    for i in range(nk, 4 * (rounds + 1)):
+        temp = words[i - 1]
+        if i % nk == 0:
+            temp = _sub_word(((temp << 8) | (temp >> 24)) & 0xffffffff) ^ (rcon << 24)
+            rcon = ((rcon << 1) ^ (0x1b if rcon & 0x80 else 0)) & 0xff
+        elif nk > 6 and i % nk == 4:
+            temp = _sub_word(temp)
+        words.append(words[i - nk] ^ temp)
+    return words
+
+
+def _encrypt_block(rk: list, block: int) -> int:
+    rounds = len(rk) // 4 - 1
+    s0 = (block >> 96) ^ rk[0]
+    s1 = ((block >> 64) & 0xffffffff) ^ rk[1]
+    s2 = ((block >> 32) & 0xffffffff) ^ rk[2]
+    s3 = (block & 0xffffffff) ^ rk[3]
+    t0_, t1_, t2_, t3_ = _T0, _T1, _T2, _T3
+    for r in range(1, rounds):
+        k = 4 * r
+        n0 = t0_[s0 >> 24] ^ t1_[(s1 >> 16) & 0xff] ^ t2_[(s2 >> 8) & 0xff] ^ t3_[s3 & 0xff] ^ rk[k]
+        n1 = t0_[s1 >> 24] ^ t1_[(s2 >> 16) & 0xff] ^ t2_[(s3 >> 8) & 0xff] ^ t3_[s0 & 0xff] ^ rk[k + 1]
+        n2 = t0_[s2 >> 24] ^ t1_[(s3 >> 16) & 0xff] ^ t2_[(s0 >> 8) & 0xff] ^ t3_[s1 & 0xff] ^ rk[k + 2]
+        n3 = t0_[s3 >> 24] ^ t1_[(s0 >> 16) & 0xff] ^ t2_[(s1 >> 8) & 0xff] ^ t3_[s2 & 0xff] ^ rk[k + 3]
+        s0, s1, s2, s3 = n0, n1, n2, n3
+    sb = _SBOX
+    k = 4 * rounds
+    out = 0
+    for i, (a, b, c, d) in enumerate(((s0, s1, s2, s3), (s1, s2, s3, s0), (s2, s3, s0, s1), (s3, s0, s1, s2))):
+        word = (sb[a >> 24] << 24) | (sb[(b >> 16) & 0xff] << 16) | (sb[(c >> 8) & 0xff] << 8) | sb[d & 0xff]
+        out = (out << 32) | (word ^ rk[k + i])
+    return out
+
+
+class AesCtr(object):
+    """
+    Stateful AES-CTR keystream (128 bit big-endian counter), encryption and decryption are the same operation
+    """
+
+    def __init__(self, key: bytes, iv: bytes):
+        if Cipher is not None:
+            self._cipher = Cipher(algorithms.AES(bytes(key)), modes.CTR(bytes(iv)),
+                                  backend=default_backend()).encryptor()
+            return
+        self._cipher = None
+        self._round_keys = _expand_key(bytes(key))
+        self._counter = int.from_bytes(iv, "big")
+        self._keystream = b""
+
+    def encrypt(self, data: bytes) -> bytes:
+        if self._cipher is not None:
+            return self._cipher.update(data)
+        need = len(data) - len(self._keystream)
+        if need > 0:
+            chunks = [self._keystream]
+            for _ in range((need + 15) // 16):
+                chunks.append(_encrypt_block(self._round_keys, self._counter).to_bytes(16, "big"))
+                self._counter = (self._counter + 1) & ((1 << 128) - 1)
+            self._keystream = b"".join(chunks)
+        stream, self._keystream = self._keystream[:len(data)], self._keystream[len(data):]
+        return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+    decrypt = encrypt
@@ -0,0 +1,174 @@
+"""
+Ed25519 primitives and signatures (RFC 8032), conversion of Ed25519 keys to X25519 (RFC 7748) for ECDH,
+as TON ADNL derives shared secrets from Ed25519 identity keys.
+`cryptography` is used for scalar multiplications if installed.
+"""
+import hashlib
+
+try:
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+except ImportError:  # pragma: no cover
+    Ed25519PrivateKey = None
+
+P = 2 ** 255 - 19
+L = 2 ** 252 + 27742317777372353535851937790883648493
+D = -121665 * pow(121666, P - 2, P) % P
+_SQRT_M1 = pow(2, (P - 1) // 4, P)
+
+
+def _recover_x(y: int, sign: int) -> int:
+    if y >= P:
+        raise ValueError("Invalid point encoding")
+    x2 = (y * y - 1) * pow(D * y * y + 1, P - 2, P)
+    if x2 == 0:
+        if sign:
+            raise ValueError("Invalid point encoding")
+        return 0
+    x = pow(x2, (P + 3) // 8, P)
+    if (x * x - x2) % P != 0:
+        x = x * _SQRT_M1 % P
+    if (x * x - x2) % P != 0:
+        raise ValueError("Invalid point encoding")
+    if (x & 1) != sign:
+        x = P - x
+    return x
+
+
+_BY = 4 * pow(5, P - 2, P) % P
+_BX = _recover_x(_BY, 0)
+# base point in extended coordinates (X, Y, Z, T)
+BASE = (_BX, _BY, 1, _BX * _BY % P)
+IDENTITY = (0, 1, 1, 0)
+
+
+def point_add(p1: tuple, p2: tuple) -> tuple:
+    a = (p1[1] - p1[0]) * (p2[1] - p2[0]) % P
+    b = (p1[1] + p1[0]) * (p2[1] + p2[0]) % P
+    c = 2 * p1[3] * p2[3] * D % P
+    d = 2 * p1[2] * p2[2] % P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return e * f % P, g * h % P, f * g % P, e * h % P
+
+
+def point_mul(scalar: int, point: tuple) -> tuple:
+    result = IDENTITY
+    while scalar > 0:
+        if scalar & 1:
+            result = point_add(result, point)
+        point = point_add(point, point)
+        scalar >>= 1
+    return result
+
+
+def point_equal(p1: tuple, p2: tuple) -> bool:
+    return (p1[0] * p2[2] - p2[0] * p1[2]) % P == 0 and (p1[1] * p2[2] - p2[1] * p1[2]) % P == 0
+
+
+def point_compress(point: tuple) -> bytes:
+    z_inv = pow(point[2], P - 2, P)
+    x = point[0] * z_inv % P
+    y = point[1] * z_inv % P
+    return int.to_bytes(y | ((x & 1) << 255), 32, "little")
+
+
+def point_decompress(data: bytes) -> tuple:
+    if len(data) != 32:
+        raise ValueError("Invalid point size: {}".format(len(data)))
+    y = int.from_bytes(data, "little")
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    x = _recover_x(y, sign)
+    return x, y, 1, x * y % P
+
+
+def expand_seed(seed: bytes) -> (int, bytes):
+    """
+    :return: Secret scalar and prefix (used for deterministic nonces) of the private key seed
+    """
+    digest = hashlib.sha512(bytes(seed)).digest()
+    scalar = int.from_bytes(digest[:32], "little")
+    scalar &= (1 << 254) - 8
+    scalar |= 1 << 254
+    return scalar, digest[32:]
+
+
+def public_key(seed: bytes) -> bytes:
+    if Ed25519PrivateKey is not None:
+        return Ed25519PrivateKey.from_private_bytes(bytes(seed)).public_key().public_bytes(Encoding.Raw,
+                                                                                           PublicFormat.Raw)
+    scalar, _ = expand_seed(seed)
+    return point_compress(point_mul(scalar, BASE))
+
+
+def to_x25519_public(ed_public: bytes) -> int:
+    """
+    Montgomery u coordinate of the Ed25519 public key: u = (1 + y) / (1 - y)
+    """
+    y = int.from_bytes(ed_public, "little") & ((1 << 255) - 1)
+    return (1 + y) * pow(1 - y, P - 2, P) % P
+
+
+def _x25519(scalar: int, u: int) -> int:
+    x1, x2, z2, x3, z3, swap = u, 1, 0, u, 1, 0
+    for t in reversed(range(255)):
+        bit = (scalar >> t) & 1
+        swap ^= bit
+        if swap:
+            x2, x3, z2, z3 = x3, x2, z3, z2
+        swap = bit
+        a, b = x2 + z2, x2 - z2
+        aa, bb = a * a % P, b * b % P
+        e = aa - bb
+        c, d = x3 + z3, x3 - z3
+        da, cb = d * a % P, c * b % P
+        x3 = (da + cb) ** 2 % P
+        z3 = x1 * (da - cb) ** 2 % P
+        x2 = aa * bb % P
+        z2 = e * (aa + 121665 * e) % P
+    if swap:
+        x2, z2 = x3, z3
+    return x2 * pow(z2, P - 2, P) % P
+
+
+def shared_secret(seed: bytes, peer_ed_public: bytes) -> bytes:
+    """
+    ECDH of own Ed25519 private key seed and peer's Ed25519 public key, both converted to X25519
+    """
+    scalar, _ = expand_seed(seed)
+    u = to_x25519_public(peer_ed_public)
+    if Ed25519PrivateKey is not None:
+        private = X25519PrivateKey.from_private_bytes(scalar.to_bytes(32, "little"))
+        return private.exchange(X25519PublicKey.from_public_bytes(u.to_bytes(32, "little")))
+    return _x25519(scalar, u).to_bytes(32, "little")
+
+
+def sign(seed: bytes, message: bytes) -> bytes:
+    """
+    :param seed: 32 bytes private key seed
+    :return: 64 bytes signature
+    """
+    if Ed25519PrivateKey is not None:
+        return Ed25519PrivateKey.from_private_bytes(bytes(seed)).sign(message)
+    scalar, prefix = expand_seed(seed)
+    public = point_compress(point_mul(scalar, BASE))
+    r = int.from_bytes(hashlib.sha512(prefix + message).digest(), "little") % L
+    r_point = point_compress(point_mul(r, BASE))
+    h = int.from_bytes(hashlib.sha512(r_point + public + message).digest(), "little") % L
+    return r_point + ((r + h * scalar) % L).to_bytes(32, "little")
+
+
+def verify(public: bytes, message: bytes, signature: bytes) -> bool:
+    if len(signature) != 64:
+        return False
+    try:
+        a_point = point_decompress(public)
+        r_point = point_decompress(signature[:32])
+    except ValueError:
+        return False
+    s = int.from_bytes(signature[32:], "little")
+    if s >= L:
+        return False
+    h = int.from_bytes(hashlib.sha512(signature[:32] + public + message).digest(), "little") % L
+    return point_equal(point_mul(s, BASE), point_add(r_point, point_mul(h, a_point)))
@@ -0,0 +1,98 @@
+"""
+Elector messages built in-process, with the cell layouts of recover-stake.fif,
+validator-elect-req.fif and validator-elect-signed.fif. Output has not been compared
+with the one of Fift scripts yet, so they are used only when opted in (--use_inprocess_payloads).
+"""
+import base64
+import time
+from fractions import Fraction
+from typing import Union
+
+from toncommon.boc import CellBuilder, serialize_boc
+
+RECOVER_STAKE_OP = 0x47657424
+NEW_STAKE_OP = 0x4e73744b
+ELECTION_REQ_MAGIC = 0x654c5074
+PUB_ED25519_MAGIC = 0xc6b41348
+
+
+def parse_max_factor(max_factor: Union[str, int, float]) -> int:
+    """
+    Max stake factor as 16.16 fixed point, rounded same as Fift does
+    """
+    value = Fraction(str(max_factor)) * 65536
+    factor = int(value + Fraction(1, 2))  # floor(x + 1/2)
+    if factor < 65536 or factor > 6553600:
+        raise ValueError("Max factor must be a real number 1..100: {}".format(max_factor))
+    return factor
+
+
+def parse_masterchain_address(address: str) -> int:
+    workchain, sep, account = address.partition(":")
+    if not sep:
+        raise ValueError("Invalid address: {}".format(address))
+    if int(workchain) != -1:
+        raise ValueError("Only masterchain smartcontracts may participate in validator elections: {}".format(address))
+    return int(account, 16)
+
+
+def _parse_key(value: Union[str, bytes], size: int) -> bytes:
+    """
+    :param value: Raw bytes, hex or base64 (as validator-engine-console prints it)
+    """
+    if isinstance(value, bytes):
+        data = value
+    elif len(value) == size * 2:
+        data = bytes.fromhex(value)
+    else:
+        padded = value + "=" * (-len(value) % 4)
+        data = base64.urlsafe_b64decode(padded) if "-" in value or "_" in value else base64.b64decode(padded)
+    if len(data) != size:
+        raise ValueError("Expected {} bytes, got {}".format(size, len(data)))
+    return data
+
+
+def recover_stake_request(query_id: int = None) -> bytes:
+    """
+    :return: BOC of recover stake message body
+    """
+    query_id = int(time.time()) if query_id is None else query_id
+    cell = CellBuilder().store_uint(RECOVER_STAKE_OP, 32).store_uint(query_id, 64).end_cell()
+    return serialize_boc(cell, with_crc32c=True)
+
+
+def validation_request(wallet_addr: str, election_start: int, max_factor, adnl_key: str) -> bytes:
+    """
+    :return: Data to be signed by validator election key
+    """
+    return ELECTION_REQ_MAGIC.to_bytes(4, "big") + \
+        int(election_start).to_bytes(4, "big") + \
+        parse_max_factor(max_factor).to_bytes(4, "big") + \
+        parse_masterchain_address(wallet_addr).to_bytes(32, "big") + \
+        _parse_key(adnl_key, 32)
+
+
+def validation_signed(wallet_addr: str, election_start: int, max_factor, adnl_key: str,
+                      public_key: Union[str, bytes], signature: Union[str, bytes], query_id: int = None) -> bytes:
+    """
+    :param public_key: Serialized pub.ed25519 key (36 bytes) or raw one (32 bytes)
+    :param signature: Signature of validation_request
+    :return: BOC of new stake message body
+    """
+    if isinstance(public_key, bytes) and len(public_key) == 32:
+        public_key = PUB_ED25519_MAGIC.to_bytes(4, "big") + public_key
+    public_key = _parse_key(public_key, 36)
+    if int.from_bytes(public_key[:4], "big") != PUB_ED25519_MAGIC:
+        raise ValueError("Invalid Ed25519 public key: unknown magic number")
+    query_id = int(time.time()) if query_id is None else query_id
+    signature_cell = CellBuilder().store_bytes(_parse_key(signature, 64)).end_cell()
+    cell = CellBuilder() \
+        .store_uint(NEW_STAKE_OP, 32) \
+        .store_uint(query_id, 64) \
+        .store_bytes(public_key[4:]) \
+        .store_uint(int(election_start), 32) \
+        .store_uint(parse_max_factor(max_factor), 32) \
+        .store_bytes(_parse_key(adnl_key, 32)) \
+        .store_ref(signature_cell) \
+        .end_cell()
+    return serialize_boc(cell, with_crc32c=True)
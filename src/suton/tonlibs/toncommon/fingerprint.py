@@ -0,0 +1,67 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+log = logging.getLogger("toncommon")
+
+
+def file_md5(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    MD5 of the file, read by chunks not to load big binaries into memory
+    """
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FingerprintCache(object):
+    """
+    Fingerprints (MD5) of the files, ex: tool binaries. File is hashed again only when its
+    path, size, modification time or inode change. Persisted to the file if path is given.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except Exception as ex:
+                log.warning(f"Failed to load fingerprints from {path}, starting empty: {ex}")
+
+    @staticmethod
+    def _stat_key(file_path: str) -> list:
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def _save(self):
+        if not self._path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self._path)
+        except Exception as ex:
+            log.warning(f"Failed to persist fingerprints to {self._path}: {ex}")
+
+    def get(self, file_path: str) -> str:
+        file_path = os.path.abspath(file_path)
+        stat_key = self._stat_key(file_path)
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry and entry["stat"] == stat_key:
+                return entry["md5"]
+        digest = file_md5(file_path)
+        with self._lock:
+            self._entries[file_path] = {"stat": stat_key, "md5": digest}
+            self._save()
+        return digest
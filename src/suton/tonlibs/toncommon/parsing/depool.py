@@ -0,0 +1,64 @@
+from typing import Iterable, Iterator, Optional
+
+from toncommon.models.depool.DePoolElectionEvent import DePoolElectionEvent
+from toncommon.models.depool.DePoolEvent import DePoolEvent
+from toncommon.models.depool.DePoolLowBalanceEvent import DePoolLowBalanceEvent
+
+EVENT_CLASSES = {
+    "TooLowDePoolBalance": DePoolLowBalanceEvent,
+    "StakeSigningRequested": DePoolElectionEvent
+}
+
+
+class DePoolEventParser(object):
+    """
+    Incremental parser of 'tonos-cli depool events' output, ex:
+        event 6ee7e4a4ae32d5cd0ec23d3c3e5ea3a1d1f12e7f9d9b2e0c2e1d0c9c8d3f4e5a
+        StakeSigningRequested 1613118553 (2021-02-12 08:29:13.000)
+        {"electionId":"0x6026430e","proxy":"-1:0a6a..."}
+
+    Lines are fed one by one, so output can be parsed while it's still being read.
+    """
+
+    def __init__(self):
+        self._event_id = None
+        self._event = None  # type: Optional[DePoolEvent]
+
+    def feed(self, line: str) -> Optional[DePoolEvent]:
+        """
+        :return: Event once it's fully parsed, None otherwise
+        """
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            # empty line indicates that next event is coming
+            self._event_id = None
+            self._event = None
+            return None
+        if line.startswith("event "):
+            self._event_id = line.split(" ")[1]
+            return None
+        if self._event_id and not self._event:
+            # new event started, but we don't know yet which one
+            event_name = line.split(" ", 1)[0]
+            self._event = EVENT_CLASSES.get(event_name, DePoolEvent)(self._event_id, event_name)
+            return None
+        if self._event and line.startswith("{"):
+            event = self._event
+            event.set_data(line)
+            # data line completes the event
+            self._event_id = None
+            self._event = None
+            return event
+        return None
+
+
+def parse_depool_events(lines: Iterable[str], max_events: int = None) -> Iterator[DePoolEvent]:
+    parser = DePoolEventParser()
+    parsed = 0
+    for line in lines:
+        event = parser.feed(line)
+        if event:
+            yield event
+            parsed += 1
+            if max_events is not None and parsed >= max_events:
+                return
@@ -0,0 +1,123 @@
+import json
+import re
+from typing import Optional, Dict, List, Union
+
+_JSON_DECODER = json.JSONDecoder()
+_RESULT_KEYWORD = "Result: "
+# lite-client 'runmethod' result, ex: 'result:  [ 1613118553 0 ]'
+_RUNMETHOD_RESULT_RE = re.compile(r"^result:\s+\[(.*)\]\s*$", flags=re.MULTILINE)
+# entries of lite-client 'participant_list' result, ex: '[12345 10000000000000]'
+_PARTICIPANT_RE = re.compile(r"\[\s*(-?\d+)\s+(-?\d+)\s*\]")
+# rust console prints missing values as empty ones, ex: '"timediff":   ,'
+_BROKEN_JSON_VALUE_RE = re.compile(r'^(\s*"[^"\n]+":)[ \t]+(,?)[ \t]*$', flags=re.MULTILINE)
+
+
+def parse_json_after(output: str, marker: str) -> Union[Optional[Dict], Optional[List]]:
+    """
+    Decode JSON value that follows given marker in the output, trailing text after the value is ignored
+    :return: Decoded value or None if marker not found
+    """
+    pos = output.find(marker)
+    if pos < 0:
+        return None
+    pos += len(marker)
+    # JSON decoder do not skip leading whitespaces
+    while pos < len(output) and output[pos].isspace():
+        pos += 1
+    value, _ = _JSON_DECODER.raw_decode(output, pos)
+    return value
+
+
+def parse_result_json(output: str) -> Union[Optional[Dict], Optional[List]]:
+    """
+    tonos-cli 'Result: {...}' block
+    """
+    return parse_json_after(output, _RESULT_KEYWORD)
+
+
+def parse_key_values(output: str, start_marker: str = None, stop_marker: str = None) -> Dict[str, str]:
+    """
+    Parse 'key: value' lines, ex tonos-cli 'account' output
+    :param start_marker: Only lines after the line containing this marker are taken
+    :param stop_marker: Raise ValueError if line containing this marker met
+    """
+    data = {}
+    started = start_marker is None
+    for line in output.splitlines():
+        if not started:
+            started = start_marker in line
+            continue
+        if stop_marker and stop_marker in line:
+            raise ValueError(line.strip())
+        key, sep, value = line.partition(":")
+        if sep:
+            data[key.strip()] = value.strip()
+    return data
+
+
+def parse_console_json(output: str) -> Optional[dict]:
+    """
+    JSON block printed by Rust console, which might have missing values, ex:
+        GIT_BRANCH: master
+        {
+            "masterchainblocktime": 1613118553,
+            "sync_status":  ,
+            "timediff":     54033
+        }
+    Missing values are replaced with nulls.
+    """
+    pos = output.find("\n{")
+    if pos < 0:
+        if not output.startswith("{"):
+            return None
+    else:
+        pos += 1
+    payload = _BROKEN_JSON_VALUE_RE.sub(r"\1 null\2", output[max(pos, 0):])
+    value, _ = _JSON_DECODER.raw_decode(payload)
+    return value
+
+
+def parse_json_array(output: str) -> Optional[List]:
+    """
+    JSON array printed on its own lines after other output, ex tonos-cli 'query-raw' result:
+        Config: /opt/cwds/tonos/tonos-cli.conf.json
+        [
+          {
+            "seq_no": 12345
+          }
+        ]
+    :return: Decoded array or None if there is no array in the output
+    """
+    pos = output.find("\n[")
+    if pos < 0:
+        if not output.startswith("["):
+            return None
+        pos = 0
+    else:
+        pos += 1
+    value, _ = _JSON_DECODER.raw_decode(output, pos)
+    return value
+
+
+def parse_runmethod_result(output: str) -> Optional[List[str]]:
+    """
+    Values of lite-client 'runmethod' result, ex: 'result:  [ 1613118553 0 ]' -> ['1613118553', '0']
+    :return: List of raw values or None if there is no result in the output
+    """
+    m = _RUNMETHOD_RESULT_RE.search(output)
+    if not m:
+        return None
+    return m.group(1).replace(",", " ").split()
+
+
+def parse_participant_list(output: str) -> List[List[int]]:
+    """
+    Entries of lite-client 'runmethodfull <elector> participant_list' result, ex:
+        result:  [ ([12345 10000000000000] [67890 20000000000000]) ]
+    :return: List of [address, stake] pairs
+    """
+    m = _RUNMETHOD_RESULT_RE.search(output)
+    if not m:
+        return []
+    return [[int(addr), int(stake)] for addr, stake in _PARTICIPANT_RE.findall(m.group(1))]
+
@@ -0,0 +1,86 @@
+import re
+from typing import Optional
+
+# '(' / ')' or any run of non-space non-bracket chars, ex: 'min_stake:', 'len:6', 'var_uint'
+_TOKEN_RE = re.compile(r"[()]|[^\s()]+")
+_CONFIG_PARAM_RE_CACHE = {}
+
+TYPE_KEY = "@type"
+ARGS_KEY = "@args"
+
+
+def _config_param_re(index: int):
+    pattern = _CONFIG_PARAM_RE_CACHE.get(index)
+    if pattern is None:
+        pattern = re.compile(r"ConfigParam\(" + str(index) + r"\)\s*=\s*")
+        _CONFIG_PARAM_RE_CACHE[index] = pattern
+    return pattern
+
+
+def parse_tlb_value(text: str, pos: int = 0) -> (Optional[dict], int):
+    """
+    Single-pass parser of TL-B pretty-printed value (as lite-client prints it), ex:
+        ( min_stake:(nanograms amount:(var_uint len:6 value:10000000000000)) max_stake_factor:196608)
+    into nested dicts:
+        {"min_stake": {"@type": "nanograms", "amount": {"@type": "var_uint", "len": "6", "value": "10000000000000"}},
+         "max_stake_factor": "196608"}
+    Leading bare token of the group is a constructor name and stored under '@type',
+    other bare tokens are collected into '@args'.
+    :param text: Text to parse
+    :param pos: Position in the text where the opening bracket is (or preceded by whitespaces)
+    :return: parsed value and position right after its closing bracket
+    """
+    stack = []
+    current = None
+    pending_key = None
+    for m in _TOKEN_RE.finditer(text, pos):
+        token = m.group(0)
+        if token == "(":
+            group = {}
+            if current is not None:
+                if pending_key is not None:
+                    current[pending_key] = group
+                    pending_key = None
+                else:
+                    current.setdefault(ARGS_KEY, []).append(group)
+                stack.append(current)
+            elif stack or pending_key is not None:
+                raise ValueError(f"Malformed TL-B value at {m.start()}")
+            current = group
+            continue
+        if current is None:
+            # value should start with the bracket
+            return None, m.start()
+        if token == ")":
+            if not stack:
+                return current, m.end()
+            current = stack.pop()
+            continue
+        if pending_key is not None:
+            # 'key:' followed by a space and then a plain value
+            current[pending_key] = token
+            pending_key = None
+            continue
+        key, sep, value = token.partition(":")
+        if sep:
+            if value:
+                current[key] = value
+            else:
+                pending_key = key
+        elif not current:
+            current[TYPE_KEY] = token
+        else:
+            current.setdefault(ARGS_KEY, []).append(token)
+    return None, len(text)
+
+
+def parse_config_param(output: str, index: int) -> Optional[dict]:
+    """
+    Parse 'ConfigParam(<index>) = ( ... )' block from lite-client 'getconfig' output
+    :return: Parsed param or None if not present in the output
+    """
+    m = _config_param_re(index).search(output)
+    if not m:
+        return None
+    value, _ = parse_tlb_value(output, m.end())
+    return value
@@ -0,0 +1,109 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+log = logging.getLogger("toncommon")
+
+
+class ExecutionPolicy(object):
+    """
+    Timeouts and retries of the tool invocations.
+    Only idempotent reads are retried, state changing calls (ex: submitting transactions) never are.
+    Policy applies to one-shot, async and session calls alike. Streamed calls (TonExec._execute_stream) are
+    the exception: they go through the circuit, but are not retried, as their output is consumed already.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, command_timeouts: Dict[str, float] = None,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8,
+                 failure_threshold: int = 5, reset_timeout: float = 60):
+        """
+        :param timeout: Default timeout of the tool invocation, no timeout if None
+        :param command_timeouts: Timeouts of particular commands (ex: {"call": 180})
+        :param max_retries: Max retries of read commands
+        :param backoff_base: Delay before the first retry, doubled with each next one
+        :param backoff_max: Max delay between retries
+        :param failure_threshold: Consecutive failures opening circuit of the tool
+        :param reset_timeout: Time circuit stays open before letting trial call through
+        """
+        self.timeout = timeout
+        self.command_timeouts = command_timeouts or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def timeout_for(self, command: str) -> Optional[float]:
+        return self.command_timeouts.get(command, self.timeout)
+
+    def attempts_for(self, command: str, read_commands: Iterable[str]) -> int:
+        return 1 + self.max_retries if command in read_commands else 1
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Fails calls fast once tool failed several times in a row. After reset timeout single trial call
+    is let through (half-open), its result closes circuit or opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # callables (name, state) notified on state changes
+    _listeners = []  # type: List[Callable[[str, str], None]]
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def add_listener(listener: Callable[[str, str], None]):
+        CircuitBreaker._listeners.append(listener)
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        log.warning("Circuit of {} is {}".format(self.name, state))
+        for listener in CircuitBreaker._listeners:
+            try:
+                listener(self.name, state)
+            except Exception as ex:
+                log.warning("Circuit listener failed: {}".format(ex))
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+            if self.state == CircuitBreaker.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(CircuitBreaker.HALF_OPEN)
+            if self.state == CircuitBreaker.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial_running = False
+            if ok:
+                self._failures = 0
+                self._set_state(CircuitBreaker.CLOSED)
+                return
+            self._failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(CircuitBreaker.OPEN)
@@ -1,8 +1,91 @@
+import json
 from enum import Enum
-from typing import List
+from typing import Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# values of these types are put to json as they are
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None), dict))
+_MISSING = object()
+# kept out of the classes, so they don't show up as serialized fields
+_schemas = {}  # type: Dict[type, _ClassSchema]
+_class_maps = {}  # type: Dict[tuple, Dict[str, type]]
+
+
+def dumps(data) -> str:
+    """
+    json.dumps, done by orjson if it is installed
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode()
+        except TypeError:
+            # ex: int over 64 bits or non-str dict keys, not supported by orjson
+            pass
+    return json.dumps(data)
+
+
+def loads(data: str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _ClassSchema(object):
+    """
+    Serialized fields of JsonAware class, compiled once per class instead of inspecting instance on every call
+    """
+    __slots__ = ("class_fields", "slots", "ctor_args", "enum_fields", "_layouts")
+
+    def __init__(self, cls):
+        # class attributes, properties and slots, same as dir() of the instance gives
+        self.class_fields = frozenset(attr for attr in dir(cls)
+                                      if not attr.startswith("__") and not callable(getattr(cls, attr)))
+        slots = set()
+        for base in cls.__mro__:
+            base_slots = base.__dict__.get("__slots__", ())
+            slots.update((base_slots,) if isinstance(base_slots, str) else base_slots)
+        self.slots = frozenset(slots)
+        code = cls.__init__.__code__ if hasattr(cls.__init__, "__code__") else None
+        self.ctor_args = frozenset(code.co_varnames[1:code.co_argcount]) if code else frozenset()
+        # fields typed as Enum, converted from their serialized values
+        self.enum_fields = {}  # type: Dict[str, type]
+        annotations = [getattr(cls.__init__, "__annotations__", {})]
+        annotations.extend(getattr(base, "__annotations__", {}) for base in cls.__mro__)
+        for hints in annotations:
+            for name, hint in hints.items():
+                if isinstance(hint, type) and issubclass(hint, Enum):
+                    self.enum_fields.setdefault(name, hint)
+        # field names by the set of instance attributes
+        self._layouts = {}  # type: Dict[Tuple[str, ...], Tuple[str, ...]]
+
+    def fields(self, instance) -> Tuple[str, ...]:
+        instance_fields = tuple(getattr(instance, "__dict__", ()))
+        layout = self._layouts.get(instance_fields)
+        if layout is None:
+            layout = self._layouts[instance_fields] = tuple(sorted(
+                self.class_fields.union(attr for attr in instance_fields if not attr.startswith("__"))))
+        return layout
+
+
+def _encode(value):
+    if type(value) in _PLAIN_TYPES:
+        return value
+    if isinstance(value, JsonAware):
+        return value.to_json()
+    if isinstance(value, list):
+        return [item.to_json() if isinstance(item, JsonAware) else item for item in value]
+    if isinstance(value, Enum):
+        return str(value)
+    return value
 
 
 class JsonAware(object):
+    # subclasses may define __slots__ too
+    __slots__ = ()
 
     DESERIALIZE_VIA_CONSTRUCTOR = False
 
@@ -13,53 +96,57 @@ class JsonAware(object):
     def get_class_code_name(cls) -> str:
         return cls.__qualname__
 
+    @classmethod
+    def _get_schema(cls) -> _ClassSchema:
+        schema = _schemas.get(cls)
+        if schema is None:
+            schema = _schemas[cls] = _ClassSchema(cls)
+        return schema
+
     @classmethod
     def create(cls, data: dict):
+        schema = cls._get_schema()
         if cls.DESERIALIZE_VIA_CONSTRUCTOR:
             init_data = {}
-            constructor_args = cls.__init__.__code__.co_varnames[:cls.__init__.__code__.co_argcount]
-            for prop in data.keys():
-                if prop in constructor_args:
-                    init_data[prop] = data[prop]
+            for prop, val in data.items():
+                if prop in schema.ctor_args:
+                    enum_class = schema.enum_fields.get(prop)
+                    init_data[prop] = enum_class(val) if enum_class and val is not None else val
             instance = cls(**init_data)
         else:
             instance = cls()
             for item, val in data.items():
-                try:
-                    default_val = getattr(instance, item)
-                except AttributeError:
+                default_val = getattr(instance, item, _MISSING)
+                if default_val is _MISSING and item not in schema.slots:
                     continue
                 if isinstance(default_val, Enum):
                     val = default_val.__class__(val)
-                setattr(instance, item, val)
+                elif item in schema.enum_fields and val is not None:
+                    val = schema.enum_fields[item](val)
+                try:
+                    setattr(instance, item, val)
+                except AttributeError:
+                    # class constant of __slots__ model
+                    continue
         return instance
 
     def to_json(self):
         result = {
             "__class": self.get_class_code_name()
         }
-        for attr in dir(self):
-            value = getattr(self, attr)
-            if not attr.startswith("__") and not callable(value):
-                if isinstance(value, JsonAware):
-                    result[attr] = value.to_json()
-                elif isinstance(value, list):
-                    result[attr] = []
-                    for item in value:
-                        if isinstance(item, JsonAware):
-                            item = item.to_json()
-                        result[attr].append(item)
-                elif isinstance(value, Enum):
-                    result[attr] = str(value)
-                else:
-                    result[attr] = value
+        for attr in self._get_schema().fields(self):
+            value = getattr(self, attr, _MISSING)
+            if value is _MISSING or callable(value):
+                continue
+            result[attr] = _encode(value)
         return result
 
     @staticmethod
     def from_json(data: dict, classes: List['JsonAware'] = None):
-        class_map = {}
-        for clazz in classes:
-            class_map[clazz.get_class_code_name()] = clazz
+        classes = tuple(classes or ())
+        class_map = _class_maps.get(classes)
+        if class_map is None:
+            class_map = _class_maps[classes] = {clazz.get_class_code_name(): clazz for clazz in classes}
         return JsonAware._from_json(data, class_map)
 
     @staticmethod
@@ -69,11 +156,9 @@ class JsonAware(object):
             if isinstance(value, dict) and value.get("__class"):
                 data_container[item] = JsonAware._from_json(value, class_map)
             elif isinstance(value, list):
-                data_container[item] = []
-                for list_val in value:
-                    if isinstance(list_val, dict) and list_val.get("__class"):
-                        list_val = JsonAware._from_json(list_val, class_map)
-                    data_container[item].append(list_val)
+                data_container[item] = [JsonAware._from_json(list_val, class_map)
+                                        if isinstance(list_val, dict) and list_val.get("__class") else list_val
+                                        for list_val in value]
             elif item != "__class":
                 data_container[item] = value
         _class_path = data.get("__class")
@@ -0,0 +1,181 @@
+import logging
+import subprocess
+import threading
+import uuid
+from queue import Queue, Empty
+from typing import List, Optional
+
+log = logging.getLogger("toncommon")
+
+
+class TonExecSession(object):
+    """
+    Long-living interactive process of a TON utility (lite-client, validator-engine-console).
+    Commands are written into stdin of the child, response is read from stdout until the frame marker is met.
+    Marker is an unknown (for utility) command containing unique token, utility reports it back as an error,
+    so it's known when output of the previous commands has ended.
+    Utilities printing some responses asynchronously (lite-client) may report the marker before them,
+    such late output is awaited for a while after the marker, what comes even later is dropped
+    before the next frame, so it never gets into the response of another command.
+    Child is re-spawned if it dies.
+    """
+
+    def __init__(self, exec_path: str, args: list, cwd: str = None,
+                 startup_timeout: int = 30, keep_preamble: bool = False, late_output_timeout: float = 0):
+        """
+        :param exec_path: Path to the utility
+        :param args: Arguments to start utility in interactive mode with
+        :param cwd: Working directory of the utility
+        :param startup_timeout: How long to wait (in seconds) for utility to get ready
+        :param keep_preamble: Prepend output printed by utility on start (ex: 'conn ready') to every response,
+            so parsers written for one-shot invocations keep working as is.
+        :param late_output_timeout: How long to keep reading output printed after the marker (in seconds),
+            frame ends once utility prints nothing for that long
+        """
+        self._exec_path = exec_path
+        self._args = [str(arg) for arg in args]
+        self._cwd = cwd
+        self._startup_timeout = startup_timeout
+        self._keep_preamble = keep_preamble
+        self._late_output_timeout = late_output_timeout
+        self._preamble = ""
+        self._process = None  # type: Optional[subprocess.Popen]
+        self._lines = None  # type: Optional[Queue]
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _read_stdout(self, process: subprocess.Popen, lines: Queue):
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        except Exception as ex:
+            log.debug(f"Session reader stopped: {ex}")
+        finally:
+            # EOF, child is gone
+            lines.put(None)
+
+    def _spawn(self):
+        self._kill()
+        params = [self._exec_path] + self._args
+        log.info(f"Starting session: {params}")
+        self._process = subprocess.Popen(params, cwd=self._cwd,
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT,
+                                         text=True, bufsize=1)
+        self._lines = Queue()
+        threading.Thread(target=self._read_stdout, args=(self._process, self._lines), daemon=True).start()
+        # wait until utility is ready to accept commands, everything printed before is a preamble
+        ret, out = self._exchange([], timeout=self._startup_timeout, startup=True)
+        if ret != 0:
+            self._kill()
+            raise Exception(f"Failed to start session for {self._exec_path}: {out}")
+        self._preamble = out
+
+    def _kill(self, graceful=True):
+        """
+        :param graceful: Ask utility to quit before killing it
+        """
+        if self._process is None:
+            return
+        process = self._process
+        self._process = None
+        try:
+            if graceful and process.poll() is None:
+                try:
+                    process.stdin.write("quit\n")
+                    process.stdin.flush()
+                    process.wait(timeout=2)
+                except Exception:
+                    pass
+            if process.poll() is None:
+                process.kill()
+                process.wait(timeout=5)
+        except Exception as ex:
+            log.warning(f"Failed to stop session process: {ex}")
+
+    def _drop_stale_output(self):
+        """
+        Drop output printed after the previous frame has ended
+        """
+        stale = []
+        while True:
+            try:
+                line = self._lines.get_nowait()
+            except Empty:
+                break
+            if line is None:
+                # child is gone, let the exchange find it out
+                self._lines.put(None)
+                break
+            stale.append(line)
+        if stale:
+            log.warning(f"Dropped late output of {self._exec_path} session: {''.join(stale).strip()}")
+
+    def _read_late_output(self, out_lines: List[str]):
+        while True:
+            try:
+                line = self._lines.get(timeout=self._late_output_timeout)
+            except Empty:
+                return
+            if line is None:
+                self._lines.put(None)
+                return
+            out_lines.append(line)
+
+    def _exchange(self, commands: List[str], timeout=None, startup=False) -> (int, str):
+        """
+        :param startup: Output already printed is the preamble of the utility, not the stale one
+        """
+        marker = f"__suton_frame_{uuid.uuid4().hex}"
+        if not startup:
+            self._drop_stale_output()
+        try:
+            for command in commands:
+                self._process.stdin.write(f"{command}\n")
+            self._process.stdin.write(f"{marker}\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as ex:
+            self._kill()
+            return -1, f"Cmd: {commands} (session died)\n{ex}"
+        out_lines = []
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except Empty:
+                # state of the child is unknown, start from scratch next time
+                self._kill(graceful=False)
+                return 2, "Cmd: {} (TIMEOUT {})\n{}".format(commands, timeout, "".join(out_lines))
+            if line is None:
+                try:
+                    retcode = self._process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    retcode = None
+                self._kill()
+                return retcode or -1, "Cmd: {} (session died)\n{}".format(commands, "".join(out_lines))
+            if marker in line:
+                if self._late_output_timeout:
+                    self._read_late_output(out_lines)
+                return 0, "".join(out_lines).strip()
+            out_lines.append(line)
+
+    def execute(self, commands: List[str], timeout=None) -> (int, str):
+        """
+        :param commands: Commands to run one after another
+        :param timeout: Max time to wait for a single line of output
+        :return: return value and output of the commands
+        """
+        with self._lock:
+            if not self.alive:
+                self._spawn()
+            ret, out = self._exchange(commands, timeout=timeout)
+            if ret == 0 and self._keep_preamble:
+                out = f"{self._preamble}\n{out}"
+            return ret, out
+
+    def close(self):
+        with self._lock:
+            self._kill()
@@ -33,15 +33,16 @@ class FiftCli(TonExec):
         return out
 
     def generate_boc(self, fif_filename, args: list = None) -> (str, str):
-        temp_path = os.path.join(tempfile.mkdtemp(), 'query.boc')
-        cmds = ['-s', fif_filename]
-        if args:
-            cmds += args
-        out = self._run_command(cmds + [temp_path])
-        if not os.path.exists(temp_path):
-            raise Exception("Failed to generate boc file: {}".format(out))
-        with open(temp_path, "rb") as f:
-            return base64.b64encode(f.read()).decode(), out
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, 'query.boc')
+            cmds = ['-s', fif_filename]
+            if args:
+                cmds += args
+            out = self._run_command(cmds + [temp_path])
+            if not os.path.exists(temp_path):
+                raise Exception("Failed to generate boc file: {}".format(out))
+            with open(temp_path, "rb") as f:
+                return base64.b64encode(f.read()).decode(), out
 
     def generate_recover_stake_req(self) -> str:
         boc64, _ = self.generate_boc('recover-stake.fif')
@@ -1,9 +1,11 @@
-import json
+import asyncio
+import functools
 import logging
-import re
-from typing import List, Dict, Optional
+from typing import List, Optional
 
+from toncommon.configcache import ConfigCache
 from toncommon.core import TonExec
+from toncommon.parsing import tlb, results
 from toncommon.models.TonAddress import TonAddress
 from tonliteclient.exceptions.base import TonLiteClientException
 from toncommon.models.ElectionParams import ElectionParams, StakeParams, ElectionValidatorParams
@@ -15,11 +17,29 @@ class TonLiteClient(TonExec):
     """
     Python wrapper for ton-client CLI
     """
+    READ_COMMANDS = ('getconfig', 'runmethod', 'runmethodfull', 'getaccount', 'last')
+    # lite-client may print answers of the queries after it has already processed the next command
+    SESSION_LATE_OUTPUT_TIMEOUT = 0.5
     
-    def __init__(self, client_path, server_addr, client_pub_key):
+    def __init__(self, client_path, server_addr, client_pub_key, use_session=False,
+                 config_cache: ConfigCache = None):
+        """
+        :param use_session: Keep single lite-client process connected to the liteserver and send all commands to it
+        :param config_cache: Cache to read config params through
+        """
         super().__init__(client_path)
         self._server_addr = server_addr
         self._client_pub_key = client_pub_key
+        self._config_cache = config_cache
+        if use_session:
+            self._open_session(['-a', self._server_addr,
+                                '-p', self._client_pub_key, '-v0'],
+                               late_output_timeout=self.SESSION_LATE_OUTPUT_TIMEOUT)
+
+    def _get_command_args(self, command):
+        return ['-a', self._server_addr,
+                '-p', self._client_pub_key,
+                '-rc', command, '-rc', 'quit', '-v0']
 
     def _run_command(self, command, timeout=60):
         """Ex:
@@ -28,64 +48,89 @@ class TonLiteClient(TonExec):
         -a 127.0.0.1:3031 \
         -rc "getconfig 1" -rc "quit"
         """
-        args = ['-a', self._server_addr,
-                '-p', self._client_pub_key,
-                '-rc', command, '-rc', 'quit', '-v0']
+        if self._session:
+            ret, out = self._execute_in_session([command], timeout=timeout)
+            if ret != 0:
+                raise TonLiteClientException("Failed to run command {}: {}".format(command, out))
+            return out
+        args = self._get_command_args(command)
         log.debug("Running: {} {}".format(self._exec_path, args))
         ret, out = self._execute(args, timeout=timeout)
         if ret != 0:
             raise TonLiteClientException("Failed to run command {}: {}".format(command, out))
         return out
 
-    def _parse_config_tokens(self, data: str) -> Dict[str, str]:
-        tokens = re.split(r"\t|\s", data)
-        data = {}
-        for token in tokens:
-            if token.strip():
-                name_val = token.split(":")
-                data[name_val[0].strip()] = name_val[1].strip()
-        return data
+    async def _run_command_async(self, command, timeout=60):
+        if self._session:
+            # session serves commands one by one anyway
+            return await asyncio.get_event_loop().run_in_executor(None, functools.partial(
+                self._run_command, command, timeout=timeout))
+        args = self._get_command_args(command)
+        log.debug("Running async: {} {}".format(self._exec_path, args))
+        ret, out = await self._execute_async(args, timeout=timeout)
+        if ret != 0:
+            raise TonLiteClientException("Failed to run command {}: {}".format(command, out))
+        return out
+
+    def _get_config_param(self, index: int, timeout=60) -> Optional[dict]:
+        """
+        Parsed config param, only parsed params are cached, so unexpected output is not kept
+        """
+        def load():
+            return tlb.parse_config_param(self._run_command(f"getconfig {index}", timeout=timeout), index)
+        if self._config_cache:
+            return self._config_cache.get_or_load(index, load, namespace="lite-client-param")
+        return load()
 
-    def get_elector_address(self) -> Optional[str]:
-        out = self._run_command("getconfig 1", timeout=10)
-        # get address from the output
-        pattern = re.compile(r".+elector_addr:x(.+)\)$")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                return TonAddress.set_address_prefix(m.group(1).strip(), TonAddress.Type.MASTER_CHAIN)
+    async def _get_config_param_async(self, index: int, timeout=60) -> Optional[dict]:
+        async def load():
+            return tlb.parse_config_param(await self._run_command_async(f"getconfig {index}", timeout=timeout), index)
+        if self._config_cache:
+            return await self._config_cache.get_or_load_async(index, load, namespace="lite-client-param")
+        return await load()
+
+    def _parse_elector_address(self, data: Optional[dict]) -> Optional[str]:
+        # ConfigParam(1) = ( elector_addr:x3333333333333333333333333333333333333333333333333333333333333333)
+        if data and data.get("elector_addr"):
+            return TonAddress.set_address_prefix(data["elector_addr"][1:], TonAddress.Type.MASTER_CHAIN)
         return None
 
-    def get_election_validator_params(self) -> (ElectionValidatorParams, None):
+    def get_elector_address(self) -> Optional[str]:
+        return self._parse_elector_address(self._get_config_param(1, timeout=10))
+
+    async def get_elector_address_async(self) -> Optional[str]:
+        return self._parse_elector_address(await self._get_config_param_async(1, timeout=10))
+
+    def _parse_election_validator_params(self, data: Optional[dict]) -> (ElectionValidatorParams, None):
         # ConfigParam(16) = ( max_validators:1000 max_main_validators:100 min_validators:13)
-        out = self._run_command("getconfig 16", timeout=10)
-        pattern = re.compile(r"ConfigParam\(16\)\s+=\s+\((.+)\)")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                data = self._parse_config_tokens(m.group(1))
-                params = ElectionValidatorParams(max_validators=int(data.get("max_validators", 0)),
-                                                 max_main_validators=int(data.get("max_main_validators", 0)),
-                                                 min_validators=int(data.get("min_validators", 0)))
-                return params
+        if data:
+            return ElectionValidatorParams(max_validators=int(data.get("max_validators", 0)),
+                                           max_main_validators=int(data.get("max_main_validators", 0)),
+                                           min_validators=int(data.get("min_validators", 0)))
         return None
 
-    def get_elector_params(self) -> (ElectionParams, None):
+    def get_election_validator_params(self) -> (ElectionValidatorParams, None):
+        return self._parse_election_validator_params(self._get_config_param(16, timeout=10))
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return self._parse_election_validator_params(await self._get_config_param_async(16, timeout=10))
+
+    def _parse_elector_params(self, data: Optional[dict]) -> (ElectionParams, None):
         # ConfigParam(15) = ( validators_elected_for:65536 elections_start_before:32768 elections_end_before:8192 stake_held_for:32768)
-        out = self._run_command("getconfig 15", timeout=10)
-        pattern = re.compile(r"ConfigParam\(15\)\s+=\s+\((.+)\)")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                data = self._parse_config_tokens(m.group(1))
-                params = ElectionParams(validators_elected_for=int(data.get("validators_elected_for", 0)),
-                                        elections_start_before=int(data.get("elections_start_before", 0)),
-                                        elections_end_before=int(data.get("elections_end_before", 0)),
-                                        stake_held_for=int(data.get("stake_held_for", 0)))
-                return params
+        if data:
+            return ElectionParams(validators_elected_for=int(data.get("validators_elected_for", 0)),
+                                  elections_start_before=int(data.get("elections_start_before", 0)),
+                                  elections_end_before=int(data.get("elections_end_before", 0)),
+                                  stake_held_for=int(data.get("stake_held_for", 0)))
         return None
 
-    def get_stake_params(self):
+    def get_elector_params(self) -> (ElectionParams, None):
+        return self._parse_elector_params(self._get_config_param(15, timeout=10))
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return self._parse_elector_params(await self._get_config_param_async(15, timeout=10))
+
+    def _parse_stake_params(self, data: Optional[dict]) -> Optional[StakeParams]:
         """
         ConfigParam(17) = (
         min_stake:(nanograms
@@ -95,44 +140,47 @@ class TonLiteClient(TonExec):
         min_total_stake:(nanograms
             amount:(var_uint len:6 value:100000000000000)) max_stake_factor:196608)
         """
-        out = self._run_command("getconfig 17")
-        pattern = re.compile(".+min_stake.+?value:(\d+).+max_stake:.+?value:(\d+).+min_total_stake:.+value:(\d+)",
-                             flags=re.DOTALL)
-        m = pattern.match(out)
-        if m:
-            return StakeParams(min_stake=int(m.group(1)), max_stake=int(m.group(2)))
+        if data and "min_stake" in data and "max_stake" in data:
+            return StakeParams(min_stake=int(data["min_stake"]["amount"]["value"]),
+                               max_stake=int(data["max_stake"]["amount"]["value"]))
         return None
 
+    def get_stake_params(self):
+        return self._parse_stake_params(self._get_config_param(17))
+
+    async def get_stake_params_async(self):
+        return self._parse_stake_params(await self._get_config_param_async(17))
+
+    def _parse_election_ids(self, out: str) -> [str]:
+        # result:  [ 1613118553 ]
+        values = results.parse_runmethod_result(out)
+        return [eid for eid in values if eid != "0"] if values else []
+
     def get_election_ids(self, elector_addr: str) -> [str]:
         elector_addr = TonAddress.set_address_prefix(elector_addr, TonAddress.Type.MASTER_CHAIN)
-        out = self._run_command("runmethod {} active_election_id".format(elector_addr))
-        pattern = re.compile(r"result:\s+\[(.+)\]")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                ids = m.group(1).strip().split(",")
-                return [eid.strip() for eid in ids if eid.strip() != "0"]
-        return []
+        return self._parse_election_ids(self._run_command("runmethod {} active_election_id".format(elector_addr)))
+
+    async def get_election_ids_async(self, elector_addr: str) -> [str]:
+        elector_addr = TonAddress.set_address_prefix(elector_addr, TonAddress.Type.MASTER_CHAIN)
+        return self._parse_election_ids(
+            await self._run_command_async("runmethod {} active_election_id".format(elector_addr)))
+
+    def _parse_participant_stakes(self, out: str) -> List[int]:
+        return [p_info[1] for p_info in results.parse_participant_list(out)]
 
     def get_current_participant_stakes(self, elector_addr: str) -> List[int]:
         elector_addr = TonAddress.set_address_prefix(elector_addr, TonAddress.Type.MASTER_CHAIN)
-        out = self._run_command("runmethodfull {} participant_list".format(elector_addr))
-        pattern = re.compile(r"result:\s+\[\s*\((.+)\)\s*\]")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                participant_info = json.loads(f"[{m.group(1).replace(' ', ',')}]")
-                return [p_info[1] for p_info in participant_info]
-        return []
+        return self._parse_participant_stakes(
+            self._run_command("runmethodfull {} participant_list".format(elector_addr)))
+
+    async def get_current_participant_stakes_async(self, elector_addr: str) -> List[int]:
+        elector_addr = TonAddress.set_address_prefix(elector_addr, TonAddress.Type.MASTER_CHAIN)
+        return self._parse_participant_stakes(
+            await self._run_command_async("runmethodfull {} participant_list".format(elector_addr)))
 
     def compute_returned_stakes(self, elector_addr, validator_addr) -> [int]:
         elector_addr = TonAddress.set_address_prefix(elector_addr, TonAddress.Type.MASTER_CHAIN)
         validator_addr = TonAddress.set_address_prefix(validator_addr, TonAddress.Type.HEX)
         out = self._run_command("runmethod {} compute_returned_stake {}".format(elector_addr, validator_addr))
-        pattern = re.compile(r"result:\s+\[(.+)\]")
-        for line in out.splitlines():
-            m = pattern.match(line)
-            if m:
-                retvals = m.group(1).strip().split(",")
-                return [int(val.strip()) for val in retvals if val.strip() != "0"]
-        return []
+        values = results.parse_runmethod_result(out)
+        return [int(val) for val in values if val != "0"] if values else []
@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Optional
+
+from toncommon.crypto import ed25519
+from toncommon.crypto.aes import AesCtr
+from tonliteserver import tl
+from tonliteserver.exceptions.base import TonLiteServerException
+
+log = logging.getLogger("tonliteserver")
+
+HANDSHAKE_SIZE = 256
+
+
+def key_id(public_key: bytes) -> bytes:
+    """
+    ADNL short id of the key: sha256 of TL-serialized pub.ed25519
+    """
+    return hashlib.sha256(tl.constructor("pub.ed25519") + public_key).digest()
+
+
+def handshake_cipher(shared: bytes, checksum: bytes) -> AesCtr:
+    return AesCtr(shared[0:16] + checksum[16:32], checksum[0:4] + shared[20:32])
+
+
+def read_public_key(path: str) -> bytes:
+    """
+    Read liteserver public key, either raw 32 bytes or TL-serialized pub.ed25519 (as generate-random-id writes it)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) == 36 and data[:4] == tl.constructor("pub.ed25519"):
+        return data[4:]
+    if len(data) == 32:
+        return data
+    raise TonLiteServerException("Unsupported public key format in {} ({} bytes)".format(path, len(data)))
+
+
+class AdnlTcpTransport(object):
+    """
+    Encrypted framing of ADNL over TCP, each packet is:
+        size:uint32le nonce:bytes32 payload sha256(nonce + payload)
+    encrypted with AES-CTR stream of the corresponding direction.
+    """
+
+    def __init__(self, sock: socket.socket, rx_cipher: AesCtr, tx_cipher: AesCtr):
+        self._sock = sock
+        self._rx = rx_cipher
+        self._tx = tx_cipher
+
+    def _recv_exact(self, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = self._sock.recv(size)
+            if not chunk:
+                raise TonLiteServerException("Connection closed by peer")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def send_packet(self, payload: bytes):
+        body = os.urandom(32) + payload
+        packet = struct.pack("<I", len(body) + 32) + body + hashlib.sha256(body).digest()
+        self._sock.sendall(self._tx.encrypt(packet))
+
+    def recv_packet(self) -> bytes:
+        size = struct.unpack("<I", self._rx.decrypt(self._recv_exact(4)))[0]
+        if size < 64 or size > (1 << 24):
+            raise TonLiteServerException("Invalid ADNL packet size: {}".format(size))
+        data = self._rx.decrypt(self._recv_exact(size))
+        body, checksum = data[:-32], data[-32:]
+        if hashlib.sha256(body).digest() != checksum:
+            raise TonLiteServerException("ADNL packet checksum mismatch")
+        return body[32:]
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class AdnlTcpClient(object):
+    """
+    Single ADNL TCP connection to liteserver, re-established on failure.
+    Queries are sent one at a time, connection can be shared between threads.
+    """
+
+    def __init__(self, host: str, port: int, server_public_key: bytes, timeout: float = 10):
+        self._host = host
+        self._port = port
+        self._server_public_key = server_public_key
+        self._timeout = timeout
+        self._transport = None  # type: Optional[AdnlTcpTransport]
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._transport is not None
+
+    def _connect(self):
+        log.debug("Connecting to liteserver {}:{}".format(self._host, self._port))
+        sock = socket.create_connection((self._host, self._port), timeout=self._timeout)
+        try:
+            seed = os.urandom(32)
+            nonce = os.urandom(160)
+            shared = ed25519.shared_secret(seed, self._server_public_key)
+            checksum = hashlib.sha256(nonce).digest()
+            sock.sendall(key_id(self._server_public_key) + ed25519.public_key(seed) + checksum +
+                         handshake_cipher(shared, checksum).encrypt(nonce))
+            transport = AdnlTcpTransport(sock, rx_cipher=AesCtr(nonce[0:32], nonce[64:80]),
+                                         tx_cipher=AesCtr(nonce[32:64], nonce[80:96]))
+            # server confirms handshake with an empty packet
+            transport.recv_packet()
+        except Exception:
+            sock.close()
+            raise
+        self._transport = transport
+
+    def close(self):
+        with self._lock:
+            if self._transport:
+                self._transport.close()
+                self._transport = None
+
+    def _exchange(self, query: bytes) -> bytes:
+        query_id = os.urandom(32)
+        self._transport.send_packet(tl.constructor("adnl.message.query") + query_id + tl.pack_bytes(query))
+        while True:
+            reader = tl.TLReader(self._transport.recv_packet())
+            name = reader.read_constructor()
+            if name != "adnl.message.answer":
+                log.debug("Skipping ADNL message: {}".format(name))
+                continue
+            if reader.read_int256() != query_id:
+                log.debug("Skipping answer to another query")
+                continue
+            return reader.read_bytes()
+
+    def query(self, query: bytes) -> bytes:
+        """
+        :param query: TL-serialized query
+        :return: TL-serialized answer
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._transport is None:
+                        self._connect()
+                    return self._exchange(query)
+                except (OSError, TonLiteServerException) as ex:
+                    if self._transport:
+                        self._transport.close()
+                        self._transport = None
+                    if attempt:
+                        raise TonLiteServerException("Liteserver query failed: {}".format(ex))
+                    log.warning("Liteserver connection lost ({}), reconnecting".format(ex))
+
+    def ping(self) -> bool:
+        with self._lock:
+            try:
+                if self._transport is None:
+                    self._connect()
+                random_id = os.urandom(8)
+                self._transport.send_packet(tl.constructor("tcp.ping") + random_id)
+                while True:
+                    reader = tl.TLReader(self._transport.recv_packet())
+                    if reader.read_constructor() == "tcp.pong" and reader.read_long() == struct.unpack("<q", random_id)[0]:
+                        return True
+            except (OSError, TonLiteServerException) as ex:
+                log.warning("Liteserver ping failed: {}".format(ex))
+                if self._transport:
+                    self._transport.close()
+                    self._transport = None
+                return False
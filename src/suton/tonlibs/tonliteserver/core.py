@@ -0,0 +1,262 @@
+import asyncio
+import functools
+import json
+import logging
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from toncommon.boc import Cell, CellSlice, deserialize_boc, serialize_boc, hashmap_get
+from toncommon.configcache import ConfigCache
+from toncommon.models.ElectionParams import ElectionParams, StakeParams, ElectionValidatorParams
+from toncommon.models.TonAccount import TonAccount
+from toncommon.models.TonAddress import TonAddress
+from tonliteserver import tl
+from tonliteserver.adnl import AdnlTcpClient, read_public_key
+from tonliteserver.exceptions.base import TonLiteServerException, TonLiteServerError
+from tonliteserver.stack import method_id, serialize_stack, parse_stack, iter_list
+
+log = logging.getLogger("tonliteserver")
+
+SHARD_STATE_TAG = 0x9023afe2
+MC_STATE_EXTRA_TAG = 0xcc26
+# runSmcMethod mode: return result only
+RUN_METHOD_MODE_RESULT = 4
+
+
+class TonLiteServerClient(object):
+    """
+    Liteserver client talking ADNL directly, without lite-client binary.
+    Mirrors TonLiteClient interface, so can be used by validator providers instead of it.
+    Proofs returned by liteserver are parsed, but not verified.
+    """
+
+    def __init__(self, server_addr: str, server_pub_key_path: str, timeout: float = 10,
+                 config_cache: ConfigCache = None, record_path: str = None):
+        """
+        :param server_addr: Liteserver address, host:port
+        :param server_pub_key_path: Path to liteserver public key
+        :param config_cache: Cache to read config params through
+        :param record_path: File to append raw queries and answers to, can be replayed by StubLiteServer
+        """
+        host, port = server_addr.rsplit(":", 1)
+        self._adnl = AdnlTcpClient(host, int(port), read_public_key(server_pub_key_path), timeout=timeout)
+        self._config_cache = config_cache
+        self._record_path = record_path
+        self._record_lock = threading.Lock()
+        self._last_block = None  # type: Optional[tl.BlockIdExt]
+        self._last_block_time = 0
+        self._last_block_ttl = 5
+
+    def close(self):
+        self._adnl.close()
+
+    def _record(self, query: bytes, answer: bytes):
+        with self._record_lock:
+            with open(self._record_path, "a") as f:
+                f.write(json.dumps({"query": query.hex(), "answer": answer.hex()}) + "\n")
+
+    def _query(self, function: str, payload: bytes = b"") -> tl.TLReader:
+        """
+        :param function: Name of liteServer function
+        :param payload: TL-serialized function arguments
+        :return: Reader positioned after the constructor of the answer
+        """
+        query = tl.constructor("liteServer.query") + tl.pack_bytes(tl.constructor(function) + payload)
+        answer = self._adnl.query(query)
+        if self._record_path:
+            self._record(query, answer)
+        reader = tl.TLReader(answer)
+        if reader.read_constructor() == "liteServer.error":
+            raise TonLiteServerError(reader.read_int(), reader.read_string())
+        return reader
+
+    def _get_last_block(self) -> tl.BlockIdExt:
+        if not self._last_block or time.time() - self._last_block_time > self._last_block_ttl:
+            reader = self._query("liteServer.getMasterchainInfo")
+            self._last_block = reader.read_block_id_ext()
+            self._last_block_time = time.time()
+            log.debug("Last masterchain block: {}".format(self._last_block))
+        return self._last_block
+
+    @staticmethod
+    def _account_id(address: str) -> bytes:
+        """
+        liteServer.accountId, addresses without workchain are considered masterchain ones
+        """
+        workchain, sep, account = address.partition(":")
+        if not sep:
+            workchain, account = "-1", address.replace("0x", "", 1)
+        return struct.pack("<i", int(workchain)) + bytes.fromhex(account.rjust(64, "0"))
+
+    def _fetch_config_params(self, indexes: List[int]) -> Dict[int, Cell]:
+        payload = struct.pack("<I", 0) + self._get_last_block().pack() + tl.pack_int_vector(indexes)
+        reader = self._query("liteServer.getConfigParams", payload)
+        reader.read_uint()  # mode
+        reader.read_block_id_ext()
+        reader.read_bytes()  # state proof
+        state = deserialize_boc(reader.read_bytes())[0].virtualize()
+        s = state.begin_parse()
+        if s.load_uint(32) != SHARD_STATE_TAG or len(state.refs) < 4:
+            raise TonLiteServerException("Unexpected shard state in config proof")
+        # custom:(Maybe ^McStateExtra) is the last ref of ShardStateUnsplit
+        extra = state.refs[3].begin_parse()
+        if extra.load_uint(16) != MC_STATE_EXTRA_TAG:
+            raise TonLiteServerException("Unexpected masterchain state extra in config proof")
+        extra.load_maybe_ref()  # shard hashes
+        extra.skip_bits(256)  # config address
+        config_root = extra.load_ref()
+        params = {}
+        for index in indexes:
+            value = hashmap_get(config_root, 32, index)
+            if value is not None:
+                params[index] = value.load_ref()
+        return params
+
+    def _get_config_param(self, index: int) -> Optional[CellSlice]:
+        def load():
+            param = self._fetch_config_params([index]).get(index)
+            return serialize_boc(param).hex() if param else None
+        if self._config_cache:
+            boc = self._config_cache.get_or_load(index, load, namespace="liteserver")
+        else:
+            boc = load()
+        return deserialize_boc(bytes.fromhex(boc))[0].begin_parse() if boc else None
+
+    def _run_method(self, address: str, method: str, args: list = None) -> list:
+        payload = struct.pack("<I", RUN_METHOD_MODE_RESULT) + self._get_last_block().pack() + \
+            self._account_id(address) + struct.pack("<q", method_id(method)) + \
+            tl.pack_bytes(serialize_boc(serialize_stack(args or [])))
+        reader = self._query("liteServer.runSmcMethod", payload)
+        mode = reader.read_uint()
+        reader.read_block_id_ext()
+        reader.read_block_id_ext()
+        if mode & 1:
+            reader.read_bytes()  # shard proof
+            reader.read_bytes()  # proof
+        if mode & 2:
+            reader.read_bytes()  # state proof
+        if mode & 8:
+            reader.read_bytes()  # init c7
+        if mode & 16:
+            reader.read_bytes()  # lib extras
+        exit_code = reader.read_int()
+        if exit_code not in (0, 1):
+            raise TonLiteServerException("Get-method {} of {} failed with exit code {}".format(method, address,
+                                                                                               exit_code))
+        if not mode & 4:
+            return []
+        return parse_stack(deserialize_boc(reader.read_bytes())[0])
+
+    async def _run_async(self, func, *args):
+        # ADNL connection serves queries one by one anyway
+        return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args))
+
+    def get_elector_address(self) -> Optional[str]:
+        param = self._get_config_param(1)
+        if param:
+            return TonAddress.set_address_prefix(param.load_bytes(32).hex(), TonAddress.Type.MASTER_CHAIN)
+        return None
+
+    async def get_elector_address_async(self) -> Optional[str]:
+        return await self._run_async(self.get_elector_address)
+
+    def get_election_validator_params(self) -> (ElectionValidatorParams, None):
+        param = self._get_config_param(16)
+        if param:
+            return ElectionValidatorParams(max_validators=param.load_uint(16),
+                                           max_main_validators=param.load_uint(16),
+                                           min_validators=param.load_uint(16))
+        return None
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return await self._run_async(self.get_election_validator_params)
+
+    def get_elector_params(self) -> (ElectionParams, None):
+        param = self._get_config_param(15)
+        if param:
+            return ElectionParams(validators_elected_for=param.load_uint(32),
+                                  elections_start_before=param.load_uint(32),
+                                  elections_end_before=param.load_uint(32),
+                                  stake_held_for=param.load_uint(32))
+        return None
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return await self._run_async(self.get_elector_params)
+
+    def get_stake_params(self) -> Optional[StakeParams]:
+        param = self._get_config_param(17)
+        if param:
+            return StakeParams(min_stake=param.load_grams(), max_stake=param.load_grams())
+        return None
+
+    async def get_stake_params_async(self) -> Optional[StakeParams]:
+        return await self._run_async(self.get_stake_params)
+
+    def get_election_ids(self, elector_addr: str) -> [str]:
+        values = self._run_method(elector_addr, "active_election_id")
+        return [str(eid) for eid in values if eid]
+
+    async def get_election_ids_async(self, elector_addr: str) -> [str]:
+        return await self._run_async(self.get_election_ids, elector_addr)
+
+    def get_current_participant_stakes(self, elector_addr: str) -> List[int]:
+        values = self._run_method(elector_addr, "participant_list")
+        if not values:
+            return []
+        return [participant[1] for participant in iter_list(values[-1])]
+
+    async def get_current_participant_stakes_async(self, elector_addr: str) -> List[int]:
+        return await self._run_async(self.get_current_participant_stakes, elector_addr)
+
+    def compute_returned_stakes(self, elector_addr, validator_addr) -> [int]:
+        address = int(TonAddress.set_address_prefix(validator_addr, TonAddress.Type.HEX), 16)
+        values = self._run_method(elector_addr, "compute_returned_stake", [address])
+        return [value for value in values if value]
+
+    def get_account(self, address: str) -> TonAccount:
+        payload = self._get_last_block().pack() + self._account_id(address)
+        reader = self._query("liteServer.getAccountState", payload)
+        for _ in range(2):
+            reader.read_block_id_ext()
+        reader.read_bytes()  # shard proof
+        reader.read_bytes()  # proof
+        state = reader.read_bytes()
+        if not state:
+            raise TonLiteServerException("Account not found: {}".format(address))
+        return self._parse_account(deserialize_boc(state)[0])
+
+    @staticmethod
+    def _parse_account(cell: Cell) -> TonAccount:
+        s = cell.begin_parse()
+        if not s.load_bit():
+            return TonAccount(acc_type="NonExist", balance=0)
+        # addr_std$10 / addr_var$11
+        addr_type = s.load_uint(2)
+        if s.load_bit():
+            s.skip_bits(s.load_bounded_uint(30))  # anycast
+        if addr_type == 0b10:
+            s.skip_bits(8 + 256)
+        else:
+            addr_len = s.load_uint(9)
+            s.skip_bits(32 + addr_len)
+        # storage_stat: cells, bits, public_cells, last_paid, due_payment
+        for _ in range(3):
+            s.load_var_uint(3)
+        last_paid = s.load_uint(32)
+        if s.load_bit():
+            s.load_grams()
+        s.skip_bits(64)  # last_trans_lt
+        balance = s.load_grams()
+        s.load_maybe_ref()  # extra currencies
+        if s.load_bit():
+            acc_type = "Active"
+        elif s.load_bit():
+            acc_type = "Frozen"
+        else:
+            acc_type = "Uninit"
+        return TonAccount(acc_type=acc_type, balance=balance, last_paid=last_paid)
+
+    async def get_account_async(self, address: str) -> TonAccount:
+        return await self._run_async(self.get_account, address)
@@ -0,0 +1,13 @@
+class TonLiteServerException(Exception):
+    pass
+
+
+class TonLiteServerError(TonLiteServerException):
+    """
+    liteServer.error returned by the server
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__("Liteserver error {}: {}".format(code, message))
+        self.code = code
+        self.message = message
@@ -0,0 +1,121 @@
+"""
+TVM stack (VmStack TL-B) serialization for get-method calls
+"""
+
+from toncommon.boc import Cell, CellBuilder, CellSlice
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def crc16(data: bytes) -> int:
+    """
+    CRC-16/XMODEM
+    """
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xffff
+    return crc
+
+
+def method_id(name: str) -> int:
+    return (crc16(name.encode()) & 0xffff) | 0x10000
+
+
+def _store_value(builder: CellBuilder, value):
+    if value is None:
+        builder.store_uint(0x00, 8)
+    elif isinstance(value, int):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            builder.store_uint(0x01, 8).store_int(value, 64)
+        else:
+            # vm_stk_int#0201_, 15 bits prefix
+            builder.store_uint(0x0100, 15).store_int(value, 257)
+    elif isinstance(value, Cell):
+        builder.store_uint(0x03, 8).store_ref(value)
+    else:
+        raise ValueError("Unsupported stack value: {!r}".format(value))
+
+
+def serialize_stack(values: list) -> Cell:
+    """
+    :param values: Stack values from bottom to top, ints, None or cells
+    """
+    rest = Cell()
+    for value in values[:-1]:
+        builder = CellBuilder().store_ref(rest)
+        _store_value(builder, value)
+        rest = builder.end_cell()
+    # top of the stack is stored inline, right after the depth
+    top = CellBuilder().store_uint(len(values), 24)
+    if values:
+        top.store_ref(rest)
+        _store_value(top, values[-1])
+    return top.end_cell()
+
+
+def _load_tuple(s: CellSlice, size: int) -> list:
+    if size == 0:
+        return []
+    head = _load_tuple_ref(s, size - 1)
+    return head + [_load_value(s.load_ref().begin_parse())]
+
+
+def _load_tuple_ref(s: CellSlice, size: int) -> list:
+    if size == 0:
+        return []
+    if size == 1:
+        return [_load_value(s.load_ref().begin_parse())]
+    return _load_tuple(s.load_ref().begin_parse(), size)
+
+
+def _load_value(s: CellSlice):
+    tag = s.load_uint(8)
+    if tag == 0x00:
+        return None
+    if tag == 0x01:
+        return s.load_int(64)
+    if tag == 0x02:
+        if s.preload_uint(8) == 0xff:
+            raise ValueError("NaN on the stack")
+        s.skip_bits(7)
+        return s.load_int(257)
+    if tag in (0x03, 0x05):
+        return s.load_ref()
+    if tag == 0x04:
+        # slice is returned as a whole cell, bounds are ignored
+        cell = s.load_ref()
+        s.skip_bits(10 + 10 + 3 + 3)
+        return cell
+    if tag == 0x07:
+        return _load_tuple(s, s.load_uint(16))
+    raise ValueError("Unsupported stack value tag: {:02x}".format(tag))
+
+
+def parse_stack(cell: Cell) -> list:
+    """
+    :return: Stack values from bottom to top, tuples are returned as lists
+    """
+    s = cell.begin_parse()
+    depth = s.load_uint(24)
+    values = []
+    for _ in range(depth):
+        rest = s.load_ref()
+        values.append(_load_value(s))
+        s = rest.begin_parse()
+    values.reverse()
+    return values
+
+
+def iter_list(value):
+    """
+    Iterate lisp-style list, built of nested pairs: (head, (head, ... null))
+    """
+    while value is not None:
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("Not a list: {!r}".format(value))
+        yield value[0]
+        value = value[1]
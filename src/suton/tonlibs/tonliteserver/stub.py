@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import socket
+import struct
+import threading
+from typing import Dict, Optional
+
+from toncommon.crypto import ed25519
+from toncommon.crypto.aes import AesCtr
+from tonliteserver import tl
+from tonliteserver.adnl import AdnlTcpTransport, HANDSHAKE_SIZE, key_id, handshake_cipher
+from tonliteserver.exceptions.base import TonLiteServerException
+
+log = logging.getLogger("tonliteserver")
+
+
+class StubLiteServer(object):
+    """
+    Local liteserver replaying recorded answers (see TonLiteServerClient record_path),
+    answers are looked up by exact bytes of the query. Meant for testing the client without a node.
+    """
+
+    def __init__(self, private_key_seed: bytes, responses: Dict[bytes, bytes], host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        :param private_key_seed: Ed25519 private key of the server
+        :param responses: Query -> answer, both TL-serialized
+        :param port: Port to listen on, random free one if 0
+        """
+        self._seed = private_key_seed
+        self.public_key = ed25519.public_key(private_key_seed)
+        self._responses = responses
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(5)
+        self.address = "{}:{}".format(*self._sock.getsockname()[:2])
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @staticmethod
+    def load_responses(record_path: str) -> Dict[bytes, bytes]:
+        responses = {}
+        with open(record_path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    responses[bytes.fromhex(entry["query"])] = bytes.fromhex(entry["answer"])
+        return responses
+
+    def _handshake(self, conn: socket.socket) -> AdnlTcpTransport:
+        data = b""
+        while len(data) < HANDSHAKE_SIZE:
+            chunk = conn.recv(HANDSHAKE_SIZE - len(data))
+            if not chunk:
+                raise TonLiteServerException("Connection closed during handshake")
+            data += chunk
+        if data[0:32] != key_id(self.public_key):
+            raise TonLiteServerException("Handshake is addressed to another key")
+        client_public_key, checksum = data[32:64], data[64:96]
+        shared = ed25519.shared_secret(self._seed, client_public_key)
+        nonce = handshake_cipher(shared, checksum).decrypt(data[96:256])
+        if hashlib.sha256(nonce).digest() != checksum:
+            raise TonLiteServerException("Handshake checksum mismatch")
+        # directions are mirrored comparing to the client
+        transport = AdnlTcpTransport(conn, rx_cipher=AesCtr(nonce[32:64], nonce[80:96]),
+                                     tx_cipher=AesCtr(nonce[0:32], nonce[64:80]))
+        transport.send_packet(b"")
+        return transport
+
+    def _answer(self, query: bytes) -> bytes:
+        answer = self._responses.get(query)
+        if answer is None:
+            log.warning("No recorded answer for query: {}".format(query.hex()))
+            return tl.constructor("liteServer.error") + struct.pack("<i", -400) + \
+                tl.pack_bytes(b"query is not recorded")
+        return answer
+
+    def _serve(self, conn: socket.socket):
+        try:
+            transport = self._handshake(conn)
+            while True:
+                reader = tl.TLReader(transport.recv_packet())
+                name = reader.read_constructor()
+                if name == "tcp.ping":
+                    transport.send_packet(tl.constructor("tcp.pong") + struct.pack("<q", reader.read_long()))
+                elif name == "adnl.message.query":
+                    query_id = reader.read_int256()
+                    answer = self._answer(reader.read_bytes())
+                    transport.send_packet(tl.constructor("adnl.message.answer") + query_id + tl.pack_bytes(answer))
+        except (OSError, ValueError, TonLiteServerException) as ex:
+            log.debug("Stub liteserver connection closed: {}".format(ex))
+        finally:
+            conn.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._sock.close()
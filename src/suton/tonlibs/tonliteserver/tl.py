@@ -0,0 +1,122 @@
+"""
+TL serialization of the lite_api.tl / ton_api.tl subset used by the liteserver client.
+Constructor ids are CRC32 of the normalized schema lines, same as TL compiler computes them.
+"""
+import struct
+import zlib
+from typing import List
+
+SCHEMA = {
+    "tcp.ping": "tcp.ping random_id:long = tcp.Pong",
+    "tcp.pong": "tcp.pong random_id:long = tcp.Pong",
+    "adnl.message.query": "adnl.message.query query_id:int256 query:bytes = adnl.Message",
+    "adnl.message.answer": "adnl.message.answer query_id:int256 answer:bytes = adnl.Message",
+    "pub.ed25519": "pub.ed25519 key:int256 = PublicKey",
+    "liteServer.query": "liteServer.query data:bytes = Object",
+    "liteServer.error": "liteServer.error code:int message:string = liteServer.Error",
+    "liteServer.getMasterchainInfo": "liteServer.getMasterchainInfo = liteServer.MasterchainInfo",
+    "liteServer.masterchainInfo": "liteServer.masterchainInfo last:tonNode.blockIdExt state_root_hash:int256 "
+                                  "init:tonNode.zeroStateIdExt = liteServer.MasterchainInfo",
+    "liteServer.getConfigParams": "liteServer.getConfigParams mode:# id:tonNode.blockIdExt "
+                                  "param_list:vector int = liteServer.ConfigInfo",
+    "liteServer.configInfo": "liteServer.configInfo mode:# id:tonNode.blockIdExt state_proof:bytes "
+                             "config_proof:bytes = liteServer.ConfigInfo",
+    "liteServer.getAccountState": "liteServer.getAccountState id:tonNode.blockIdExt "
+                                  "account:liteServer.accountId = liteServer.AccountState",
+    "liteServer.accountState": "liteServer.accountState id:tonNode.blockIdExt shardblk:tonNode.blockIdExt "
+                               "shard_proof:bytes proof:bytes state:bytes = liteServer.AccountState",
+    "liteServer.runSmcMethod": "liteServer.runSmcMethod mode:# id:tonNode.blockIdExt "
+                               "account:liteServer.accountId method_id:long params:bytes = liteServer.RunMethodResult",
+    "liteServer.runMethodResult": "liteServer.runMethodResult mode:# id:tonNode.blockIdExt "
+                                  "shardblk:tonNode.blockIdExt shard_proof:mode.0?bytes proof:mode.0?bytes "
+                                  "state_proof:mode.1?bytes init_c7:mode.3?bytes lib_extras:mode.4?bytes "
+                                  "exit_code:int result:mode.2?bytes = liteServer.RunMethodResult",
+}
+
+IDS = {name: zlib.crc32(schema.encode()) for name, schema in SCHEMA.items()}
+CONSTRUCTORS = {constructor_id: name for name, constructor_id in IDS.items()}
+
+
+def constructor(name: str) -> bytes:
+    return struct.pack("<I", IDS[name])
+
+
+def pack_bytes(data: bytes) -> bytes:
+    """
+    TL bytes/string: length prefix, data and padding to 4 bytes
+    """
+    if len(data) < 254:
+        packed = bytes([len(data)]) + data
+    else:
+        packed = b"\xfe" + len(data).to_bytes(3, "little") + data
+    return packed + b"\x00" * (-len(packed) % 4)
+
+
+def pack_int_vector(values: List[int]) -> bytes:
+    return struct.pack("<I", len(values)) + b"".join(struct.pack("<i", value) for value in values)
+
+
+class BlockIdExt(object):
+
+    def __init__(self, workchain: int, shard: int, seqno: int, root_hash: bytes, file_hash: bytes):
+        self.workchain = workchain
+        self.shard = shard
+        self.seqno = seqno
+        self.root_hash = root_hash
+        self.file_hash = file_hash
+
+    def pack(self) -> bytes:
+        return struct.pack("<iqi", self.workchain, self.shard, self.seqno) + self.root_hash + self.file_hash
+
+    def __str__(self):
+        return "({},{:016x},{}):{}:{}".format(self.workchain, self.shard & 0xffffffffffffffff, self.seqno,
+                                             self.root_hash.hex().upper(), self.file_hash.hex().upper())
+
+
+class TLReader(object):
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def _read(self, size: int) -> bytes:
+        if self._pos + size > len(self._data):
+            raise ValueError("Unexpected end of TL data")
+        chunk = self._data[self._pos:self._pos + size]
+        self._pos += size
+        return chunk
+
+    def read_int(self) -> int:
+        return struct.unpack("<i", self._read(4))[0]
+
+    def read_uint(self) -> int:
+        return struct.unpack("<I", self._read(4))[0]
+
+    def read_long(self) -> int:
+        return struct.unpack("<q", self._read(8))[0]
+
+    def read_int256(self) -> bytes:
+        return self._read(32)
+
+    def read_bytes(self) -> bytes:
+        size = self._read(1)[0]
+        header = 1
+        if size == 254:
+            size = int.from_bytes(self._read(3), "little")
+            header = 4
+        data = self._read(size)
+        self._read(-(header + size) % 4)
+        return data
+
+    def read_string(self) -> str:
+        return self.read_bytes().decode("utf-8", errors="replace")
+
+    def read_constructor(self) -> str:
+        constructor_id = self.read_uint()
+        name = CONSTRUCTORS.get(constructor_id)
+        if name is None:
+            raise ValueError("Unknown TL constructor: {:08x}".format(constructor_id))
+        return name
+
+    def read_block_id_ext(self) -> BlockIdExt:
+        return BlockIdExt(self.read_int(), self.read_long(), self.read_int(), self.read_int256(), self.read_int256())
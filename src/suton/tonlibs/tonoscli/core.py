@@ -1,21 +1,30 @@
+import asyncio
+import functools
 import hashlib
+import itertools
 import json
 import logging
 import os
-from typing import List, Optional, Union, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import List, Optional, Union, Dict, Iterator
 
 from pip._vendor import requests
+from toncommon.configcache import ConfigCache
 from toncommon.contextmanager import secret_manager
 from toncommon.core import TonExec
+from toncommon.fingerprint import FingerprintCache, file_md5
 from toncommon.models.ElectionData import ElectionData, ElectionMember
 from toncommon.models.TonAddress import TonAddress
 from toncommon.models.TonCoin import TonCoin
-from toncommon.models.depool.DePoolElectionEvent import DePoolElectionEvent
 from toncommon.models.depool.DePoolEvent import DePoolEvent
 from toncommon.models.depool.DePoolInfo import DePoolInfo
-from toncommon.models.depool.DePoolLowBalanceEvent import DePoolLowBalanceEvent
 from toncommon.models.TonAccount import TonAccount
 from toncommon.models.TonTransaction import TonTransaction
+from toncommon.parsing import results
+from toncommon.parsing.depool import parse_depool_events
+from tonoscli.endpoints import Endpoint, EndpointManager, parse_endpoints
 from toncommon.utils import HexUtils
 from toncommon.models.ElectionParams import ElectionValidatorParams, StakeParams, ElectionParams
 
@@ -27,57 +36,223 @@ class TonosCli(TonExec):
     Python wrapper for tonos CLI
     """
     CONFIG_NAME = "tonos-cli.conf.json"
+    # commands that don't change blockchain state, safe to be sent to several endpoints
+    READ_COMMANDS = ('account', 'run', 'getconfig', 'query-raw')
+    # SDK errors of endpoints not reachable or not answering
+    TRANSPORT_ERRORS = ('network problem', 'can not send http request', 'timeout')
+    # last masterchain key block, config of the blockchain changes only with key blocks
+    _KEY_BLOCK_QUERY = ["blocks", "seq_no",
+                        "--where", json.dumps({"workchain_id": {"eq": -1}, "key_block": {"eq": True}}),
+                        "--order", json.dumps([{"path": "seq_no", "direction": "DESC"}]),
+                        "--limit", "1"]
 
     def __init__(self, cli_path, cwd, config_url, ton_project_id, ton_project_secret=None,
-                 wallet_abi_url=None, wallet_tvc_url=None, ton_endpoints=None):
+                 wallet_abi_url=None, wallet_tvc_url=None, ton_endpoints=None,
+                 config_cache: ConfigCache = None, separate_endpoints: bool = False, hedge_reads: bool = False,
+                 fingerprint_cache: FingerprintCache = None):
+        """
+        :param separate_endpoints: Configure each of ton_endpoints separately and send calls to the fastest
+            healthy one, instead of relying on tonos-cli failover
+        :param hedge_reads: Send read-only call to the second endpoint as well if the first one is slow to answer,
+            first answer is taken. Used with separate_endpoints only
+        :param fingerprint_cache: Cache of binary fingerprints, so binary is not hashed on every start
+        """
         super().__init__(cli_path)
-        with open(cli_path, "rb") as f:
-            h = hashlib.md5(f.read())
-            h.update(f"{config_url}.{ton_endpoints}.{ton_project_id}.{ton_project_secret}".encode())
+        config_key = f"{config_url}.{ton_endpoints}.{ton_project_id}.{ton_project_secret}"
+        cli_md5 = fingerprint_cache.get(cli_path) if fingerprint_cache else file_md5(cli_path)
+        h = hashlib.md5(f"{cli_md5}.{config_key}".encode())
         self._cwd = os.path.join(cwd, h.hexdigest())
+        if not os.path.exists(self._cwd):
+            self._migrate_legacy_cwd(cwd, cli_path, config_key)
         self._config_url = config_url
         self._tvc_wallet_url = wallet_tvc_url
         self._wallet_abi_url = wallet_abi_url
         self._ton_endpoints = ton_endpoints
         self._ton_project_id = ton_project_id
         self._ton_project_secret = ton_project_secret
-
-    def _run_command(self, command: str, options: list = None, retries=5):
+        self._config_cache = config_cache
+        self._depool_event_marks = {}
+        # config of the dir is written by several tonos-cli calls, so only one thread may do it
+        self._configured_cwds = set()
+        self._config_locks = {}  # type: Dict[str, threading.Lock]
+        self._config_locks_lock = threading.Lock()
+        self._endpoints = None  # type: Optional[EndpointManager]
+        endpoints = parse_endpoints(ton_endpoints)
+        if separate_endpoints and len(endpoints) > 1:
+            self._endpoints = EndpointManager(endpoints, self._cwd)
+        self._hedge_executor = None  # type: Optional[ThreadPoolExecutor]
+        if self._endpoints and hedge_reads:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tonos-hedge")
+
+    def _migrate_legacy_cwd(self, cwd: str, cli_path: str, config_key: str):
         """
-        ./tonos-cli <command> <options>
+        Config dirs used to be named by MD5 of the binary content followed by the config,
+        which can't be computed from the cached fingerprint. Dir of the old name is moved once,
+        so the configured tonos-cli dir is not orphaned on upgrade.
         """
-        if not os.path.exists(os.path.join(self._cwd, TonosCli.CONFIG_NAME)):
-            os.makedirs(self._cwd, exist_ok=True)
+        with open(cli_path, "rb") as f:
+            h = hashlib.md5(f.read())
+            h.update(config_key.encode())
+        legacy_cwd = os.path.join(cwd, h.hexdigest())
+        if os.path.isdir(legacy_cwd):
+            log.info("Moving tonos-cli config dir {} to {}".format(legacy_cwd, self._cwd))
+            try:
+                os.replace(legacy_cwd, self._cwd)
+            except OSError as ex:
+                log.warning("Failed to move tonos-cli config dir, it will be configured again: {}".format(ex))
+
+    def _ensure_config(self, retries=5, endpoint: Endpoint = None):
+        """
+        :param endpoint: Configure dir of the endpoint, pinned to it, instead of the common one
+        """
+        cwd = endpoint.cwd if endpoint else self._cwd
+        if cwd in self._configured_cwds:
+            return
+        with self._config_locks_lock:
+            config_lock = self._config_locks.setdefault(cwd, threading.Lock())
+        with config_lock:
+            if cwd in self._configured_cwds:
+                return
+            self._configure(cwd, endpoint, retries)
+            if os.path.exists(os.path.join(cwd, TonosCli.CONFIG_NAME)):
+                self._configured_cwds.add(cwd)
+
+    def _configure(self, cwd: str, endpoint: Optional[Endpoint], retries: int):
+        url = endpoint.url if endpoint else self._config_url
+        ton_endpoints = endpoint.url if endpoint else self._ton_endpoints
+        if not os.path.exists(os.path.join(cwd, TonosCli.CONFIG_NAME)):
+            os.makedirs(cwd, exist_ok=True)
             for i in range(retries):
-                ret, out = self._execute(["config", "--url", self._config_url],
-                                         cwd=self._cwd)
-                ret_p, out_p = self._execute(["config", "--project_id", self._ton_project_id],
-                                             cwd=self._cwd)
-                ret = ret + ret_p
-                out = f"{out} {out_p}"
+                # config options are set by single invocation
+                config_args = ["config", "--url", url, "--project_id", self._ton_project_id]
                 if self._ton_project_secret:
-                    ret_ps, out_ps = self._execute(["config", "--access_key", self._ton_project_secret],
-                                                   cwd=self._cwd)
-                    ret = ret + ret_ps
-                    out = f"{out} {out_ps}"
-                if self._ton_endpoints:
-                    log.info(f"Configuring endpoints: {self._ton_endpoints}")
-                    ret2, out2 = self._execute(["config", "endpoint", "add", self._config_url, self._ton_endpoints],
-                                               cwd=self._cwd)
+                    config_args += ["--access_key", self._ton_project_secret]
+                ret, out = self._execute(config_args, cwd=cwd)
+                if ton_endpoints:
+                    log.info(f"Configuring endpoints: {ton_endpoints}")
+                    ret2, out2 = self._execute(["config", "endpoint", "add", url, ton_endpoints],
+                                               cwd=cwd)
                     out = f"{out} {out2}"
                     ret = ret2 + ret
                 if ret != 0:
                     if out and "timeout" in out.lower():
                         log.info("Retrying tonos command due to timeout")
                         continue
-                    if not os.path.exists(os.path.join(self._cwd, TonosCli.CONFIG_NAME)):
+                    if not os.path.exists(os.path.join(cwd, TonosCli.CONFIG_NAME)):
                         raise Exception("Failed to initialize tonos-cli: {}".format(out))
                 break
+
+    def _run_on_endpoint(self, endpoint: Endpoint, args: list, retries=5) -> (int, str):
+        # endpoint manager does failover and backs off failing endpoints, so policy retries are bypassed,
+        # every attempt (hedged ones included) is still counted by the circuit of the tool
+        self._ensure_config(retries=retries, endpoint=endpoint)
+        started = time.monotonic()
+        ret, out = self._execute_once(args, cwd=endpoint.cwd, timeout=self.policy.timeout_for(args[0]))
+        self._record_endpoint(endpoint, started, ret, out)
+        return ret, out
+
+    def _record_endpoint(self, endpoint: Endpoint, started: float, ret: int, out: str):
+        # command errors are answers of the endpoint, it is backed off for transport failures only
+        ok = not self._is_transport_failure(ret, out)
+        self._endpoints.record(endpoint, time.monotonic() - started, ok)
+        self.circuit.record(ok)
+
+    def _run_hedged(self, primary: Endpoint, secondary: Endpoint, args: list, retries=5) -> (int, str):
+        first = self._hedge_executor.submit(self._run_on_endpoint, primary, args, retries)
+        try:
+            ret, out = first.result(timeout=self._endpoints.hedge_delay(primary))
+            if not self._is_transport_failure(ret, out):
+                return ret, out
+            return self._run_on_endpoint(secondary, args, retries)
+        except FutureTimeoutError:
+            pass
+        log.debug("Hedging {} to {}".format(args[0], secondary.url))
+        second = self._hedge_executor.submit(self._run_on_endpoint, secondary, args, retries)
+        result = None
+        pending = {first, second}
+        for future in as_completed([first, second]):
+            pending.discard(future)
+            result = future.result()
+            if not self._is_transport_failure(*result):
+                break
+        for loser in pending:
+            # read is bounded by the policy timeout and its latency is still recorded for the endpoint,
+            # so the losing call is left to finish, with its result dropped
+            if not loser.cancel():
+                loser.add_done_callback(self._drop_hedged_result)
+        return result
+
+    @staticmethod
+    def _drop_hedged_result(future):
+        if future.exception():
+            log.debug("Losing hedged call failed: {}".format(future.exception()))
+
+    def _run_on_endpoints(self, args: list, retries=5) -> (int, str):
+        """
+        Run on the fastest healthy endpoint, read-only calls are hedged or retried on the next endpoint
+        """
+        if not self.circuit.allow():
+            return self._circuit_open(args)
+        ranked = self._endpoints.ranked()
+        if args[0] not in TonosCli.READ_COMMANDS:
+            return self._run_on_endpoint(ranked[0], args, retries)
+        if self._hedge_executor:
+            return self._run_hedged(ranked[0], ranked[1], args, retries)
+        ret, out = self._run_on_endpoint(ranked[0], args, retries)
+        if self._is_transport_failure(ret, out):
+            log.info("Retrying {} on {}".format(args[0], ranked[1].url))
+            ret, out = self._run_on_endpoint(ranked[1], args, retries)
+        return ret, out
+
+    async def _run_on_endpoint_async(self, endpoint: Endpoint, args: list, retries=5) -> (int, str):
+        await asyncio.get_event_loop().run_in_executor(None, functools.partial(self._ensure_config,
+                                                                               retries=retries,
+                                                                               endpoint=endpoint))
+        started = time.monotonic()
+        ret, out = await self._execute_once_async(args, cwd=endpoint.cwd, timeout=self.policy.timeout_for(args[0]))
+        self._record_endpoint(endpoint, started, ret, out)
+        return ret, out
+
+    async def _run_on_endpoints_async(self, args: list, retries=5) -> (int, str):
+        # async reads of the cycle already run concurrently, so they are retried on failure only, not hedged
+        if not self.circuit.allow():
+            return self._circuit_open(args)
+        ranked = self._endpoints.ranked()
+        ret, out = await self._run_on_endpoint_async(ranked[0], args, retries)
+        if args[0] in TonosCli.READ_COMMANDS and self._is_transport_failure(ret, out):
+            log.info("Retrying {} on {}".format(args[0], ranked[1].url))
+            ret, out = await self._run_on_endpoint_async(ranked[1], args, retries)
+        return ret, out
+
+    def _run_command(self, command: str, options: list = None, retries=5):
+        """
+        ./tonos-cli <command> <options>
+        """
         if options is None:
             options = []
         args = [command] + options
         log.debug("Running: {} {}".format(self._exec_path, args))
-        ret, out = self._execute(args, cwd=self._cwd)
+        if self._endpoints:
+            ret, out = self._run_on_endpoints(args, retries=retries)
+        else:
+            self._ensure_config(retries=retries)
+            ret, out = self._execute(args, cwd=self._cwd)
+        if ret != 0:
+            raise Exception("Failed to run command {}: {}".format(command, out))
+        return out
+
+    async def _run_command_async(self, command: str, options: list = None, retries=5):
+        if options is None:
+            options = []
+        args = [command] + options
+        log.debug("Running async: {} {}".format(self._exec_path, args))
+        if self._endpoints:
+            ret, out = await self._run_on_endpoints_async(args, retries=retries)
+        else:
+            # config bootstrap happens once, so do it in the executor not to block the loop
+            await asyncio.get_event_loop().run_in_executor(None, functools.partial(self._ensure_config,
+                                                                                   retries=retries))
+            ret, out = await self._execute_async(args, cwd=self._cwd)
         if ret != 0:
             raise Exception("Failed to run command {}: {}".format(command, out))
         return out
@@ -87,17 +262,46 @@ class TonosCli(TonExec):
         cached_path = "{}.json".format(os.path.join(self._cwd, hashlib.md5(abi_url.encode()).hexdigest()))
         if not os.path.exists(cached_path):
             log.info("Downloading ABI from: {}".format(abi_url))
+            os.makedirs(self._cwd, exist_ok=True)
             resp = requests.get(abi_url, allow_redirects=True)
-            open(cached_path, 'wb').write(resp.content)
+            # ABI might be materialized by several threads at once, readers should never see partial file
+            tmp_path = f"{cached_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(resp.content)
+            os.replace(tmp_path, cached_path)
         return cached_path
 
+    def warm_up(self, abi_urls: List[str] = None) -> Dict[str, float]:
+        """
+        Configure tonos-cli dirs (of every endpoint if used separately) and download ABIs concurrently,
+        so the first commands don't pay for it. Failures are logged, they are retried on the first use.
+        :return: Seconds every warm-up task took
+        """
+        tasks = {}
+        if self._endpoints:
+            for endpoint in self._endpoints.endpoints:
+                tasks[f"config {endpoint.url}"] = functools.partial(self._ensure_config, endpoint=endpoint)
+        else:
+            tasks["config"] = self._ensure_config
+        for abi_url in set(filter(None, [self._wallet_abi_url] + list(abi_urls or []))):
+            tasks[f"abi {abi_url}"] = functools.partial(self._materialize_abi, abi_url)
+
+        def timed(name):
+            started = time.monotonic()
+            try:
+                tasks[name]()
+            except Exception as ex:
+                log.warning("Warm-up of {} failed: {}".format(name, ex))
+            return time.monotonic() - started
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="tonos-warmup") as executor:
+            return dict(zip(tasks, executor.map(timed, tasks)))
+
     def _parse_result(self, output: str) -> (dict, None):
-        if "Result" in output:
-            result_keyword = 'Result: '
-            substr = output[output.find(result_keyword) + len(result_keyword):]
-            obj = json.loads(substr)
-            return obj
-        return None
+        return results.parse_result_json(output)
+
+    def _parse_config(self, index: int, out: str) -> Optional[dict]:
+        return results.parse_json_after(out, f"Config p{index}:")
 
     def get_config(self, index: int) -> (str, Optional[dict]):
         """ ex:
@@ -108,34 +312,56 @@ class TonosCli(TonExec):
               "min_total_stake": "100000000000000"
             }
         """
-        out = self._run_command('getconfig', [str(index)])
-        config_pattern = f"Config p{index}:"
-        payload = ""
-        payload_started = False
-        for line in out.splitlines():
-            if line.startswith(config_pattern):
-                payload_started = True
-                line = line.replace(config_pattern, "").strip()
-            if payload_started:
-                payload += line
-        if payload:
-            return json.loads(payload)
-        return None
+        if self._config_cache:
+            return self._config_cache.get_or_load(
+                index, lambda: self._parse_config(index, self._run_command('getconfig', [str(index)])),
+                namespace="tonos-cli")
+        return self._parse_config(index, self._run_command('getconfig', [str(index)]))
+
+    async def get_config_async(self, index: int) -> (str, Optional[dict]):
+        async def load():
+            return self._parse_config(index, await self._run_command_async('getconfig', [str(index)]))
+        if self._config_cache:
+            return await self._config_cache.get_or_load_async(index, load, namespace="tonos-cli")
+        return await load()
+
+    @staticmethod
+    def _to_key_block_seqno(out: str) -> Optional[int]:
+        blocks = results.parse_json_array(out)
+        return int(blocks[0]["seq_no"]) if blocks else None
+
+    def get_last_key_block_seqno(self) -> Optional[int]:
+        """
+        Seqno of the last masterchain key block, used as version of the blockchain config
+        """
+        return self._to_key_block_seqno(self._run_command('query-raw', TonosCli._KEY_BLOCK_QUERY))
 
-    def get_stake_params(self) -> StakeParams:
-        data = self.get_config(17)
+    @staticmethod
+    def _to_stake_params(data: dict) -> StakeParams:
         return StakeParams(data["min_stake"], data["max_stake"])
 
-    def get_election_validator_params(self) -> (ElectionValidatorParams, None):
-        data = self.get_config(16)
+    def get_stake_params(self) -> StakeParams:
+        return self._to_stake_params(self.get_config(17))
+
+    async def get_stake_params_async(self) -> StakeParams:
+        return self._to_stake_params(await self.get_config_async(17))
+
+    @staticmethod
+    def _to_election_validator_params(data: dict) -> (ElectionValidatorParams, None):
         if data and "max_validators" in data:
             return ElectionValidatorParams(max_validators=data["max_validators"],
                                            max_main_validators=data["max_main_validators"],
                                            min_validators=data["min_validators"])
         return None
 
-    def get_elector_params(self) -> (ElectionParams, None):
-        data = self.get_config(15)
+    def get_election_validator_params(self) -> (ElectionValidatorParams, None):
+        return self._to_election_validator_params(self.get_config(16))
+
+    async def get_election_validator_params_async(self) -> (ElectionValidatorParams, None):
+        return self._to_election_validator_params(await self.get_config_async(16))
+
+    @staticmethod
+    def _to_elector_params(data: dict) -> (ElectionParams, None):
         if data:
             return ElectionParams(validators_elected_for=data["validators_elected_for"],
                                   elections_start_before=data["elections_start_before"],
@@ -143,12 +369,24 @@ class TonosCli(TonExec):
                                   stake_held_for=data["stake_held_for"])
         return None
 
-    def get_elector_address(self) -> Optional[str]:
-        data = self.get_config(1)
+    def get_elector_params(self) -> (ElectionParams, None):
+        return self._to_elector_params(self.get_config(15))
+
+    async def get_elector_params_async(self) -> (ElectionParams, None):
+        return self._to_elector_params(await self.get_config_async(15))
+
+    @staticmethod
+    def _to_elector_address(data) -> Optional[str]:
         if data:
             return TonAddress.set_address_prefix(data.strip(), TonAddress.Type.MASTER_CHAIN)
         return None
 
+    def get_elector_address(self) -> Optional[str]:
+        return self._to_elector_address(self.get_config(1))
+
+    async def get_elector_address_async(self) -> Optional[str]:
+        return self._to_elector_address(await self.get_config_async(1))
+
     def compute_returned_stake(self, elector_addr: str, validator_wallet_addr: str, elector_abi_url: str):
         # run ${ELECTOR_ADDR} compute_returned_stake "{\"wallet_addr\":\"${MSIG_ADDR_HEX}\"}" --abi ${CONFIGS_DIR}/Elector.abi.json
         data = self.exec_command('run', elector_addr, 'compute_returned_stake',
@@ -165,28 +403,41 @@ class TonosCli(TonExec):
             return [HexUtils.hex_to_int(data[0])]
         return []
 
-    def get_active_election_ids(self, elector_addr: str, elector_abi_url: str) -> List[str]:
-        # $(${UTILS_DIR}/tonos-cli run ${ELECTOR_ADDR} active_election_id {} --abi ${CONFIGS_DIR}/Elector.abi.json
-        data = self.exec_command('run', elector_addr, 'active_election_id',
-                                 {}, abi_url=elector_abi_url)
+    @staticmethod
+    def _to_active_election_ids(data: Optional[dict]) -> List[str]:
         if data:
             value = HexUtils.hex_to_int(data.get("value0"))
             if value:  # non-zero, non-empty value
                 return [str(value)]
         return []
 
-    def get_active_election_ids_fift(self, elector_addr: str) -> List[str]:
-        # using fift
-        data = self.exec_command_fift('runget', elector_addr, 'active_election_id')
+    def get_active_election_ids(self, elector_addr: str, elector_abi_url: str) -> List[str]:
+        # $(${UTILS_DIR}/tonos-cli run ${ELECTOR_ADDR} active_election_id {} --abi ${CONFIGS_DIR}/Elector.abi.json
+        return self._to_active_election_ids(self.exec_command('run', elector_addr, 'active_election_id',
+                                                              {}, abi_url=elector_abi_url))
+
+    async def get_active_election_ids_async(self, elector_addr: str, elector_abi_url: str) -> List[str]:
+        return self._to_active_election_ids(await self.exec_command_async('run', elector_addr, 'active_election_id',
+                                                                          {}, abi_url=elector_abi_url))
+
+    @staticmethod
+    def _to_active_election_ids_fift(data: Optional[list]) -> List[str]:
         if data:
             value = HexUtils.hex_to_int(data[0])
             if value:  # non-zero, non-empty value
                 return [str(value)]
         return []
 
-    def get_election_data(self, elector_addr: str, elector_abi_url: str) -> Optional[ElectionData]:
-        data = self.exec_command('run', elector_addr, 'get',
-                                 {}, abi_url=elector_abi_url)
+    def get_active_election_ids_fift(self, elector_addr: str) -> List[str]:
+        # using fift
+        return self._to_active_election_ids_fift(self.exec_command_fift('runget', elector_addr, 'active_election_id'))
+
+    async def get_active_election_ids_fift_async(self, elector_addr: str) -> List[str]:
+        return self._to_active_election_ids_fift(
+            await self.exec_command_fift_async('runget', elector_addr, 'active_election_id'))
+
+    @staticmethod
+    def _to_election_data(data: Optional[dict]) -> Optional[ElectionData]:
         if data:
             return ElectionData(election_open=data.get("election_open", False),
                                 members=[ElectionMember(addr=m_data.get("addr"),
@@ -197,9 +448,16 @@ class TonosCli(TonExec):
                                          ])
         return None
 
-    def get_participant_list_fift(self, elector_addr: str) -> Optional[ElectionData]:
-        # tonos-cli runget -1:3333333333333333333333333333333333333333333333333333333333333333 participant_list
-        data = self.exec_command_fift("runget", elector_addr, "participant_list")
+    def get_election_data(self, elector_addr: str, elector_abi_url: str) -> Optional[ElectionData]:
+        return self._to_election_data(self.exec_command('run', elector_addr, 'get',
+                                                        {}, abi_url=elector_abi_url))
+
+    async def get_election_data_async(self, elector_addr: str, elector_abi_url: str) -> Optional[ElectionData]:
+        return self._to_election_data(await self.exec_command_async('run', elector_addr, 'get',
+                                                                    {}, abi_url=elector_abi_url))
+
+    @staticmethod
+    def _to_participant_list(data: Optional[list]) -> Optional[ElectionData]:
         if data:
             # a bit weird output that 'runget' returns with nested arrays
             def collect(p, res):
@@ -218,22 +476,28 @@ class TonosCli(TonExec):
                                          ])
         return None
 
-    def get_account(self, address) -> TonAccount:
-        out = self._run_command('account', [address])
-        data = {}
-        output_started = False
-        for line in out.splitlines():
-            if not output_started and "Succeeded." in line:
-                output_started = True
-                continue
-            if output_started:
-                if "Account not found" in line:
-                    raise Exception("Account not found: {}".format(address))
-                tokens = line.split(":")
-                data[tokens[0].strip()] = tokens[1].strip()
+    def get_participant_list_fift(self, elector_addr: str) -> Optional[ElectionData]:
+        # tonos-cli runget -1:3333333333333333333333333333333333333333333333333333333333333333 participant_list
+        return self._to_participant_list(self.exec_command_fift("runget", elector_addr, "participant_list"))
+
+    async def get_participant_list_fift_async(self, elector_addr: str) -> Optional[ElectionData]:
+        return self._to_participant_list(await self.exec_command_fift_async("runget", elector_addr, "participant_list"))
+
+    @staticmethod
+    def _parse_account(address, out: str) -> TonAccount:
+        try:
+            data = results.parse_key_values(out, start_marker="Succeeded.", stop_marker="Account not found")
+        except ValueError:
+            raise Exception("Account not found: {}".format(address))
         return TonAccount(acc_type=data["acc_type"], balance=int(data.get("balance", 0).replace("nanoton", "").strip()),
                           last_paid=int(data.get("last_paid")), data=data.get("data(boc)"))
 
+    def get_account(self, address) -> TonAccount:
+        return self._parse_account(address, self._run_command('account', [address]))
+
+    async def get_account_async(self, address) -> TonAccount:
+        return self._parse_account(address, await self._run_command_async('account', [address]))
+
     def _run_command_and_parse_result(self, command: str,
                                       options: List[str] = None, private_key: str = None) -> Optional[dict]:
         cmd_args = options.copy() if options else []
@@ -257,6 +521,30 @@ class TonosCli(TonExec):
             cmd.append(str(payload))
         return self._run_command_and_parse_result(command, cmd, private_key=private_key)
 
+    async def _run_command_and_parse_result_async(self, command: str,
+                                                  options: List[str] = None,
+                                                  private_key: str = None) -> Optional[dict]:
+        cmd_args = options.copy() if options else []
+        with secret_manager(secrets=[private_key]):
+            if private_key:
+                cmd_args.extend(['--sign', str(private_key)])
+            out = await self._run_command_async(command, cmd_args)
+            data = self._parse_result(out)
+            log.debug("Tonoscli call: {}".format(out))
+        return data
+
+    async def exec_command_async(self, command: str, address: str, method: str, payload: dict,
+                                 abi_url: str, private_key: str = None) -> Optional[dict]:
+        cmd = [address, method, str(json.dumps(payload)), "--abi", self._materialize_abi(abi_url)]
+        return await self._run_command_and_parse_result_async(command, cmd, private_key=private_key)
+
+    async def exec_command_fift_async(self, command: str, address: str, method: str, payload: str = None,
+                                      private_key: str = None) -> Union[Optional[Dict], Optional[List]]:
+        cmd = [address, method]
+        if payload:
+            cmd.append(str(payload))
+        return await self._run_command_and_parse_result_async(command, cmd, private_key=private_key)
+
     def generate_key_pair_file(self, file_location, phrase):
         with secret_manager(secrets=[phrase]):
             return self._run_command("getkeypair", ["-o", file_location, "-p", phrase])
@@ -294,41 +582,37 @@ class TonosCli(TonExec):
                 self.confirm_transaction(wallet_addr, transaction_id=data.get("transId"), private_keys=custodian_keys)
         return TonTransaction(tid=data.get("transId"))
 
-    def get_depool_events(self, depool_addr,
-                          max: int = 100) -> List[DePoolEvent]:
-        out = self._run_command("depool", ["--addr", depool_addr, "events"])
-        log.debug("Tonoscli: {}".format(out))
-        events = []
-        current_event_id = None
-        current_event = None
-        for line in out.splitlines():
-            if not line or not line.strip():
-                # empty line indicates that next event is coming
-                current_event_id = None
-                current_event = None
-                continue
-            if line.startswith("event "):
-                current_event_id = line.split(" ")[1]
-                continue
-
-            if current_event_id and not current_event:
-                # new event started, but we don't know yet which one
-                event_name = line.split(" ")[0]
-                event_cls = DePoolEvent
-                if event_name == "TooLowDePoolBalance":
-                    event_cls = DePoolLowBalanceEvent
-                elif event_name == "StakeSigningRequested":
-                    event_cls = DePoolElectionEvent
-                current_event = event_cls(current_event_id, event_name)
-                continue
-
-            if current_event and line.startswith("{"):
-                current_event.set_data(line)
-                events.append(current_event)
-
-            if len(events) >= max:
-                break
+    def iter_depool_events(self, depool_addr: str, since_event_id: str = None,
+                           timeout: int = 120) -> Iterator[DePoolEvent]:
+        """
+        Stream depool events (latest first) while tonos-cli still prints them.
+        tonos-cli is stopped as soon as caller stops iterating or event with since_event_id is met.
+        :param since_event_id: Id of the event to stop at (not included)
+        """
+        endpoint = self._endpoints.select() if self._endpoints else None
+        self._ensure_config(endpoint=endpoint)
+        lines = self._execute_stream(["depool", "--addr", depool_addr, "events"],
+                                     cwd=endpoint.cwd if endpoint else self._cwd, timeout=timeout)
+        try:
+            for event in parse_depool_events(lines):
+                if since_event_id and event.eid == since_event_id:
+                    return
+                yield event
+        finally:
+            lines.close()
 
+    def get_depool_events(self, depool_addr,
+                          max: int = 100, only_new: bool = False) -> List[DePoolEvent]:
+        """
+        :param max: Max number of latest events to read
+        :param only_new: Return only events that appeared since the previous call for this depool
+        """
+        since_event_id = self._depool_event_marks.get(depool_addr) if only_new else None
+        events = list(itertools.islice(self.iter_depool_events(depool_addr, since_event_id=since_event_id), max))
+        log.debug("Tonoscli: {} events ({} new only) of {}".format(len(events), only_new, depool_addr))
+        if events:
+            # high-water mark, latest event seen
+            self._depool_event_marks[depool_addr] = events[0].eid
         return events
 
     def terminate_depool(self, address, private_key: str, abi_url: str):
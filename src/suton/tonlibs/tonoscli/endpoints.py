@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Union
+
+log = logging.getLogger("tonoscli")
+
+
+def parse_endpoints(endpoints: Union[str, List[str], None]) -> List[str]:
+    """
+    :param endpoints: List or comma separated string (as tonos-cli "config endpoint add" accepts)
+    """
+    if not endpoints:
+        return []
+    if isinstance(endpoints, str):
+        endpoints = endpoints.strip("[] ").split(",")
+    return [endpoint.strip().strip('"\'') for endpoint in endpoints if endpoint.strip()]
+
+
+class Endpoint(object):
+
+    def __init__(self, url: str, cwd: str):
+        self.url = url
+        self.cwd = cwd
+        self.latency = None  # type: Optional[float]
+        self.error_rate = 0.0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.calls = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.time() >= self.cooldown_until
+
+    @property
+    def score(self) -> float:
+        if self.latency is None:
+            # not measured endpoints go first, so all of them get measured, but not the ones only failing so far
+            return float("inf") if self.calls else 0.0
+        return self.latency * (1 + 5 * self.error_rate)
+
+    def __repr__(self):
+        return "<Endpoint {} latency={} errors={:.2f} healthy={}>".format(self.url, self.latency, self.error_rate,
+                                                                          self.healthy)
+
+
+class EndpointManager(object):
+    """
+    Tracks rolling (EWMA) latency and error rate of the endpoints and picks the fastest healthy one.
+    Endpoint failing several times in a row is put on cooldown, growing with each following failure.
+    """
+
+    def __init__(self, urls: List[str], base_cwd: str, alpha: float = 0.3, max_failures: int = 3,
+                 cooldown: float = 30, max_cooldown: float = 300):
+        """
+        :param base_cwd: Each endpoint gets its own tonos-cli config dir under it
+        :param alpha: Weight of the latest call in rolling stats
+        :param max_failures: Consecutive failures putting endpoint on cooldown
+        """
+        self.endpoints = [Endpoint(url, os.path.join(base_cwd, hashlib.md5(url.encode()).hexdigest()))
+                          for url in urls]
+        self._alpha = alpha
+        self._max_failures = max_failures
+        self._cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+
+    def ranked(self) -> List[Endpoint]:
+        """
+        :return: Healthy endpoints from the fastest, then the ones on cooldown from the soonest available
+        """
+        with self._lock:
+            healthy = sorted((e for e in self.endpoints if e.healthy), key=lambda e: e.score)
+            cooling = sorted((e for e in self.endpoints if not e.healthy), key=lambda e: e.cooldown_until)
+        return healthy + cooling
+
+    def select(self) -> Endpoint:
+        return self.ranked()[0]
+
+    def record(self, endpoint: Endpoint, latency: float, ok: bool):
+        with self._lock:
+            endpoint.calls += 1
+            if ok:
+                endpoint.latency = latency if endpoint.latency is None else \
+                    self._alpha * latency + (1 - self._alpha) * endpoint.latency
+                endpoint.failures = 0
+            else:
+                endpoint.failures += 1
+                if endpoint.failures >= self._max_failures:
+                    cooldown = min(self._cooldown * 2 ** (endpoint.failures - self._max_failures), self._max_cooldown)
+                    endpoint.cooldown_until = time.time() + cooldown
+                    log.warning("Endpoint {} failed {} times in a row, not used for {}s".format(
+                        endpoint.url, endpoint.failures, cooldown))
+            endpoint.error_rate = self._alpha * (0.0 if ok else 1.0) + (1 - self._alpha) * endpoint.error_rate
+
+    def hedge_delay(self, endpoint: Endpoint) -> float:
+        """
+        Time to wait for the answer of the endpoint before asking another one
+        """
+        return max(0.2, (endpoint.latency or 1.0) * 1.5)
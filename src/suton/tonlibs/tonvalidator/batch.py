@@ -0,0 +1,122 @@
+import logging
+import re
+from typing import List, Optional
+
+log = logging.getLogger("tonvalidator")
+
+SUCCESS_PATTERN = re.compile(r"success")
+ERROR_PATTERN = re.compile(r"(^failed|error)", re.IGNORECASE)
+
+
+class ConsoleOperation(object):
+    """
+    Single console command of the batch, result is available once batch is executed
+    """
+
+    def __init__(self, command: str, pattern=SUCCESS_PATTERN):
+        """
+        :param pattern: Regex matching output line of the command, first group (if any) is taken as result
+        """
+        self.command = command
+        self._pattern = pattern
+        self.matched = False
+        self.value = None  # type: Optional[str]
+        self.error = None  # type: Optional[str]
+
+    def _consume(self, line: str) -> bool:
+        """
+        :return: True if line is the output of this command
+        """
+        m = self._pattern.search(line)
+        if m:
+            self.matched = True
+            self.value = m.group(1).strip() if m.groups() else line.strip()
+            return True
+        if ERROR_PATTERN.search(line):
+            self.error = line.strip()
+            return True
+        return False
+
+    def __repr__(self):
+        return "<{} matched={} value={} error={}>".format(self.command, self.matched, self.value, self.error)
+
+
+class ConsoleBatch(object):
+    """
+    Queue of console commands sent to validator in one round-trip (single process or single session write).
+    Console prints output of the commands in order, so results are mapped back to the operations
+    by matching output lines sequentially.
+    """
+
+    def __init__(self, console):
+        """
+        :param console: TonValidatorEngineConsole
+        """
+        self._console = console
+        self._operations = []  # type: List[ConsoleOperation]
+        self.retcode = None  # type: Optional[int]
+        self.output = None  # type: Optional[str]
+
+    def __len__(self):
+        return len(self._operations)
+
+    def add(self, command: str, pattern=SUCCESS_PATTERN) -> ConsoleOperation:
+        operation = ConsoleOperation(command, pattern)
+        self._operations.append(operation)
+        return operation
+
+    def new_key(self) -> ConsoleOperation:
+        return self.add('newkey', re.compile(r"created new key(.+)"))
+
+    def export_pub(self, key: str) -> ConsoleOperation:
+        return self.add('exportpub {}'.format(key), re.compile(r"got public key:(.+)"))
+
+    def sign(self, key: str, data: str) -> ConsoleOperation:
+        return self.add('sign {} {}'.format(key, data), re.compile(r"got signature(.+)"))
+
+    def add_perm_key(self, key: str, election_start, election_stop) -> ConsoleOperation:
+        return self.add('addpermkey {} {} {}'.format(key, election_start, election_stop))
+
+    def add_temp_key(self, key: str, temp_key: str, election_stop) -> ConsoleOperation:
+        return self.add('addtempkey {} {} {}'.format(key, temp_key, election_stop))
+
+    def add_adnl(self, key_adnl: str, category: int = 0) -> ConsoleOperation:
+        return self.add('addadnl {} {}'.format(key_adnl, category))
+
+    def add_validator_addr(self, key: str, key_adnl: str, election_stop) -> ConsoleOperation:
+        return self.add('addvalidatoraddr {} {} {}'.format(key, key_adnl, election_stop))
+
+    def delete_temp_key(self, key: str, temp_key: str) -> ConsoleOperation:
+        return self.add('deltempkey {} {}'.format(key, temp_key))
+
+    def delete_perm_key(self, key: str) -> ConsoleOperation:
+        return self.add('delpermkey {}'.format(key))
+
+    def prepare_election(self, election_key: str, key_adnl: str, election_start, election_stop) -> List[ConsoleOperation]:
+        return [self.add_perm_key(election_key, election_start, election_stop),
+                self.add_temp_key(election_key, election_key, election_stop),
+                self.add_adnl(key_adnl, 0),
+                self.add_validator_addr(election_key, key_adnl, election_stop)]
+
+    def execute(self, timeout=10) -> (int, str):
+        """
+        Run queued commands and resolve operations
+        :return: Return code and raw output of the console
+        """
+        if not self._operations:
+            return 0, ""
+        ret, out = self._console._run_command([operation.command for operation in self._operations],
+                                              timeout=timeout)
+        self.retcode, self.output = ret, out
+        pending = iter(self._operations)
+        operation = next(pending, None)
+        for line in out.splitlines():
+            if operation is None:
+                break
+            if operation._consume(line):
+                operation = next(pending, None)
+        return ret, out
+
+    @property
+    def failed(self) -> List[ConsoleOperation]:
+        return [operation for operation in self._operations if not operation.matched]
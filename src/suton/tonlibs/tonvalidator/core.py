@@ -1,7 +1,8 @@
 import logging
-import re
+from typing import List, Optional, Tuple
 
 from toncommon.core import TonExec
+from tonvalidator.batch import ConsoleBatch
 from tonvalidator.exceptions.connection import TonConnectionException
 import sys
 
@@ -9,12 +10,22 @@ log = logging.getLogger("tonvalidator")
 
 
 class TonValidatorEngineConsole(TonExec):
+    READ_COMMANDS = ('getstats',)
     
-    def __init__(self, exec_path, client_key, server_pub_key, server_addr):
-        self._exec_path = exec_path
+    def __init__(self, exec_path, client_key, server_pub_key, server_addr, use_session=False):
+        """
+        :param use_session: Keep single console process connected to the validator and send all commands to it
+        """
+        super().__init__(exec_path)
         self._client_key = client_key
         self._server_pub_key = server_pub_key
         self._server_addr = server_addr
+        if use_session:
+            # parsers expect 'conn ready' banner in front of command output
+            self._open_session(['-a', self._server_addr,
+                                '-k', self._client_key,
+                                '-p', self._server_pub_key],
+                               keep_preamble=True)
 
     def _run_command(self, commands: list, timeout=10):
         """
@@ -24,6 +35,8 @@ class TonValidatorEngineConsole(TonExec):
         -p "${KEYS_DIR}/server.pub" \
         -c "getstats" -c "quit"
         """
+        if self._session:
+            return self._execute_in_session(commands, timeout=timeout)
         args = ['-a', self._server_addr,
                 '-k', self._client_key,
                 '-p', self._server_pub_key,
@@ -57,54 +70,78 @@ class TonValidatorEngineConsole(TonExec):
             return int(stats['unixtime']) - int(stats['masterchainblocktime'])
         return sys.maxsize
 
+    def batch(self) -> ConsoleBatch:
+        """
+        Queue of commands to be run in one console round-trip
+        """
+        return ConsoleBatch(self)
+
+    @staticmethod
+    def _execute_batch(batch: ConsoleBatch, action: str) -> str:
+        """
+        Run the batch, raise if console failed or any of the commands did not succeed
+        :param action: What the batch does, for the error message
+        :return: Output of the console
+        """
+        ret, out = batch.execute()
+        if ret != 0:
+            raise Exception("Failed to {}: {}".format(action, out))
+        if batch.failed:
+            raise Exception("Failed to {}, commands failed: {}".format(action, batch.failed))
+        return out
+
     def get_new_key(self):
-        ret, out = self._run_command(['newkey'])
-        new_key_pattern = re.compile(r"created new key(.+)")
-        for line in out.splitlines():
-            m = new_key_pattern.match(line)
-            if m:
-                return m.group(1).strip()
-        return None
+        return self.get_new_keys(1)[0]
+
+    def get_new_keys(self, count: int) -> List[Optional[str]]:
+        batch = self.batch()
+        operations = [batch.new_key() for _ in range(count)]
+        self._execute_batch(batch, "generate keys")
+        return [operation.value for operation in operations]
 
     def delete_temp_key(self, key, temp_key):
-        ret, out = self._run_command(['deltempkey {} {}'.format(key, temp_key)])
+        batch = self.batch()
+        batch.delete_temp_key(key, temp_key)
+        self._execute_batch(batch, "delete temp key")
 
     def delete_key(self, key):
-        ret, out = self._run_command(['delpermkey {}'.format(key)])
+        batch = self.batch()
+        batch.delete_perm_key(key)
+        self._execute_batch(batch, "delete key")
+
+    def delete_keys(self, keys: List[Tuple[str, Optional[str]]]):
+        """
+        Delete several keys in a single console run, raise if any of them failed to be deleted
+        :param keys: Pairs of key and its temp key, temp key is not deleted if None
+        """
+        batch = self.batch()
+        for key, temp_key in keys:
+            if temp_key:
+                batch.delete_temp_key(key, temp_key)
+            batch.delete_perm_key(key)
+        self._execute_batch(batch, "delete keys")
 
     def prepare_election(self, election_key, key_adnl, election_start, election_stop) -> str:
-        commands = ['addpermkey {key} {election_start} {election_stop}',
-                    'addtempkey {key} {key} {election_stop}',
-                    'addadnl {key_adnl} 0',
-                    'addvalidatoraddr {key} {key_adnl} {election_stop}']
-        interpolated_cmds = []
-        for cmd in commands:
-            interpolated_cmds.append(cmd.format(
-                key=election_key,
-                key_adnl=key_adnl,
-                election_start=election_start,
-                election_stop=election_stop
-            ))
-        ret, out = self._run_command(interpolated_cmds)
-        if ret != 0:
-            raise Exception("Failed to prepare elections: {}".format(out))
-        return out
+        batch = self.batch()
+        batch.prepare_election(election_key, key_adnl, election_start, election_stop)
+        return self._execute_batch(batch, "prepare elections")
 
     def sign_request(self, election_key, request) -> (str, str):
-        ret, out = self._run_command(['exportpub {}'.format(election_key),
-                                      'sign {} {}'.format(election_key, request)])
-        if ret != 0:
-            raise Exception("Failed to generate signature: {}".format(out))
-        signature_pattern = re.compile(r"got signature(.+)")
-        public_key_pattern = re.compile(r"got public key:(.+)")
-        signature = None
-        pub_key = None
-        for line in out.splitlines():
-            m = signature_pattern.match(line)
-            if m:
-                signature = m.group(1).strip()
-                continue
-            m = public_key_pattern.match(line)
-            if m:
-                pub_key = m.group(1).strip()
-        return signature, pub_key
+        batch = self.batch()
+        pub_key = batch.export_pub(election_key)
+        signature = batch.sign(election_key, request)
+        self._execute_batch(batch, "generate signature")
+        return signature.value, pub_key.value
+
+    def prepare_election_and_sign(self, election_key, key_adnl, election_start, election_stop,
+                                  request) -> (str, str):
+        """
+        Add election keys to validator and sign election request in one round-trip
+        :return: Signature and public key of election key
+        """
+        batch = self.batch()
+        batch.prepare_election(election_key, key_adnl, election_start, election_stop)
+        pub_key = batch.export_pub(election_key)
+        signature = batch.sign(election_key, request)
+        self._execute_batch(batch, "prepare elections")
+        return signature.value, pub_key.value
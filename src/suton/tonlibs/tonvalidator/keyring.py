@@ -0,0 +1,144 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Union
+
+from toncommon.crypto import ed25519
+
+log = logging.getLogger("tonvalidator")
+
+PK_ED25519_ID = zlib.crc32(b"pk.ed25519 key:int256 = PrivateKey")
+PUB_ED25519_ID = zlib.crc32(b"pub.ed25519 key:int256 = PublicKey")
+
+
+def _libc():
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+
+
+_LIBC = _libc()
+
+
+def _buffer_address(buffer: bytearray) -> int:
+    return ctypes.addressof((ctypes.c_char * len(buffer)).from_buffer(buffer))
+
+
+class LocalSigningKey(object):
+    """
+    Ed25519 private key kept in a mutable buffer, locked in memory (if permitted) and zeroized on close.
+    Note that signing still makes temporary copies of the secret (integers, hashes) that can't be wiped in Python.
+    """
+
+    def __init__(self, seed: Union[bytearray, memoryview]):
+        """
+        :param seed: Buffer with the seed, copied into the key's own one, so caller can wipe it
+        """
+        self._seed = bytearray(seed)
+        self._locked = False
+        if _LIBC is not None:
+            self._locked = _LIBC.mlock(ctypes.c_void_p(_buffer_address(self._seed)), len(self._seed)) == 0
+            if not self._locked:
+                log.debug("Failed to lock key memory: {}".format(os.strerror(ctypes.get_errno())))
+        self.public_key = ed25519.public_key(self._seed)
+
+    @property
+    def closed(self) -> bool:
+        return not self._seed
+
+    def serialized_public_key(self) -> bytes:
+        """
+        TL-serialized pub.ed25519, as validator-engine-console exportpub returns it
+        """
+        return struct.pack("<I", PUB_ED25519_ID) + self.public_key
+
+    def sign(self, data: bytes) -> bytes:
+        if self.closed:
+            raise ValueError("Key is closed")
+        return ed25519.sign(self._seed, data)
+
+    def close(self):
+        if self.closed:
+            return
+        ctypes.memset(_buffer_address(self._seed), 0, len(self._seed))
+        if self._locked:
+            _LIBC.munlock(ctypes.c_void_p(_buffer_address(self._seed)), len(self._seed))
+        self._seed = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class ValidatorKeyring(object):
+    """
+    Reads private keys from validator-engine keyring directory (<db>/keyring), files are named by key hash
+    and contain TL-serialized pk.ed25519. Loaded keys are kept in memory until forgotten.
+    """
+
+    def __init__(self, keyring_path: str):
+        self._keyring_path = keyring_path
+        self._keys = {}  # type: Dict[str, LocalSigningKey]
+        self._lock = threading.Lock()
+
+    def _read_key(self, key_hash: str) -> LocalSigningKey:
+        for name in (key_hash, key_hash.upper(), key_hash.lower()):
+            path = os.path.join(self._keyring_path, name)
+            if os.path.exists(path):
+                break
+        else:
+            raise FileNotFoundError("Key {} not found in keyring {}".format(key_hash, self._keyring_path))
+        # read into mutable buffer, unbuffered, so no immutable copies of the secret are left behind
+        data = bytearray(os.path.getsize(path))
+        view = memoryview(data)
+        try:
+            with open(path, "rb", buffering=0) as f:
+                size = f.readinto(data)
+            if size != 36 or len(data) != 36 or struct.unpack_from("<I", data)[0] != PK_ED25519_ID:
+                raise ValueError("Unsupported private key format of {} (encrypted keys are not supported)".format(
+                    key_hash))
+            return LocalSigningKey(view[4:])
+        finally:
+            view.release()
+            if data:
+                ctypes.memset(_buffer_address(data), 0, len(data))
+
+    def get_key(self, key_hash: str) -> LocalSigningKey:
+        key_hash = key_hash.upper()
+        with self._lock:
+            key = self._keys.get(key_hash)
+            if key is None:
+                key = self._keys[key_hash] = self._read_key(key_hash)
+            return key
+
+    def sign(self, key_hash: str, data: bytes) -> (bytes, bytes):
+        """
+        :return: Signature and TL-serialized public key
+        """
+        key = self.get_key(key_hash)
+        signature = key.sign(data)
+        if not ed25519.verify(key.public_key, data, signature):
+            raise ValueError("Produced Ed25519 signature is invalid")
+        return signature, key.serialized_public_key()
+
+    def forget(self, key_hash: str):
+        with self._lock:
+            key = self._keys.pop(key_hash.upper(), None)
+        if key:
+            key.close()
+
+    def close(self):
+        with self._lock:
+            keys, self._keys = list(self._keys.values()), {}
+        for key in keys:
+            key.close()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# same layout main.py works with, tonlibs and toncontrol packages are imported as top-level ones
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'suton')
+sys.path.insert(0, os.path.join(SRC_DIR, 'tonlibs'))
+sys.path.insert(0, os.path.join(SRC_DIR, 'toncontrol'))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(*path) -> str:
+    with open(os.path.join(FIXTURES_DIR, *path)) as f:
+        return f.read()
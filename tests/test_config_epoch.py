@@ -0,0 +1,65 @@
+"""
+Config epoch is checked before the cached config params are used
+"""
+from routines.elections import ElectionsRoutine
+from settings.elections import ElectionSettings
+from toncommon.configcache import ConfigCache
+
+
+class FakeChain(object):
+
+    def __init__(self, elector_addr, election_ids, key_block_seqno):
+        self.elector_addr = elector_addr
+        self.election_ids = election_ids
+        self.key_block_seqno = key_block_seqno
+
+
+class FakeValidator(object):
+
+    def __init__(self, chain: FakeChain, config_cache: ConfigCache):
+        self._chain = chain
+        self._config_cache = config_cache
+
+    def get_elector_address(self):
+        return self._config_cache.get_or_load(1, lambda: self._chain.elector_addr)
+
+    def get_election_ids(self, elector_addr):
+        return self._chain.election_ids.get(elector_addr, [])
+
+
+class FakeTonosCli(object):
+
+    def __init__(self, chain: FakeChain):
+        self._chain = chain
+
+    def get_last_key_block_seqno(self):
+        return self._chain.key_block_seqno
+
+
+def make_routine(tmpdir, chain, config_cache) -> ElectionsRoutine:
+    return ElectionsRoutine(work_dir=str(tmpdir), tonos_cli=FakeTonosCli(chain), secret_manager=None,
+                            election_provider=None, validator_provider=FakeValidator(chain, config_cache),
+                            election_settings=ElectionSettings(), config_cache=config_cache)
+
+
+def test_elector_address_of_previous_epoch_is_not_used(tmpdir):
+    chain = FakeChain("-1:old", {"-1:old": ["1600000000"]}, key_block_seqno=5)
+    config_cache = ConfigCache()
+    routine = make_routine(tmpdir, chain, config_cache)
+    assert routine._read_election_ids() == ("-1:old", ["1600000000"])
+
+    # elector moved with the new key block
+    chain.elector_addr, chain.key_block_seqno = "-1:new", 6
+    chain.election_ids = {"-1:new": ["1600065536"]}
+    routine._cycle_cache.put('elector_params', "params of the old epoch")
+    assert routine._read_election_ids() == ("-1:new", ["1600065536"])
+    assert routine._cycle_cache.get('elector_params', lambda: None) is None
+
+
+def test_same_epoch_keeps_cache(tmpdir):
+    chain = FakeChain("-1:elector", {"-1:elector": ["1600000000"]}, key_block_seqno=5)
+    config_cache = ConfigCache()
+    routine = make_routine(tmpdir, chain, config_cache)
+    routine._read_election_ids()
+    chain.elector_addr = "-1:not-read"
+    assert routine._read_election_ids() == ("-1:elector", ["1600000000"])
@@ -0,0 +1,46 @@
+"""
+Console commands of the key management calls
+"""
+import pytest
+
+from tonvalidator.core import TonValidatorEngineConsole
+
+
+class RecordingConsole(TonValidatorEngineConsole):
+
+    def __init__(self, output="success"):
+        super().__init__("validator-engine-console", client_key="client", server_pub_key="server.pub",
+                         server_addr="127.0.0.1:3030")
+        self.output = output
+        self.commands = []
+
+    def _run_command(self, commands: list, timeout=10):
+        self.commands.append(commands)
+        return 0, "\n".join(self.output for _ in commands)
+
+
+def test_delete_temp_key_keeps_perm_key():
+    console = RecordingConsole()
+    console.delete_temp_key("AA", "BB")
+    assert console.commands == [["deltempkey AA BB"]]
+
+
+def test_delete_key():
+    console = RecordingConsole()
+    console.delete_key("AA")
+    assert console.commands == [["delpermkey AA"]]
+
+
+def test_delete_keys_in_single_run():
+    console = RecordingConsole()
+    console.delete_keys([("AA", "BB"), ("CC", None)])
+    assert console.commands == [["deltempkey AA BB", "delpermkey AA", "delpermkey CC"]]
+
+
+def test_failed_delete_raises():
+    console = RecordingConsole(output="error: key not found")
+    for call in (lambda: console.delete_temp_key("AA", "BB"),
+                 lambda: console.delete_key("AA"),
+                 lambda: console.delete_keys([("AA", "BB")])):
+        with pytest.raises(Exception, match="delete"):
+            call()
@@ -0,0 +1,175 @@
+"""
+Keys of the election shared by depools joining it concurrently
+"""
+import threading
+
+import pytest
+
+from routines.elections import ElectionsRoutine
+from routines.models.elections import Election
+from routines.validator_providers.core import Validator
+from settings.elections import ElectionSettings
+from toncommon.models.ElectionParams import ElectionParams
+from toncommon.models.TonTransaction import TonTransaction
+
+ELECTOR_PARAMS = ElectionParams(validators_elected_for=65536, elections_start_before=32768,
+                                elections_end_before=8192, stake_held_for=32768)
+
+
+class FakeValidator(Validator):
+
+    def __init__(self, fail_prepare=False):
+        self.keys = set()
+        self.prepared = set()
+        self.fail_prepare = fail_prepare
+        self.prepare_started = threading.Event()
+        self.release_prepare = threading.Event()
+        self._counter = 0
+
+    def get_new_keys(self, count: int):
+        keys = []
+        for _ in range(count):
+            self._counter += 1
+            keys.append("K{}".format(self._counter))
+        self.keys.update(keys)
+        return keys
+
+    def delete_keys(self, keys):
+        for key, adnl_key in keys:
+            self.keys.discard(key)
+            self.keys.discard(adnl_key)
+            self.prepared.discard(key)
+
+    def generate_validation_request(self, election_id, adnl_key, beneficiary_masterchain_adr, max_factor):
+        return "REQ:{}:{}".format(beneficiary_masterchain_adr, adnl_key)
+
+    def prepare_election_and_sign(self, key, adnl_key, election_start, election_stop, election_req):
+        self.prepare_started.set()
+        self.release_prepare.wait(5)
+        # perm key is added before the failure
+        self.prepared.add(key)
+        if self.fail_prepare:
+            raise Exception("addtempkey failed")
+        return "SIG", "PUB"
+
+    def sign_request(self, sign_key, election_req):
+        assert sign_key in self.prepared, "signing with key not added to validator"
+        return "SIG", "PUB"
+
+    def generate_validation_signed(self, beneficiary_masterchain_adr, election_id, adnl_key, public_key, signature,
+                                   max_factor):
+        return "SIGNED"
+
+
+class FakeTonosCli(object):
+
+    def __init__(self, fail_for=()):
+        self.fail_for = fail_for
+
+    def submit_transaction(self, address, dest, value, payload, private_key, bounce=False):
+        if dest in self.fail_for:
+            raise Exception("transaction to {} failed".format(dest))
+        return TonTransaction(tid="1")
+
+
+class FakeSecretManager(object):
+
+    def get_validator_seed(self):
+        return "seed"
+
+    def get_custodian_seeds(self):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setattr(ElectionsRoutine, "_send_telemetry", lambda self, data_type, data: None)
+
+
+def make_routine(tmpdir, validator, tonos_cli) -> ElectionsRoutine:
+    return ElectionsRoutine(work_dir=str(tmpdir), tonos_cli=tonos_cli, secret_manager=FakeSecretManager(),
+                            election_provider=None, validator_provider=validator,
+                            election_settings=ElectionSettings())
+
+
+def join(routine, election, depool_addr, errors):
+    try:
+        routine._join_elections_depool_mode(depool_addr=depool_addr, validator_addr="-1:validator",
+                                            proxy_addr="-1:proxy" + depool_addr[-1], election=election,
+                                            election_stake=10, elector_params=ELECTOR_PARAMS)
+    except Exception as ex:
+        errors[depool_addr] = ex
+
+
+def run_joins(routine, validator, election, depools):
+    errors = {}
+    threads = [threading.Thread(target=join, args=(routine, election, depool, errors)) for depool in depools]
+    for thread in threads:
+        thread.start()
+    # every depool claims keys before they are added to validator
+    validator.prepare_started.wait(5)
+    validator.release_prepare.set()
+    for thread in threads:
+        thread.join(5)
+    return errors
+
+
+def test_failed_depool_keeps_keys_of_joined_ones(tmpdir):
+    validator = FakeValidator()
+    routine = make_routine(tmpdir, validator, FakeTonosCli(fail_for=("0:depool2",)))
+    election = Election(election_id="1613118553", elector_addr="-1:elector", election_params=ELECTOR_PARAMS)
+    errors = run_joins(routine, validator, election, ["0:depool1", "0:depool2", "0:depool3"])
+    assert list(errors) == ["0:depool2"]
+    assert election.key in validator.keys
+    assert election.election_stake == 20
+    assert routine._active_elections.get(election.election_id) is election
+    assert election.depool_addr in ("0:depool1", "0:depool3")
+    assert not routine._joins_in_progress
+
+
+def test_all_depools_failed_deletes_keys(tmpdir):
+    validator = FakeValidator()
+    routine = make_routine(tmpdir, validator, FakeTonosCli(fail_for=("0:depool1", "0:depool2")))
+    election = Election(election_id="1613118553", elector_addr="-1:elector", election_params=ELECTOR_PARAMS)
+    errors = run_joins(routine, validator, election, ["0:depool1", "0:depool2"])
+    assert len(errors) == 2
+    assert not validator.keys
+    assert election.key is None
+    assert routine._active_elections.get(election.election_id) is None
+
+
+def test_failed_preparation_deletes_partially_added_keys(tmpdir):
+    validator = FakeValidator(fail_prepare=True)
+    routine = make_routine(tmpdir, validator, FakeTonosCli())
+    election = Election(election_id="1613118553", elector_addr="-1:elector", election_params=ELECTOR_PARAMS)
+    errors = run_joins(routine, validator, election, ["0:depool1", "0:depool2"])
+    # joins waiting for the keys fail along with the one preparing them
+    assert len(errors) == 2
+    assert not validator.keys and not validator.prepared
+    assert election.key is None
+    assert not routine._key_preparations
+
+
+class FakeDePool(object):
+
+    def __init__(self, depool_address):
+        self.depool_address = depool_address
+
+
+def test_depools_see_active_elections_of_before_cycle(tmpdir):
+    settings = ElectionSettings()
+    settings.DEPOOL_LIST = [FakeDePool("0:depool1"), FakeDePool("0:depool2")]
+    routine = make_routine(tmpdir, FakeValidator(), FakeTonosCli())
+    routine._election_settings = settings
+    seen = {}
+
+    def process_depool(depool_data, has_active_elections, **kwargs):
+        seen[depool_data.depool_address] = has_active_elections
+        # sibling depool joined meanwhile
+        routine._add_active_election(Election(election_id=depool_data.depool_address[-1],
+                                              elector_addr="-1:elector", election_params=ELECTOR_PARAMS))
+
+    routine._process_depool = process_depool
+    routine._process_depools(validator_addr="-1:validator", new_elections=[], elector_params=ELECTOR_PARAMS,
+                             max_validators=100, valid_stakes=[])
+    assert seen == {"0:depool1": False, "0:depool2": False}
@@ -0,0 +1,71 @@
+"""
+Elector payloads built in-process, expected bytes are laid out by hand from the BOC format
+(not captured from Fift, which is not available to the test run)
+"""
+import base64
+
+import pytest
+
+from toncommon import elector
+from toncommon.boc import crc32c, deserialize_boc
+
+QUERY_ID = 0x5f1e2d3c
+ELECTION_ID = 1613118553
+WALLET_ADDR = "-1:" + "ab" * 32
+ADNL_KEY = "cd" * 32
+PUBLIC_KEY = bytes(range(32))
+SIGNATURE = bytes(range(64, 128))
+
+
+def with_crc(boc_hex: str) -> bytes:
+    boc = bytes.fromhex(boc_hex)
+    return boc + crc32c(boc).to_bytes(4, "little")
+
+
+def test_crc32c():
+    # check value of CRC-32C (Castagnoli)
+    assert crc32c(b"123456789") == 0xe3069283
+
+
+def test_recover_stake_request():
+    expected = with_crc("b5ee9c72" "41" "01" "01" "01" "00" "0e" "00"  # header, 1 cell of 14 bytes
+                        "00" "18" "47657424" "000000005f1e2d3c")  # no refs, 12 bytes of data
+    assert elector.recover_stake_request(query_id=QUERY_ID) == expected
+
+
+@pytest.mark.parametrize("max_factor,expected", [(3, 0x30000), ("2.5", 0x28000), (1, 0x10000), (100, 0x640000)])
+def test_parse_max_factor(max_factor, expected):
+    assert elector.parse_max_factor(max_factor) == expected
+
+
+@pytest.mark.parametrize("max_factor", [0.5, 101])
+def test_parse_max_factor_out_of_range(max_factor):
+    with pytest.raises(ValueError):
+        elector.parse_max_factor(max_factor)
+
+
+def test_validation_request():
+    request = elector.validation_request(WALLET_ADDR, ELECTION_ID, 3, ADNL_KEY)
+    assert request.hex() == "654c5074" "60263c59" "00030000" + "ab" * 32 + "cd" * 32
+
+
+def test_validation_request_workchain():
+    with pytest.raises(ValueError):
+        elector.validation_request("0:" + "ab" * 32, ELECTION_ID, 3, ADNL_KEY)
+
+
+def test_validation_signed():
+    expected = with_crc("b5ee9c72" "41" "01" "02" "01" "00" "99" "00"  # header, 2 cells of 153 bytes
+                        "01" "a8" "4e73744b" "000000005f1e2d3c" + PUBLIC_KEY.hex() +
+                        "60263c59" "00030000" + "cd" * 32 + "01" +  # root cell referencing cell 1
+                        "00" "80" + SIGNATURE.hex())  # signature cell
+    # public key and signature as validator-engine-console prints them
+    public_key = base64.b64encode(elector.PUB_ED25519_MAGIC.to_bytes(4, "big") + PUBLIC_KEY).decode()
+    signature = base64.b64encode(SIGNATURE).decode()
+    boc = elector.validation_signed(WALLET_ADDR, ELECTION_ID, 3, ADNL_KEY, public_key=public_key,
+                                    signature=signature, query_id=QUERY_ID)
+    assert boc == expected
+    assert elector.validation_signed(WALLET_ADDR, ELECTION_ID, 3, ADNL_KEY, public_key=PUBLIC_KEY,
+                                     signature=SIGNATURE, query_id=QUERY_ID) == expected
+    root, = deserialize_boc(boc)
+    assert root.refs[0].data[:64] == SIGNATURE
@@ -0,0 +1,89 @@
+"""
+Endpoints are backed off for transport failures only
+"""
+import os
+import stat
+
+import pytest
+
+from toncommon.policy import CircuitBreaker, ExecutionPolicy
+from tonoscli.core import TonosCli
+
+# fake tonos-cli, answer of "run" depends on the endpoint the dir is configured with
+TONOS_CLI = """#!/bin/sh
+if [ "$1" = "config" ]; then
+    if [ "$2" = "--url" ]; then echo "$3" > tonos-cli.conf.json; fi
+    exit 0
+fi
+case "$(cat tonos-cli.conf.json)" in
+    *command-error*) echo "Error: account is not initialized"; exit 1;;
+    *network-error*) echo "Error: query failed: Network problem"; exit 1;;
+    *) echo '{"value0": "0x1"}';;
+esac
+"""
+
+
+def make_tonos_cli(tmp_path, endpoints, name="tonos-cli", hedge_reads=False) -> TonosCli:
+    """
+    :param name: Name of the binary, circuit of the tool is shared by the binaries of the same name
+    """
+    path = os.path.join(str(tmp_path), name)
+    with open(path, "w") as f:
+        f.write(TONOS_CLI)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return TonosCli(path, cwd=str(tmp_path), config_url=endpoints[0], ton_project_id="project",
+                    ton_endpoints=",".join(endpoints), separate_endpoints=True, hedge_reads=hedge_reads)
+
+
+def configure_endpoints(tonos_cli):
+    # config calls are counted by the circuit too, done beforehand not to interleave with the tested ones
+    for e in tonos_cli._endpoints.endpoints:
+        tonos_cli._ensure_config(endpoint=e)
+
+
+def endpoint(tonos_cli, url):
+    return next(e for e in tonos_cli._endpoints.endpoints if e.url == url)
+
+
+def test_command_error_keeps_endpoint_healthy(tmp_path):
+    tonos_cli = make_tonos_cli(tmp_path, ["http://command-error", "http://healthy"])
+    with pytest.raises(Exception, match="not initialized"):
+        tonos_cli._run_command("run", ["-1:00", "get", "{}"])
+    failing = endpoint(tonos_cli, "http://command-error")
+    assert failing.calls == 1 and failing.failures == 0 and failing.error_rate == 0
+    assert failing.latency is not None
+    # command error is the answer, it is not retried on the next endpoint
+    assert endpoint(tonos_cli, "http://healthy").calls == 0
+
+
+def test_network_error_backs_off_endpoint(tmp_path):
+    tonos_cli = make_tonos_cli(tmp_path, ["http://network-error", "http://healthy"])
+    assert tonos_cli._run_command("run", ["-1:00", "get", "{}"]) == '{"value0": "0x1"}'
+    failing = endpoint(tonos_cli, "http://network-error")
+    assert failing.failures == 1 and failing.latency is None
+    assert tonos_cli._endpoints.ranked()[0].url == "http://healthy"
+
+
+def test_hedged_reads_are_counted_by_circuit(tmp_path):
+    tonos_cli = make_tonos_cli(tmp_path, ["http://network-error", "http://healthy"],
+                               name="tonos-cli-hedged", hedge_reads=True)
+    configure_endpoints(tonos_cli)
+    recorded = []
+    circuit = tonos_cli.circuit
+    record = circuit.record
+    circuit.record = lambda ok: (recorded.append(ok), record(ok))
+    assert tonos_cli._run_command("run", ["-1:00", "get", "{}"]) == '{"value0": "0x1"}'
+    assert recorded == [False, True]
+    assert circuit.state == CircuitBreaker.CLOSED
+
+
+def test_failing_hedged_reads_open_circuit(tmp_path):
+    tonos_cli = make_tonos_cli(tmp_path, ["http://network-error", "http://network-error2"],
+                               name="tonos-cli-failing", hedge_reads=True)
+    tonos_cli._policy = ExecutionPolicy(failure_threshold=2)
+    configure_endpoints(tonos_cli)
+    with pytest.raises(Exception, match="Network problem"):
+        tonos_cli._run_command("run", ["-1:00", "get", "{}"])
+    assert tonos_cli.circuit.state == CircuitBreaker.OPEN
+    with pytest.raises(Exception, match="CIRCUIT OPEN"):
+        tonos_cli._run_command("run", ["-1:00", "get", "{}"])
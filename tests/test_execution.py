@@ -0,0 +1,66 @@
+"""
+Circuit of the tool is opened by transport failures only
+"""
+import os
+import stat
+
+import pytest
+
+from toncommon.core import TonExec
+from toncommon.policy import CircuitBreaker, ExecutionPolicy
+
+
+class FakeTool(TonExec):
+    READ_COMMANDS = ('run',)
+    TRANSPORT_ERRORS = ('network problem',)
+
+
+def make_tool(tmp_path, name, exit_code, output) -> FakeTool:
+    path = os.path.join(str(tmp_path), name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\necho '{}'\nexit {}\n".format(output, exit_code))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return FakeTool(path, policy=ExecutionPolicy(max_retries=0, failure_threshold=2))
+
+
+def test_command_errors_keep_circuit_closed(tmp_path):
+    tool = make_tool(tmp_path, "fake-tool-command-error", 1, "Error: account is not initialized")
+    for _ in range(5):
+        retcode, _ = tool._execute(["run", "addr", "get"])
+        assert retcode == 1
+    assert tool.circuit.state == CircuitBreaker.CLOSED
+
+
+def test_transport_errors_open_circuit(tmp_path):
+    tool = make_tool(tmp_path, "fake-tool-network", 1, "Error: query failed: Network problem")
+    for _ in range(2):
+        tool._execute(["run", "addr", "get"])
+    assert tool.circuit.state == CircuitBreaker.OPEN
+    retcode, _ = tool._execute(["run", "addr", "get"])
+    assert retcode == TonExec.RETCODE_CIRCUIT_OPEN
+
+
+def test_failure_to_run_opens_circuit(tmp_path):
+    tool = FakeTool(os.path.join(str(tmp_path), "fake-tool-missing"),
+                    policy=ExecutionPolicy(max_retries=0, failure_threshold=2))
+    for _ in range(2):
+        retcode, _ = tool._execute(["run"])
+        assert retcode == TonExec.RETCODE_ERROR
+    assert tool.circuit.state == CircuitBreaker.OPEN
+
+
+def test_streaming_goes_through_circuit_without_retries(tmp_path):
+    path = os.path.join(str(tmp_path), "fake-tool-stream")
+    calls = os.path.join(str(tmp_path), "calls")
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\necho call >> '{}'\necho line\necho 'Network problem' >&2\nexit 1\n".format(calls))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    tool = FakeTool(path, policy=ExecutionPolicy(max_retries=3, failure_threshold=2))
+    for _ in range(2):
+        with pytest.raises(Exception, match="non-zero exit status 1"):
+            list(tool._execute_stream(["run"]))
+    with open(calls) as f:
+        assert len(f.readlines()) == 2
+    assert tool.circuit.state == CircuitBreaker.OPEN
+    with pytest.raises(Exception, match="CIRCUIT OPEN"):
+        list(tool._execute_stream(["run"]))
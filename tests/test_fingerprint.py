@@ -0,0 +1,72 @@
+"""
+Fingerprints of tool binaries and config dirs of tonos-cli named by them
+"""
+import hashlib
+import os
+
+from toncommon import fingerprint
+from toncommon.fingerprint import FingerprintCache, file_md5
+from tonoscli.core import TonosCli
+
+
+def write_binary(path, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def count_hashing(monkeypatch) -> list:
+    hashed = []
+
+    def counting_md5(path, *args, **kwargs):
+        hashed.append(path)
+        return file_md5(path, *args, **kwargs)
+    monkeypatch.setattr(fingerprint, "file_md5", counting_md5)
+    return hashed
+
+
+def test_fingerprint_is_cached_and_persisted(tmp_path, monkeypatch):
+    hashed = count_hashing(monkeypatch)
+    binary, cache_path = str(tmp_path / "tool"), str(tmp_path / "fingerprints.json")
+    write_binary(binary, b"v1")
+    assert FingerprintCache(cache_path).get(binary) == hashlib.md5(b"v1").hexdigest()
+    cache = FingerprintCache(cache_path)
+    assert cache.get(binary) == hashlib.md5(b"v1").hexdigest()
+    assert cache.get(binary) == hashlib.md5(b"v1").hexdigest()
+    assert len(hashed) == 1
+
+
+def test_changed_binary_is_hashed_again(tmp_path, monkeypatch):
+    hashed = count_hashing(monkeypatch)
+    binary = str(tmp_path / "tool")
+    write_binary(binary, b"v1")
+    cache = FingerprintCache(str(tmp_path / "fingerprints.json"))
+    cache.get(binary)
+    # same size, only content and mtime differ
+    write_binary(binary, b"v2")
+    stat = os.stat(binary)
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get(binary) == hashlib.md5(b"v2").hexdigest()
+    assert len(hashed) == 2
+
+
+def test_legacy_config_dir_is_moved(tmp_path, monkeypatch):
+    binary = str(tmp_path / "tonos-cli")
+    write_binary(binary, b"#!/bin/sh\n")
+    cwd = str(tmp_path / "tonos")
+    config_key = "http://net.ton.dev.None.project.None"
+    legacy = hashlib.md5(b"#!/bin/sh\n")
+    legacy.update(config_key.encode())
+    legacy_cwd = os.path.join(cwd, legacy.hexdigest())
+    os.makedirs(legacy_cwd)
+    write_binary(os.path.join(legacy_cwd, TonosCli.CONFIG_NAME), b"{}")
+
+    tonos_cli = TonosCli(binary, cwd=cwd, config_url="http://net.ton.dev", ton_project_id="project",
+                         fingerprint_cache=FingerprintCache())
+    assert os.path.exists(os.path.join(tonos_cli._cwd, TonosCli.CONFIG_NAME))
+    assert not os.path.exists(legacy_cwd)
+    # dir of the new name exists, binary is not read again to look for the legacy one
+    migrated = []
+    monkeypatch.setattr(TonosCli, "_migrate_legacy_cwd", lambda self, *args: migrated.append(args))
+    TonosCli(binary, cwd=cwd, config_url="http://net.ton.dev", ton_project_id="project",
+             fingerprint_cache=FingerprintCache())
+    assert migrated == []
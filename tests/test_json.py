@@ -0,0 +1,68 @@
+"""
+JsonAware serialization, compared with the implementation inspecting every instance with dir()
+"""
+import json
+from enum import Enum
+
+from settings.core import TonSettings
+from settings.depool_settings.auto_replenish import AutoReplenishSettings
+from settings.depool_settings.depool import DePoolSettings
+from settings.depool_settings.prudent_elections import PrudentElectionSettings
+from settings.elections import ElectionMode, ElectionSettings
+from settings.wallet_management import WalletManagementSettings
+from toncommon.models.TonCoin import TonCoin
+from toncommon.serialization.json import JsonAware, dumps, loads
+
+CLASSES = [TonSettings, ElectionSettings, WalletManagementSettings, WalletManagementSettings.ActionSpec,
+           WalletManagementSettings.Wallet, WalletManagementSettings.WalletBalanceCheckAction, DePoolSettings,
+           PrudentElectionSettings, TonCoin, AutoReplenishSettings]
+
+
+def legacy_to_json(instance) -> dict:
+    result = {"__class": instance.get_class_code_name()}
+    for attr in dir(instance):
+        value = getattr(instance, attr)
+        if not attr.startswith("__") and not callable(value):
+            if isinstance(value, JsonAware):
+                result[attr] = legacy_to_json(value)
+            elif isinstance(value, list):
+                result[attr] = [legacy_to_json(item) if isinstance(item, JsonAware) else item for item in value]
+            elif isinstance(value, Enum):
+                result[attr] = str(value)
+            else:
+                result[attr] = value
+    return result
+
+
+def make_settings(depools: int) -> TonSettings:
+    elections = ElectionSettings()
+    elections.TON_CONTROL_ELECTION_MODE = ElectionMode.DEPOOL
+    elections.PRUDENT_ELECTION_SETTINGS = PrudentElectionSettings(election_end_join_offset=600, join_threshold=10)
+    elections.DEPOOL_LIST = [
+        DePoolSettings("0:{:064x}".format(i), proxy_addresses=["-1:{:064x}".format(i), "-1:{:064x}".format(i + 1)],
+                       prudent_election_settings=PrudentElectionSettings(600 + i, 10) if i % 2 else None,
+                       replenish_settings=AutoReplenishSettings(TonCoin(100 + i)) if i % 3 else None)
+        for i in range(depools)]
+    settings = TonSettings()
+    settings.ELECTIONS_SETTINGS = elections
+    settings.TON_ENDPOINTS = ["https://a.ton.dev", "https://b.ton.dev"]
+    settings.TOOL_COMMAND_TIMEOUTS = {"call": 600}
+    return settings
+
+
+def test_to_json_same_as_legacy():
+    settings = make_settings(20)
+    data = settings.to_json()
+    assert data == legacy_to_json(settings)
+    assert json.dumps(data) == json.dumps(legacy_to_json(settings))
+    # orjson (if installed) writes it without spaces, same data
+    assert loads(dumps(data)) == data
+
+
+def test_round_trip():
+    data = make_settings(20).to_json()
+    restored = TonSettings.from_json(loads(dumps(data)), classes=CLASSES)
+    assert restored.ELECTIONS_SETTINGS.TON_CONTROL_ELECTION_MODE is ElectionMode.DEPOOL
+    assert restored.ELECTIONS_SETTINGS.DEPOOL_LIST[2].replenish_settings.topup_sum.as_tokens() == 102
+    assert restored.to_json() == data
+    assert legacy_to_json(restored) == data
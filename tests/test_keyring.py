@@ -0,0 +1,51 @@
+"""
+Local signing with keys of validator keyring
+"""
+import os
+import struct
+
+import pytest
+
+from toncommon.crypto import ed25519
+from tonvalidator.keyring import LocalSigningKey, ValidatorKeyring, PK_ED25519_ID
+
+KEY_HASH = "A1" * 32
+SEED = bytes(range(32))
+
+
+@pytest.fixture()
+def keyring(tmp_path):
+    with open(os.path.join(str(tmp_path), KEY_HASH), "wb") as f:
+        f.write(struct.pack("<I", PK_ED25519_ID) + SEED)
+    keyring = ValidatorKeyring(str(tmp_path))
+    yield keyring
+    keyring.close()
+
+
+def test_sign(keyring):
+    signature, public_key = keyring.sign(KEY_HASH.lower(), b"request")
+    assert public_key[4:] == ed25519.public_key(SEED)
+    assert ed25519.verify(public_key[4:], b"request", signature)
+
+
+def test_forget_zeroizes_key(keyring):
+    key = keyring.get_key(KEY_HASH)
+    seed = key._seed
+    keyring.forget(KEY_HASH)
+    assert key.closed and seed == bytearray(len(SEED))
+    with pytest.raises(ValueError):
+        key.sign(b"request")
+
+
+def test_key_copies_seed_buffer():
+    data = bytearray(b"\x00" * 4 + SEED)
+    with LocalSigningKey(memoryview(data)[4:]) as key:
+        data[:] = bytes(len(data))
+        assert key.public_key == ed25519.public_key(SEED)
+
+
+def test_unsupported_key(tmp_path):
+    with open(os.path.join(str(tmp_path), KEY_HASH), "wb") as f:
+        f.write(b"\x00" * 36)
+    with pytest.raises(ValueError):
+        ValidatorKeyring(str(tmp_path)).get_key(KEY_HASH)
@@ -0,0 +1,77 @@
+"""
+Liteserver client talking to the stub liteserver over ADNL
+"""
+import os
+import struct
+
+import pytest
+
+from toncommon.boc import serialize_boc
+from tonliteserver import tl
+from tonliteserver.core import TonLiteServerClient
+from tonliteserver.exceptions.base import TonLiteServerError
+from tonliteserver.stack import method_id, serialize_stack
+from tonliteserver.stub import StubLiteServer
+
+ELECTOR_ADDR = "-1:" + "33" * 32
+ELECTION_ID = 1613118553
+LAST_BLOCK = tl.BlockIdExt(-1, -(1 << 63), 1000, b"\x01" * 32, b"\x02" * 32)
+
+
+def lite_query(function: str, payload: bytes = b"") -> bytes:
+    return tl.constructor("liteServer.query") + tl.pack_bytes(tl.constructor(function) + payload)
+
+
+def run_method_query(address: str, method: str) -> bytes:
+    return lite_query("liteServer.runSmcMethod", struct.pack("<I", 4) + LAST_BLOCK.pack() +
+                      TonLiteServerClient._account_id(address) + struct.pack("<q", method_id(method)) +
+                      tl.pack_bytes(serialize_boc(serialize_stack([]))))
+
+
+def run_method_result(values: list) -> bytes:
+    return tl.constructor("liteServer.runMethodResult") + struct.pack("<I", 4) + LAST_BLOCK.pack() + \
+        LAST_BLOCK.pack() + struct.pack("<i", 0) + tl.pack_bytes(serialize_boc(serialize_stack(values)))
+
+
+RESPONSES = {
+    lite_query("liteServer.getMasterchainInfo"):
+        tl.constructor("liteServer.masterchainInfo") + LAST_BLOCK.pack() + b"\x03" * 32 +
+        struct.pack("<i", -1) + b"\x04" * 64,
+    run_method_query(ELECTOR_ADDR, "active_election_id"): run_method_result([ELECTION_ID]),
+}
+
+
+@pytest.fixture()
+def server():
+    server = StubLiteServer(os.urandom(32), RESPONSES)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def client(server, tmp_path):
+    pub_key_path = str(tmp_path / "liteserver.pub")
+    with open(pub_key_path, "wb") as f:
+        f.write(tl.constructor("pub.ed25519") + server.public_key)
+    client = TonLiteServerClient(server.address, pub_key_path, timeout=5, record_path=str(tmp_path / "record.jsonl"))
+    yield client
+    client.close()
+
+
+def test_ping(client):
+    assert client._adnl.ping()
+
+
+def test_get_election_ids(client, tmp_path):
+    assert client.get_election_ids(ELECTOR_ADDR) == [str(ELECTION_ID)]
+    # recorded queries can be replayed by the stub
+    assert StubLiteServer.load_responses(str(tmp_path / "record.jsonl")) == RESPONSES
+
+
+def test_error_answer(client):
+    with pytest.raises(TonLiteServerError) as error:
+        client.get_election_ids("-1:" + "44" * 32)
+    assert error.value.code == -400
+    # connection stays usable after the error
+    assert client.get_election_ids(ELECTOR_ADDR) == [str(ELECTION_ID)]
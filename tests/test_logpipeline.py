@@ -0,0 +1,87 @@
+"""
+Truncation, redaction, rotation and JSON formatting of the log pipeline
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+
+from toncommon.contextmanager import SecretRedactor
+from utils.logpipeline import CompressingRotatingFileHandler, LogPipeline, _RoutedQueueHandler, truncate_message
+
+
+def make_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_truncate_message():
+    assert truncate_message("short", 10) == "short"
+    assert truncate_message("x" * 100, 0) == "x" * 100
+    message = truncate_message("a" * 50 + "b" * 50, 10)
+    assert message.startswith("aaaaa\n")
+    assert message.endswith("\nbbbbb")
+    assert "[truncated 90 of 100 bytes]" in message
+
+
+def test_rotated_segments_are_compressed(tmp_path):
+    path = str(tmp_path / "test.log")
+    handler = CompressingRotatingFileHandler(path, maxBytes=100, backupCount=2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(3):
+        handler.emit(logging.makeLogRecord({"msg": str(i) * 80}))
+    handler.close()
+    assert sorted(os.listdir(str(tmp_path))) == ["test.log", "test.log.1.gz", "test.log.2.gz"]
+    with gzip.open(path + ".2.gz", "rt") as f:
+        assert f.read() == "0" * 80 + "\n"
+    with gzip.open(path + ".1.gz", "rt") as f:
+        assert f.read() == "1" * 80 + "\n"
+    with open(path) as f:
+        assert f.read() == "2" * 80 + "\n"
+
+
+def test_routed_handler_redacts_message_and_exception():
+    log_queue = queue.Queue()
+    logger = make_logger("test-pipeline-redaction")
+    handler = _RoutedQueueHandler(log_queue, "route", max_message_size=0)
+    logger.addHandler(handler)
+    redactor = SecretRedactor.get_redactor()
+    redactor.register(["s3cr3t"])
+    try:
+        try:
+            raise ValueError("failed with s3cr3t")
+        except ValueError:
+            logger.exception("seed %s", "s3cr3t")
+    finally:
+        redactor.unregister(["s3cr3t"])
+        logger.removeHandler(handler)
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "seed ***"
+    assert "ValueError: failed with ***" in record.exc_text
+    assert "s3cr3t" not in record.exc_text
+    assert record.route == "route"
+
+
+def test_json_lines_keep_exception_apart_from_truncated_message(tmp_path):
+    pipeline = LogPipeline(str(tmp_path), json_lines=True, max_message_size=20)
+    pipeline.add_loggers(["test-pipeline-json"], file="test.log", stdout=False)
+    logger = make_logger("test-pipeline-json")
+    pipeline.start()
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("m" * 100)
+    finally:
+        pipeline.stop()
+        logger.handlers = []
+    with open(str(tmp_path / "test.log")) as f:
+        data = json.loads(f.readline())
+    assert data["level"] == "ERROR"
+    assert "[truncated 80 of 100 bytes]" in data["message"]
+    assert "Traceback" not in data["message"]
+    assert data["exception"].startswith("Traceback")
+    assert data["exception"].endswith("ValueError: boom")
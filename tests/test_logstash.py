@@ -0,0 +1,71 @@
+"""
+Spilling of LogStash records to disk and their replay
+"""
+import json
+import os
+import socket
+import threading
+import time
+
+from logstash.client import LogStashClient
+
+
+def _spill_file(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_callers_do_not_write_spill_file(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    client = LogStashClient(None, None, max_queue_size=2, spill_path=spill_path)
+    for i in range(4):
+        client.send_data("test", {"n": i})
+    assert not os.path.exists(spill_path)
+
+    batch, offset = client._next_batch()
+    assert [json.loads(line)["n"] for line in batch] == [0, 1]
+    assert offset is None
+    batch, offset = client._next_batch()
+    assert [json.loads(line)["n"] for line in batch] == [2, 3]
+    assert offset == os.path.getsize(spill_path)
+
+
+def test_replay_resumes_from_persisted_offset(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    _spill_file(spill_path, [{"n": 0}, {"n": 1}, {"n": 2}])
+    client = LogStashClient(None, None, spill_path=spill_path)
+    batch, offset = client._next_batch()
+    assert len(batch) == 3
+    client._save_spill_offset(len(batch[0]))
+
+    restarted = LogStashClient(None, None, spill_path=spill_path)
+    batch, offset = restarted._next_batch()
+    assert [json.loads(line)["n"] for line in batch] == [1, 2]
+
+
+def test_spilled_records_are_sent_in_order(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    client = LogStashClient("127.0.0.1", server.getsockname()[1], max_batch=2, flush_interval=0.1,
+                            max_queue_size=3, spill_path=spill_path)
+    for i in range(6):
+        client.send_data("test", {"n": i})
+    threading.Thread(target=client._process_data, daemon=True).start()
+
+    conn, _ = server.accept()
+    conn.settimeout(5)
+    received = b""
+    while received.count(b"\n") < 6:
+        received += conn.recv(4096)
+    conn.close()
+    server.close()
+    assert [json.loads(line)["n"] for line in received.decode().splitlines()] == list(range(6))
+
+    deadline = time.time() + 5
+    while os.path.exists(spill_path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert not os.path.exists(spill_path)
+    assert not os.path.exists(spill_path + ".offset")
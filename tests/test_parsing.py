@@ -0,0 +1,150 @@
+"""
+Parsers of toncommon.parsing against the corpus of tool outputs in fixtures/
+"""
+import pytest
+
+from conftest import read_fixture
+from toncommon.models.depool.DePoolElectionEvent import DePoolElectionEvent
+from toncommon.models.depool.DePoolLowBalanceEvent import DePoolLowBalanceEvent
+from toncommon.parsing import results, tlb
+from toncommon.parsing.depool import DePoolEventParser, parse_depool_events
+from tonliteclient.core import TonLiteClient
+from tonoscli.core import TonosCli
+
+
+def test_config_param_1():
+    data = tlb.parse_config_param(read_fixture("lite-client", "getconfig_1.txt"), 1)
+    assert data == {"elector_addr": "x" + "3" * 64}
+
+
+def test_config_param_15():
+    data = tlb.parse_config_param(read_fixture("lite-client", "getconfig_15.txt"), 15)
+    assert data == {"validators_elected_for": "65536", "elections_start_before": "32768",
+                    "elections_end_before": "8192", "stake_held_for": "32768"}
+
+
+def test_config_param_16():
+    data = tlb.parse_config_param(read_fixture("lite-client", "getconfig_16.txt"), 16)
+    assert data == {"max_validators": "1000", "max_main_validators": "100", "min_validators": "13"}
+
+
+def test_config_param_17_multiline():
+    data = tlb.parse_config_param(read_fixture("lite-client", "getconfig_17.txt"), 17)
+    assert data == {
+        "min_stake": {"@type": "nanograms",
+                      "amount": {"@type": "var_uint", "len": "6", "value": "10000000000000"}},
+        "max_stake": {"@type": "nanograms",
+                      "amount": {"@type": "var_uint", "len": "7", "value": "10000000000000000"}},
+        "min_total_stake": {"@type": "nanograms",
+                            "amount": {"@type": "var_uint", "len": "6", "value": "100000000000000"}},
+        "max_stake_factor": "196608"
+    }
+
+
+def test_config_param_missing():
+    assert tlb.parse_config_param(read_fixture("lite-client", "getconfig_15.txt"), 17) is None
+
+
+def test_tlb_unclosed():
+    # output cut in the middle of the value
+    assert tlb.parse_tlb_value("( a:(b c) d:1") == (None, 13)
+
+
+def test_lite_client_params():
+    client = TonLiteClient("lite-client", "127.0.0.1:3031", "liteserver.pub")
+    assert client._parse_elector_address(
+        tlb.parse_config_param(read_fixture("lite-client", "getconfig_1.txt"), 1)) == "-1:" + "3" * 64
+    stake_params = client._parse_stake_params(tlb.parse_config_param(read_fixture("lite-client", "getconfig_17.txt"), 17))
+    assert (stake_params.min_stake, stake_params.max_stake) == (10000000000000, 10000000000000000)
+    assert client._parse_stake_params(None) is None
+
+
+def test_runmethod_result():
+    assert results.parse_runmethod_result(read_fixture("lite-client", "runmethod_active_election_id.txt")) == \
+        ["1613118553"]
+    client = TonLiteClient("lite-client", "127.0.0.1:3031", "liteserver.pub")
+    assert client._parse_election_ids(read_fixture("lite-client", "runmethod_no_elections.txt")) == []
+    assert results.parse_runmethod_result("conn ready\n") is None
+
+
+def test_participant_list():
+    assert results.parse_participant_list(read_fixture("lite-client", "runmethodfull_participant_list.txt")) == [
+        [12345678901234567890, 10000000000000],
+        [98765432109876543210, 20000000000000],
+        [11111111111111111111, 30000000000000]
+    ]
+
+
+def test_tonos_config():
+    out = read_fixture("tonos-cli", "getconfig_17.txt")
+    assert results.parse_json_after(out, "Config p17:") == {"max_stake": "10000000000000000",
+                                                            "max_stake_factor": 196608,
+                                                            "min_stake": "10000000000000",
+                                                            "min_total_stake": "100000000000000"}
+    assert results.parse_json_after(out, "Config p16:") is None
+
+
+def test_tonos_result():
+    assert results.parse_result_json(read_fixture("tonos-cli", "run_active_election_id.txt")) == \
+        {"value0": "1613118553"}
+
+
+def test_tonos_account():
+    account = TonosCli._parse_account("-1:" + "7" * 64, read_fixture("tonos-cli", "account.txt"))
+    assert account.type == "Active"
+    assert account.balance == 20000000000000
+    assert account.last_paid == 1613118553
+    assert account.data == "b5ee9c720101030100a30002010201"
+    with pytest.raises(Exception, match="Account not found"):
+        TonosCli._parse_account("0:" + "0" * 63 + "1", read_fixture("tonos-cli", "account_not_found.txt"))
+
+
+def test_tonos_query_raw():
+    out = read_fixture("tonos-cli", "query_raw_key_block.txt")
+    assert results.parse_json_array(out) == [{"seq_no": 8421377}]
+    assert TonosCli._to_key_block_seqno(out) == 8421377
+    assert TonosCli._to_key_block_seqno("Connecting to net.ton.dev\n[]\n") is None
+
+
+def test_depool_events():
+    events = list(parse_depool_events(read_fixture("tonos-cli", "depool_events.txt").splitlines(keepends=True)))
+    assert [(event.name, type(event)) for event in events] == [
+        ("StakeSigningRequested", DePoolElectionEvent),
+        ("TooLowDePoolBalance", DePoolLowBalanceEvent),
+        ("RoundStakeIsAccepted", type(events[2]))
+    ]
+    assert events[0].eid == "6ee7e4a4ae32d5cd0ec23d3c3e5ea3a1d1f12e7f9d9b2e0c2e1d0c9c8d3f4e5a"
+    assert events[0].election_id == "1613120270"
+    assert events[0].proxy == "-1:" + "0a6a" * 16
+    assert events[1].balance == "1000000000"
+    assert events[2].data == '{"queryId":"1612990000","comment":"0"}'
+
+
+def test_depool_events_limit():
+    lines = read_fixture("tonos-cli", "depool_events.txt").splitlines()
+    assert [event.name for event in parse_depool_events(lines, max_events=1)] == ["StakeSigningRequested"]
+
+
+def test_depool_event_parser_is_incremental():
+    parser = DePoolEventParser()
+    fed = [parser.feed(line) for line in read_fixture("tonos-cli", "depool_events.txt").splitlines()[:8]]
+    # event is returned right on its data line, not at the end of output
+    assert [i for i, event in enumerate(fed) if event] == [7]
+
+
+def test_console_json():
+    assert results.parse_console_json(read_fixture("rconsole", "getstats.txt")) == {
+        "sync_status": "synchronization_finished",
+        "masterchainblocktime": 1613118553,
+        "masterchainblocknumber": 299,
+        "timediff": 2,
+        "in_current_vset_p34": False,
+        "in_next_vset_p36": False
+    }
+
+
+def test_console_json_missing_values():
+    data = results.parse_console_json(read_fixture("rconsole", "getstats_missing_values.txt"))
+    assert data["timediff"] is None
+    assert data["masterchainblocktime"] is None
+    assert data["sync_status"] == "start_boot"
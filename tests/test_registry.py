@@ -0,0 +1,57 @@
+"""
+State queries of the election registry
+"""
+from routines.models.elections import Election
+from routines.models.registry import ElectionRegistry
+from toncommon.models.ElectionParams import ElectionParams
+
+ELECTOR_PARAMS = ElectionParams(validators_elected_for=65536, elections_start_before=32768,
+                                elections_end_before=8192, stake_held_for=32768)
+ELECTED_FOR = ELECTOR_PARAMS.validators_elected_for
+
+
+def make_registry():
+    elections = [Election(election_id=str(1600000000 + i * ELECTED_FOR), elector_addr="-1:elector",
+                          election_params=ELECTOR_PARAMS) for i in range(4)]
+    elections.append(Election(election_id="1", elector_addr="-1:elector"))
+    return ElectionRegistry(elections), elections
+
+
+def test_by_state_matches_election_state():
+    registry, elections = make_registry()
+    for election in elections[:4]:
+        for now in (election.get_election_end_time(), election.get_validation_end_time(),
+                    election.get_reward_time(), election.get_reward_time() + 1):
+            for state in (Election.State.ELECTIONS, Election.State.VALIDATION, Election.State.FREEZE,
+                          Election.State.REWARD):
+                expected = [e for e in elections[:4] if state_at(e, now) == state]
+                assert registry.by_state(state, now=now) == expected
+    assert registry.by_state(None) == [elections[4]]
+
+
+def state_at(election, now):
+    if now > election.get_reward_time():
+        return Election.State.REWARD
+    if now > election.get_validation_end_time():
+        return Election.State.FREEZE
+    if now > election.get_election_end_time():
+        return Election.State.VALIDATION
+    return Election.State.ELECTIONS
+
+
+def test_stake_returns():
+    registry, elections = make_registry()
+    now = elections[1].get_reward_time() + 1
+    assert registry.returning_stake_before(now) == elections[:2]
+    assert registry.next_stake_return(now=now) is elections[2]
+    assert registry.next_stake_return(now=elections[3].get_reward_time() + 1) is None
+    assert registry.latest() is elections[3]
+
+
+def test_remove():
+    registry, elections = make_registry()
+    assert registry.remove(elections[0])
+    assert not registry.remove(elections[0])
+    assert elections[0].election_id not in registry
+    assert registry.returning_stake_before(elections[3].get_reward_time() + 1) == elections[1:4]
+    assert registry.next_stake_return(now=0) is elections[1]
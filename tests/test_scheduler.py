@@ -0,0 +1,44 @@
+"""
+Wakeups of the election routine
+"""
+import time
+
+from routines.models.elections import Election
+from routines.scheduler import ElectionScheduler
+from toncommon.models.ElectionParams import ElectionParams
+
+ELECTOR_PARAMS = ElectionParams(validators_elected_for=65536, elections_start_before=32768,
+                                elections_end_before=8192, stake_held_for=32768)
+
+
+def test_wakes_at_scheduled_moment():
+    scheduler = ElectionScheduler()
+    scheduler.schedule(time.time() + 1, "soon")
+    scheduler.schedule(time.time() + 3600, "later")
+    started = time.time()
+    assert scheduler.wait(10) == ["soon"]
+    assert time.time() - started < 2
+    assert scheduler.next_wakeup() > time.time() + 3000
+
+
+def test_poll_ends_sleep():
+    scheduler = ElectionScheduler()
+    polls = []
+
+    def poll():
+        polls.append(time.time())
+        return len(polls) == 2
+
+    started = time.time()
+    assert scheduler.wait(10, poll=poll, poll_interval=0.1) == ["change found by poll"]
+    assert len(polls) == 2 and time.time() - started < 1
+
+
+def test_schedule_election():
+    scheduler = ElectionScheduler(grace_period=30)
+    election_id = int(time.time()) + 40000
+    election = Election(election_id=str(election_id), elector_addr="-1:elector", election_params=ELECTOR_PARAMS)
+    scheduler.schedule_election(election, join_offsets=[600])
+    assert scheduler.next_wakeup() == election.get_election_start_time()
+    scheduler.schedule_election(election, join_offsets=[600])
+    assert len(scheduler._queue) == 3
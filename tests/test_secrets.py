@@ -0,0 +1,87 @@
+"""
+Cache of decrypted secrets
+"""
+import time
+
+from secrets.interfaces.secretmanager import SecretManagerAbstract
+
+
+class CountingSecretManager(SecretManagerAbstract):
+
+    def __init__(self, connection_string="v1"):
+        super().__init__(connection_string, keys_folder=None)
+        self.loaded = []
+
+    def _secrets(self):
+        return {"seed": [self._connection_string.encode()], "other": [b"x"]}
+
+    def _load_secrets(self):
+        self.loaded.append("*")
+        return self._secrets()
+
+    def _load_secret(self, name: str):
+        self.loaded.append(name)
+        return self._secrets().get(name)
+
+    def get_validator_seed(self):
+        values = self._get_cached_secret("seed")
+        return values[0] if values else None
+
+
+def test_secrets_are_decrypted_once_within_ttl():
+    manager = CountingSecretManager()
+    manager.configure_cache(3600)
+    assert manager.get_validator_seed() == "v1"
+    assert manager.get_validator_seed() == "v1"
+    assert manager.loaded == ["*"]
+
+
+def test_ttl_expiry_decrypts_again():
+    manager = CountingSecretManager()
+    manager.configure_cache(0.05)
+    manager.get_validator_seed()
+    time.sleep(0.1)
+    manager.get_validator_seed()
+    assert manager.loaded == ["*", "*"]
+
+
+def test_forever_cached_with_ttl_none():
+    manager = CountingSecretManager()
+    manager.configure_cache(None)
+    manager.warm_up()
+    manager._cache_loaded_at -= 10 ** 6
+    manager.get_validator_seed()
+    assert manager.loaded == ["*"]
+
+
+def test_ttl_zero_decrypts_only_requested_secret():
+    manager = CountingSecretManager()
+    manager.configure_cache(0)
+    manager.warm_up()
+    assert manager.get_validator_seed() == "v1"
+    assert manager.get_validator_seed() == "v1"
+    assert manager.loaded == ["seed", "seed"]
+    assert manager._cache == {}
+
+
+def test_evict_drops_cache():
+    manager = CountingSecretManager()
+    manager.warm_up()
+    manager.evict()
+    assert manager._cache == {}
+    manager.get_validator_seed()
+    assert manager.loaded == ["*", "*"]
+
+
+def test_refresh_picks_up_rotated_connection_string():
+    manager = CountingSecretManager()
+    manager.warm_up()
+    manager.start_refresh(0.05, lambda: "v2")
+    try:
+        deadline = time.time() + 5
+        while manager.get_validator_seed() != "v2" and time.time() < deadline:
+            time.sleep(0.01)
+        assert manager.get_validator_seed() == "v2"
+    finally:
+        manager.close()
+    assert manager._cache == {}
@@ -0,0 +1,139 @@
+"""
+Framing of the interactive tool sessions, checked against a stub tool
+"""
+import os
+import stat
+import sys
+import time
+
+from toncommon.core import TonExec
+from toncommon.policy import CircuitBreaker, ExecutionPolicy
+from toncommon.session import TonExecSession
+
+# prints a banner, then serves commands like lite-client/console do: unknown commands are reported as errors,
+# 'late' prints its answer asynchronously after the next commands are processed
+STUB_TOOL = """#!{python}
+import os
+import sys
+import threading
+import time
+
+def late(delay, text):
+    time.sleep(delay)
+    print(text, flush=True)
+
+print("conn ready", flush=True)
+for line in sys.stdin:
+    cmd, *args = line.split()
+    if cmd == "echo":
+        print(" ".join(args), flush=True)
+    elif cmd == "late":
+        threading.Thread(target=late, args=(float(args[0]), args[1])).start()
+    elif cmd == "sleep":
+        time.sleep(float(args[0]))
+    elif cmd == "exit":
+        sys.exit(int(args[0]))
+    elif cmd == "flaky":
+        if not os.path.exists(args[0]):
+            open(args[0], "w").close()
+            sys.exit(1)
+        print("ok", flush=True)
+    elif cmd == "pid":
+        print(os.getpid(), flush=True)
+    elif cmd == "quit":
+        break
+    else:
+        print("error: unknown command " + cmd, flush=True)
+"""
+
+
+class StubTool(TonExec):
+    READ_COMMANDS = ('echo', 'flaky')
+
+    def __init__(self, exec_path, policy: ExecutionPolicy = None):
+        super().__init__(exec_path, policy=policy)
+        self._open_session([])
+
+
+def make_stub(tmp_path, name="stub-tool") -> str:
+    path = os.path.join(str(tmp_path), name)
+    with open(path, "w") as f:
+        f.write(STUB_TOOL.format(python=sys.executable))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def test_commands_of_frame(tmp_path):
+    session = TonExecSession(make_stub(tmp_path), [], keep_preamble=True)
+    try:
+        assert session.execute(["echo a", "echo b"], timeout=5) == (0, "conn ready\na\nb")
+        assert session.execute(["echo c"], timeout=5) == (0, "conn ready\nc")
+    finally:
+        session.close()
+
+
+def test_late_output_is_awaited(tmp_path):
+    session = TonExecSession(make_stub(tmp_path), [], late_output_timeout=0.5)
+    try:
+        assert session.execute(["late 0.1 answer"], timeout=5) == (0, "answer")
+        assert session.execute(["echo next"], timeout=5) == (0, "next")
+    finally:
+        session.close()
+
+
+def test_stale_output_does_not_get_into_next_frame(tmp_path):
+    session = TonExecSession(make_stub(tmp_path), [])
+    try:
+        assert session.execute(["late 0.2 answer"], timeout=5) == (0, "")
+        time.sleep(0.5)
+        assert session.execute(["echo next"], timeout=5) == (0, "next")
+    finally:
+        session.close()
+
+
+def test_timeout_kills_and_respawns(tmp_path):
+    session = TonExecSession(make_stub(tmp_path), [])
+    try:
+        _, pid = session.execute(["pid"], timeout=5)
+        retcode, out = session.execute(["sleep 5"], timeout=0.3)
+        assert retcode == TonExec.RETCODE_TIMEOUT
+        assert "TIMEOUT" in out
+        assert not session.alive
+        retcode, new_pid = session.execute(["pid"], timeout=5)
+        assert retcode == 0
+        assert new_pid != pid
+    finally:
+        session.close()
+
+
+def test_exit_of_tool(tmp_path):
+    session = TonExecSession(make_stub(tmp_path), [])
+    try:
+        retcode, out = session.execute(["exit 3"], timeout=5)
+        assert retcode == 3
+        assert "session died" in out
+        assert session.execute(["echo back"], timeout=5) == (0, "back")
+    finally:
+        session.close()
+
+
+def test_session_reads_are_retried(tmp_path):
+    tool = StubTool(make_stub(tmp_path), policy=ExecutionPolicy(backoff_base=0))
+    try:
+        assert tool._execute_in_session(["flaky {}".format(tmp_path / "flaky")], timeout=5) == (0, "ok")
+    finally:
+        tool.close_session()
+
+
+def test_session_timeouts_open_circuit(tmp_path):
+    tool = StubTool(make_stub(tmp_path, "stub-tool-hanging"),
+                    policy=ExecutionPolicy(max_retries=0, failure_threshold=2))
+    try:
+        for _ in range(2):
+            retcode, _ = tool._execute_in_session(["sleep 5"], timeout=0.2)
+            assert retcode == TonExec.RETCODE_TIMEOUT
+        assert tool.circuit.state == CircuitBreaker.OPEN
+        retcode, _ = tool._execute_in_session(["echo a"], timeout=5)
+        assert retcode == TonExec.RETCODE_CIRCUIT_OPEN
+    finally:
+        tool.close_session()
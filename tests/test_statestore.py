@@ -0,0 +1,67 @@
+"""
+Loading of the routine state from snapshot and journal
+"""
+import os
+
+from routines.statestore import StateStore
+
+
+def make_store(tmp_path) -> StateStore:
+    store = StateStore(str(tmp_path))
+    store.save_elections({"1:": {"id": "1"}})
+    store.save_elections({"1:": {"id": "1"}, "2:": {"id": "2"}})
+    store.set_depool_value("0:depool", "last_ticktock", 100)
+    store.close()
+    return store
+
+
+def journal(tmp_path) -> str:
+    return os.path.join(str(tmp_path), "state.journal")
+
+
+def test_load(tmp_path):
+    make_store(tmp_path)
+    store = StateStore(str(tmp_path))
+    store.load()
+    assert store.get_elections() == [{"id": "1"}, {"id": "2"}]
+    assert store.get_depool_value("0:depool", "last_ticktock") == 100
+
+
+def test_partial_record_dropped(tmp_path):
+    make_store(tmp_path)
+    with open(journal(tmp_path), "a") as f:
+        f.write('{"op": "put", "section": "elections", "key": "3:", "val')
+    store = StateStore(str(tmp_path))
+    store.load()
+    assert len(store.get_elections()) == 2
+    assert open(journal(tmp_path)).read().endswith("}\n")
+
+
+def test_corrupt_record_truncated(tmp_path):
+    make_store(tmp_path)
+    with open(journal(tmp_path)) as f:
+        lines = f.readlines()
+    lines[1] = "{garbage\n"
+    with open(journal(tmp_path), "w") as f:
+        f.writelines(lines)
+    store = StateStore(str(tmp_path))
+    store.load()
+    # state up to the last valid record
+    assert store.get_elections() == [{"id": "1"}]
+    assert store.get_depool_value("0:depool", "last_ticktock") is None
+    assert open(journal(tmp_path)).readlines() == lines[:1]
+    # journal keeps working after truncation
+    store.set_depool_value("0:depool", "last_ticktock", 200)
+    store.close()
+    store = StateStore(str(tmp_path))
+    store.load()
+    assert store.get_depool_value("0:depool", "last_ticktock") == 200
+
+
+def test_record_without_fields_truncated(tmp_path):
+    make_store(tmp_path)
+    with open(journal(tmp_path), "a") as f:
+        f.write('["not", "a", "record"]\n')
+    store = StateStore(str(tmp_path))
+    store.load()
+    assert len(store.get_elections()) == 2
@@ -0,0 +1,46 @@
+"""
+Cycle tracing across threads and retention of trace files
+"""
+import os
+import threading
+
+from metrics.tracing import Tracer, TracedThreadPoolExecutor, write_chrome_trace
+
+
+def test_unrelated_thread_is_not_recorded():
+    tracer = Tracer()
+    root = tracer.start_cycle("cycle")
+    thread = threading.Thread(target=lambda: tracer.record("queue tool", 0.1))
+    thread.start()
+    thread.join()
+    tracer.end_cycle()
+    assert root.children == []
+
+
+def test_executor_task_nests_into_submitting_span():
+    tracer = Tracer()
+    Tracer._instance, previous = tracer, Tracer._instance
+    try:
+        root = tracer.start_cycle("cycle")
+        with tracer.span("prefetch") as prefetch:
+            with TracedThreadPoolExecutor(max_workers=2) as executor:
+                executor.submit(tracer.record, "tool", 0.1).result()
+        tracer.end_cycle()
+    finally:
+        Tracer._instance = previous
+    assert [child.name for child in root.children] == ["prefetch"]
+    assert [child.name for child in prefetch.children] == ["tool"]
+
+
+def test_trace_files_are_capped(tmp_path):
+    out_dir = str(tmp_path)
+    for i in range(5):
+        with open(os.path.join(out_dir, "cycle-{}.trace.json".format(i)), "w") as f:
+            f.write("{}")
+        os.utime(os.path.join(out_dir, "cycle-{}.trace.json".format(i)), (i, i))
+    tracer = Tracer()
+    root = tracer.start_cycle("cycle")
+    tracer.end_cycle()
+    path = write_chrome_trace(root, out_dir, keep=3)
+    assert sorted(os.listdir(out_dir)) == sorted(["cycle-3.trace.json", "cycle-4.trace.json",
+                                                  os.path.basename(path)])